@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark of the CloudKitty REST client against the ``openstack`` CLI.
+
+Fetches the same billing window with ``openstack rating dataframes get`` (a new
+interpreter, a new Keystone authentication and a JSON text round-trip per run)
+and with ``CloudKittyClient`` over an already authenticated session, both as a
+single request and split into parallel chunks, and prints the median latency of
+each. Needs the usual ``OS_*`` credentials and the ``openstack`` CLI on the PATH.
+
+Usage:
+    python -m benchmarks.billing_client --hours 168 --chunk-hours 24 --workers 4 --runs 5
+"""
+
+import argparse
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from src.billing import CloudKittyClient
+from src.config import load_openstack_credentials
+from src.utils import isoformat
+
+
+def time_cli(start, end):
+    command = [
+        "openstack",
+        "rating",
+        "dataframes",
+        "get",
+        "-b",
+        isoformat(start),
+        "-e",
+        isoformat(end),
+        "-c",
+        "Resources",
+        "-f",
+        "json",
+    ]
+    started = time.perf_counter()
+    subprocess.run(command, capture_output=True, text=True, check=True)
+    return time.perf_counter() - started
+
+
+def time_client(client, start, end):
+    started = time.perf_counter()
+    records = client.get_records(start, end)
+    return time.perf_counter() - started, len(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hours", type=int, default=24, help="Length of the billing window")
+    parser.add_argument("--chunk-hours", type=float, default=24, help="Chunk length of the parallel client")
+    parser.add_argument("--workers", type=int, default=4, help="Chunks fetched concurrently")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    creds, missing_vars = load_openstack_credentials()
+    if not creds:
+        sys.exit(f"missing credentials: {', '.join(missing_vars)}")
+
+    from openstack import connection
+
+    end = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    start = end - timedelta(hours=args.hours)
+
+    setup_started = time.perf_counter()
+    conn = connection.Connection(**creds)
+    conn.authorize()
+    client = CloudKittyClient(conn.session, region_name=conn.config.region_name, chunk_hours=args.hours, workers=1)
+    setup = time.perf_counter() - setup_started
+    chunked = CloudKittyClient(
+        conn.session, region_name=conn.config.region_name, chunk_hours=args.chunk_hours, workers=args.workers
+    )
+
+    client_runs = [time_client(client, start, end) for _ in range(args.runs)]
+    client_ms = statistics.median(seconds for seconds, _ in client_runs) * 1000
+    chunked_runs = [time_client(chunked, start, end) for _ in range(args.runs)]
+    chunked_ms = statistics.median(seconds for seconds, _ in chunked_runs) * 1000
+    print(f"{'method':<22} {'median ms':>10}  detail")
+    print(
+        f"{'rest client':<22} {client_ms:>10.0f}  {client_runs[-1][1]} records, one-off session setup {setup * 1000:.0f} ms"
+    )
+    print(
+        f"{'rest client, chunked':<22} {chunked_ms:>10.0f}  {len(chunked.chunks(start, end))} chunks, "
+        f"{args.workers} workers"
+    )
+
+    if shutil.which("openstack") is None:
+        print("openstack CLI not found, subprocess timing skipped")
+        return
+    cli_ms = statistics.median(time_cli(start, end) for _ in range(args.runs)) * 1000
+    print(f"{'openstack cli':<22} {cli_ms:>10.0f}  subprocess, includes interpreter start and authentication")
+    print(f"latency saved per fetch: {cli_ms - client_ms:.0f} ms ({1 - client_ms / cli_ms:.0%})")
+
+
+if __name__ == "__main__":
+    main()
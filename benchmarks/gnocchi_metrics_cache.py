@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Cold versus warm benchmark of the Gnocchi resource-to-metric cache.
+
+Runs two collection cycles against a simulated Gnocchi API and counts the HTTP
+requests each cycle issues. The first cycle starts with an empty cache, the
+second one reuses the cached metric ids and only asks for new measures.
+
+Usage:
+    python -m benchmarks.gnocchi_metrics_cache --resources 500 --metrics-per-resource 1 --latency-ms 5
+"""
+
+import argparse
+import time
+from collections import Counter
+
+from src.openstack_metrics_collector import MeasureCursor, ResourceMetricsCache, collect_gnocchi_metrics_parallel
+
+
+class FakeGnocchiAPI:
+    """In-memory stand-in for GnocchiAPI that counts requests and simulates latency."""
+
+    def __init__(self, metrics_per_resource, latency):
+        self.metrics_per_resource = metrics_per_resource
+        self.latency = latency
+        self.requests = Counter()
+
+    def get_metrics_for_resource(self, resource_id):
+        self.requests["metrics"] += 1
+        time.sleep(self.latency)
+        return [{"id": f"{resource_id}-m{i}", "name": f"metric{i}"} for i in range(self.metrics_per_resource)]
+
+    def get_measures(self, metric_id, start_iso, end_iso):
+        self.requests["measures"] += 1
+        time.sleep(self.latency)
+        return [[end_iso, 300.0, 1.0]]
+
+
+def run_cycle(gnocchi, resources, cursor, cache):
+    gnocchi.requests.clear()
+    start_iso = "2024-03-15T10:00:00+00:00"
+    end_iso = time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime())
+    started = time.perf_counter()
+    collect_gnocchi_metrics_parallel(
+        gnocchi, resources, start_iso, end_iso, "benchmark", cursor=cursor, metrics_cache=cache
+    )
+    return time.perf_counter() - started, sum(gnocchi.requests.values()), dict(gnocchi.requests)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resources", type=int, default=500)
+    parser.add_argument("--metrics-per-resource", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    gnocchi = FakeGnocchiAPI(args.metrics_per_resource, args.latency_ms / 1000)
+    resources = [{"id": f"instance-{i}"} for i in range(args.resources)]
+    cursor = MeasureCursor()
+    cache = ResourceMetricsCache(ttl_seconds=3600)
+
+    cold = run_cycle(gnocchi, resources, cursor, cache)
+    warm = run_cycle(gnocchi, resources, cursor, cache)
+
+    print(f"{'cycle':<6} {'seconds':>8} {'requests':>9}  detail")
+    for name, (seconds, total, detail) in (("cold", cold), ("warm", warm)):
+        print(f"{name:<6} {seconds:>8.3f} {total:>9}  {detail}")
+    print(f"requests saved once warm: {1 - warm[1] / cold[1]:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark of the server status listing used by openstack-optimization.
+
+Lists the servers with ``openstack server list -f json`` (a new interpreter, a
+new Keystone authentication, the CLI's default page size and a JSON text
+round-trip per run) and with ``get_vm_statuses`` over an already authenticated
+connection, and prints the median latency of each. Needs the usual ``OS_*``
+credentials and the ``openstack`` CLI on the PATH; ``--all-projects`` needs
+admin rights.
+
+Usage:
+    python -m benchmarks.server_status --runs 5 [--all-projects]
+"""
+
+import argparse
+import json
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+from src.config import load_openstack_credentials
+from src.inventory import Inventory
+from src.openstack_optimization import get_vm_statuses
+
+
+def time_cli(all_projects):
+    command = ["openstack", "server", "list", "-f", "json"]
+    if all_projects:
+        command.append("--all-projects")
+    started = time.perf_counter()
+    result = subprocess.run(command, capture_output=True, text=True, check=True)
+    return time.perf_counter() - started, len(json.loads(result.stdout))
+
+
+def time_sdk(conn, all_projects):
+    started = time.perf_counter()
+    # A fresh inventory each run, so the list is really fetched from Nova
+    statuses = get_vm_statuses(Inventory(conn), all_projects=all_projects)
+    return time.perf_counter() - started, len(statuses)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--all-projects", action="store_true", help="List the servers of every project (admin)")
+    args = parser.parse_args()
+
+    creds, missing_vars = load_openstack_credentials()
+    if not creds:
+        sys.exit(f"missing credentials: {', '.join(missing_vars)}")
+
+    from openstack import connection
+
+    setup_started = time.perf_counter()
+    conn = connection.Connection(**creds)
+    conn.authorize()
+    setup = time.perf_counter() - setup_started
+
+    sdk_runs = [time_sdk(conn, args.all_projects) for _ in range(args.runs)]
+    sdk_ms = statistics.median(seconds for seconds, _ in sdk_runs) * 1000
+    print(f"{'method':<22} {'median ms':>10}  detail")
+    print(
+        f"{'sdk listing':<22} {sdk_ms:>10.0f}  {sdk_runs[-1][1]} servers, one-off session setup {setup * 1000:.0f} ms"
+    )
+
+    if shutil.which("openstack") is None:
+        print("openstack CLI not found, subprocess timing skipped")
+        return
+    cli_runs = [time_cli(args.all_projects) for _ in range(args.runs)]
+    cli_ms = statistics.median(seconds for seconds, _ in cli_runs) * 1000
+    print(
+        f"{'openstack cli':<22} {cli_ms:>10.0f}  {cli_runs[-1][1]} servers, includes interpreter start and authentication"
+    )
+    print(f"latency saved per listing: {cli_ms - sdk_ms:.0f} ms ({1 - sdk_ms / cli_ms:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark of the console entry points.
+
+Imports each command's module in a fresh interpreter with ``python -X importtime``
+and records the cumulative import time of the module, the slowest imports it pulls
+in, and whether it stays within its startup budget. Exits with status 1 when a
+command exceeds its budget.
+
+Usage:
+    python -m benchmarks.startup_importtime --runs 5 --output startup.json
+"""
+
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+
+# Command -> (module, startup budget in milliseconds)
+COMMANDS = {
+    "openstack-toolbox": ("src.openstack_toolbox", 80),
+    "openstack-summary": ("src.openstack_summary", 200),
+    "openstack-admin": ("src.openstack_admin", 200),
+    "openstack-optimization": ("src.openstack_optimization", 200),
+    "weekly-notification": ("src.weekly_notification_optimization", 120),
+    "openstack-metrics-collector": ("src.openstack_metrics_collector", 350),
+}
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def measure(module):
+    """Import ``module`` once and return (cumulative µs, {direct import: cumulative µs})."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total = 0
+    children = {}
+    pending = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, name = match.groups()
+        depth = (len(indent) - 1) // 2
+        if depth == 0:
+            # A module's direct imports are printed right before it, one level deeper
+            if name == module:
+                total, children = int(cumulative), pending
+            pending = {}
+        elif depth == 1:
+            pending[name] = int(cumulative)
+    return total, children
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per command (median is kept)")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = {}
+    over_budget = False
+    print(f"{'command':<30} {'import ms':>10} {'budget ms':>10}  slowest imports")
+    for command, (module, budget_ms) in COMMANDS.items():
+        runs = [measure(module) for _ in range(args.runs)]
+        import_ms = statistics.median(total for total, _ in runs) / 1000
+        slowest = sorted(runs[-1][1].items(), key=lambda item: item[1], reverse=True)[:3]
+        results[command] = {
+            "module": module,
+            "import_ms": round(import_ms, 1),
+            "budget_ms": budget_ms,
+            "slowest_imports": {name: round(us / 1000, 1) for name, us in slowest},
+        }
+        over_budget |= import_ms > budget_ms
+        flag = "" if import_ms <= budget_ms else "  OVER BUDGET"
+        details = ", ".join(f"{name} {us / 1000:.0f}ms" for name, us in slowest)
+        print(f"{command:<30} {import_ms:>10.1f} {budget_ms:>10}  {details}{flag}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -26,6 +26,21 @@ CRON_WEEKLY_REPORT="${CRON_WEEKLY_REPORT:-0 8 * * 1}"
 CRON_DAILY_SUMMARY="${CRON_DAILY_SUMMARY:-0 9 * * *}"
 CRON_OPTIMIZATION="${CRON_OPTIMIZATION:-0 10 * * *}"
 
+# Mode de planification : "cron" (un processus par tâche) ou "inprocess"
+# (tâches exécutées par le collecteur, sur une connexion et un inventaire partagés)
+SCHEDULER_MODE="${SCHEDULER_MODE:-cron}"
+COLLECTOR_ARGS=""
+
+if [ "$SCHEDULER_MODE" = "inprocess" ]; then
+    export CRON_WEEKLY_REPORT CRON_DAILY_SUMMARY CRON_OPTIMIZATION
+    export OPENSTACK_TOOLBOX_SCHEDULER_LOG_DIR="${OPENSTACK_TOOLBOX_SCHEDULER_LOG_DIR:-/var/log/openstack-toolbox}"
+    COLLECTOR_ARGS="--with-scheduler"
+    echo "✅ In-process scheduler enabled:"
+    echo "   📧 Weekly report: ${CRON_WEEKLY_REPORT}"
+    echo "   📊 Daily summary: ${CRON_DAILY_SUMMARY}"
+    echo "   🔍 Optimization: ${CRON_OPTIMIZATION}"
+else
+
 # Générer le fichier crontab dynamiquement
 cat > /tmp/crontab << EOF
 # Crontab pour OpenStack Toolbox - Généré automatiquement
@@ -54,6 +69,8 @@ echo "   🔍 Optimization: ${CRON_OPTIMIZATION}"
 echo "⏰ Starting cron daemon..."
 cron
 
+fi
+
 # Fonction pour gérer l'arrêt propre
 cleanup() {
     echo "🛑 Shutting down gracefully..."
@@ -67,13 +84,13 @@ trap cleanup SIGTERM SIGINT
 # Démarrer le collecteur de métriques Prometheus en arrière-plan
 PROMETHEUS_PORT="${PROMETHEUS_PORT:-8000}"
 echo "📊 Starting Prometheus metrics collector on port $PROMETHEUS_PORT..."
-python -m src.openstack_metrics_collector &
+python -m src.openstack_metrics_collector $COLLECTOR_ARGS &
 METRICS_PID=$!
 
 # Afficher le statut
 echo "✅ Container started successfully!"
 echo "📊 Prometheus metrics: http://localhost:$PROMETHEUS_PORT/metrics"
-echo "⏰ Cron jobs configured and running"
+echo "⏰ Scheduled jobs configured and running (${SCHEDULER_MODE})"
 echo "📝 Logs: /var/log/openstack-toolbox/"
 
 # Garder le container actif et surveiller les processus
@@ -81,7 +98,7 @@ while true; do
     # Vérifier si le collecteur de métriques tourne toujours
     if ! kill -0 $METRICS_PID 2>/dev/null; then
         echo "❌ Metrics collector stopped unexpectedly, restarting..."
-        python -m src.openstack_metrics_collector &
+        python -m src.openstack_metrics_collector $COLLECTOR_ARGS &
         METRICS_PID=$!
     fi
     
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+État persistant de l'analyse d'optimisation, ressource par ressource.
+
+Chaque rapport enregistre, pour chaque instance et chaque volume, le dernier
+statut observé, la date depuis laquelle il dure et, pour les instances, le
+dernier verdict d'inactivité et les pics d'utilisation (CPU, mémoire) tirés de
+Gnocchi. Au rapport suivant, seules les
+ressources dont ``updated_at`` a changé sont réanalysées ; les mesures Gnocchi
+ne sont redemandées que pour ces instances et pour celles dont le verdict est
+plus vieux que ``analysis_recheck`` secondes. Un rapport quotidien ne mesure
+ainsi qu'une fraction des instances d'un grand projet.
+"""
+
+import json
+import math
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from .config import settings
+from .storage import SQLiteStore
+from .usage import IdleInstance
+
+
+class ResourceState(NamedTuple):
+    """Dernier état analysé d'une ressource."""
+
+    kind: str
+    id: str
+    updated_at: Optional[str]
+    status: str
+    since: float
+    checked_at: Optional[float] = None
+    idle: Optional[IdleInstance] = None
+    idle_since: Optional[float] = None
+    cpu_peak: Optional[float] = None
+    ram_peak_gb: Optional[float] = None
+
+
+def _to_epoch(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+class AnalysisStore(SQLiteStore):
+    """
+    État de l'analyse dans une base SQLite locale, par périmètre (projet, ou tous les projets).
+
+    Args:
+        path: Chemin du fichier SQLite
+
+    Examples:
+        >>> store = AnalysisStore("~/.config/openstack-toolbox/analysis.db")
+        >>> states = store.load("project-id")
+        >>> store.save("project-id", "server", states.values())
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS states (
+            scope TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            id TEXT NOT NULL,
+            updated_at TEXT,
+            status TEXT NOT NULL,
+            since REAL NOT NULL,
+            checked_at REAL,
+            idle TEXT,
+            idle_since REAL,
+            cpu_peak REAL,
+            ram_peak_gb REAL,
+            PRIMARY KEY (scope, kind, id)
+        );
+    """
+
+    def _migrate(self, db: sqlite3.Connection) -> None:
+        # Base créée avant l'enregistrement des pics : colonnes ajoutées à la volée
+        columns = {row[1] for row in db.execute("PRAGMA table_info(states)")}
+        for column in ("cpu_peak", "ram_peak_gb"):
+            if column not in columns:
+                db.execute(f"ALTER TABLE states ADD COLUMN {column} REAL")
+
+    def load(self, scope: str) -> Dict[Tuple[str, str], ResourceState]:
+        """
+        État enregistré d'un périmètre.
+
+        Returns:
+            dict: ResourceState par (type, ID)
+        """
+        with self._lock:
+            db = self._connect()
+        try:
+            rows = db.execute(
+                "SELECT kind, id, updated_at, status, since, checked_at, idle, idle_since, cpu_peak, ram_peak_gb "
+                "FROM states WHERE scope = ?",
+                (scope,),
+            ).fetchall()
+        finally:
+            db.close()
+        states = {}
+        for kind, resource_id, updated_at, status, since, checked_at, idle, idle_since, cpu_peak, ram_peak_gb in rows:
+            idle = IdleInstance(*json.loads(idle)) if idle else None
+            states[(kind, resource_id)] = ResourceState(
+                kind, resource_id, updated_at, status, since, checked_at, idle, idle_since, cpu_peak, ram_peak_gb
+            )
+        return states
+
+    def save(self, scope: str, kind: str, states: Iterable[ResourceState]) -> None:
+        """
+        Remplace l'état d'un type de ressources : les ressources disparues sont oubliées.
+
+        Args:
+            scope: Périmètre (ID du projet, suffixé de ':all' pour tous les projets)
+            kind: Type de ressources ('server' ou 'volume')
+            states: États à jour
+        """
+        rows = [
+            (
+                scope,
+                kind,
+                state.id,
+                state.updated_at,
+                state.status,
+                state.since,
+                state.checked_at,
+                json.dumps(list(state.idle)) if state.idle else None,
+                state.idle_since,
+                state.cpu_peak,
+                state.ram_peak_gb,
+            )
+            for state in states
+        ]
+        with self._lock:
+            db = self._connect()
+            try:
+                with db:
+                    db.execute("DELETE FROM states WHERE scope = ? AND kind = ?", (scope, kind))
+                    db.executemany(
+                        "INSERT INTO states (scope, kind, id, updated_at, status, since, checked_at, idle, idle_since, "
+                        "cpu_peak, ram_peak_gb) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        rows,
+                    )
+            finally:
+                db.close()
+
+
+class IncrementalAnalysis:
+    """
+    Analyse d'un rapport, reprise de l'état du rapport précédent.
+
+    Les méthodes peuvent être appelées depuis plusieurs threads (une par source
+    du rapport) ; ``observe`` est idempotente. Une fois l'analyse scellée
+    (``seal``), les mises à jour tardives d'une source abandonnée sont ignorées.
+
+    Args:
+        store: Base de l'état
+        scope: Périmètre analysé
+        recheck: Âge maximal d'un verdict d'inactivité, en secondes
+        now: Date du rapport (epoch, maintenant par défaut)
+
+    Examples:
+        >>> analysis = IncrementalAnalysis(store, "project-id")
+        >>> analysis.observe("server", servers, lambda server: server.status)
+        >>> due = analysis.due_for_idle_check(servers)
+        >>> idle, measured = find_idle_instances(conn, due)
+        >>> analysis.record_idle_check(measured, idle)
+        >>> analysis.save()
+    """
+
+    def __init__(self, store: AnalysisStore, scope: str, recheck: float = 259200.0, now: Optional[float] = None):
+        self.store = store
+        self.scope = scope
+        self.recheck = recheck
+        self.now = time.time() if now is None else now
+        self._lock = threading.Lock()
+        self._previous = store.load(scope)
+        self._states: Dict[str, Dict[str, ResourceState]] = {}
+        self._due: Optional[Set[str]] = None
+        self._sealed = False
+        self._discarded: Set[str] = set()
+        self.reanalysed: Dict[str, int] = {}
+        self.measured = 0
+
+    def observe(self, kind: str, resources: Iterable[Any], status_of: Callable[[Any], str]) -> None:
+        """
+        Met à jour l'état des ressources d'un type ; seules celles dont ``updated_at`` a changé sont réanalysées.
+
+        Args:
+            kind: Type de ressources ('server' ou 'volume')
+            resources: Ressources de l'inventaire (openstacksdk ou StoredResource)
+            status_of: Statut analysé d'une ressource
+        """
+        with self._lock:
+            if self._sealed or kind in self._states:
+                return
+            states, reanalysed = {}, 0
+            for resource in resources:
+                previous = self._previous.get((kind, resource.id))
+                if previous is not None and previous.updated_at and previous.updated_at == resource.updated_at:
+                    states[resource.id] = previous
+                    continue
+                reanalysed += 1
+                status = status_of(resource)
+                if previous is not None and previous.status == status:
+                    # Modifiée sans changer de statut : le verdict Gnocchi est à refaire
+                    states[resource.id] = previous._replace(updated_at=resource.updated_at, checked_at=None)
+                else:
+                    # Nouveau statut : il dure depuis la dernière modification de la ressource
+                    since = _to_epoch(resource.updated_at) or self.now
+                    states[resource.id] = ResourceState(kind, resource.id, resource.updated_at, status, since)
+            self._states[kind] = states
+            self.reanalysed[kind] = reanalysed
+
+    def since(self, kind: str, resource_id: str) -> Optional[float]:
+        """Date (epoch) depuis laquelle la ressource a son statut actuel."""
+        state = self._states.get(kind, {}).get(resource_id)
+        return state.since if state is not None else None
+
+    def due_for_idle_check(self, servers: Iterable[Any]) -> List[Any]:
+        """
+        Instances ACTIVE à mesurer : nouvelles, modifiées, ou dont le verdict a dépassé ``recheck``.
+
+        Le choix est fait au premier appel et reste le même pendant tout le rapport :
+        les sources qui mesurent les instances (inactivité, redimensionnement)
+        retiennent les mêmes, quel que soit l'ordre de leurs appels à
+        ``record_idle_check``. ``observe("server", ...)`` doit avoir été appelée.
+        """
+        with self._lock:
+            if self._due is None:
+                self._due = {
+                    state.id
+                    for state in self._states["server"].values()
+                    if state.status.upper() == "ACTIVE"
+                    and (state.checked_at is None or self.now - state.checked_at >= self.recheck)
+                }
+            due = self._due
+        return [server for server in servers if server.id in due]
+
+    def record_idle_check(self, servers: Iterable[Any], idle_instances: Iterable[IdleInstance], days: int = 7) -> None:
+        """
+        Enregistre le verdict des instances mesurées.
+
+        Une instance sans mesures exploitables ne doit pas être passée : elle reste
+        à vérifier au prochain rapport au lieu de garder un verdict non renouvelé.
+
+        Args:
+            servers: Instances effectivement mesurées (voir ``usage.find_idle_instances``)
+            idle_instances: Celles jugées inactives (voir ``usage.find_idle_instances``)
+            days: Durée de la période observée
+        """
+        idle_by_id = {instance.id: instance for instance in idle_instances}
+        with self._lock:
+            if self._sealed:
+                return
+            states = self._states["server"]
+            for server in servers:
+                state = states[server.id]
+                idle = idle_by_id.get(server.id)
+                if idle is None:
+                    idle_since = None
+                elif state.idle_since is not None:
+                    idle_since = state.idle_since
+                else:
+                    # Inactive sur toute la période observée
+                    idle_since = self.now - days * 86400
+                states[server.id] = state._replace(checked_at=self.now, idle=idle, idle_since=idle_since)
+                self.measured += 1
+
+    def record_peaks(self, servers: Sequence[Any], cpu_peak: Sequence[float], ram_peak_gb: Sequence[float]) -> None:
+        """
+        Enregistre les pics d'utilisation mesurés des instances, pour le redimensionnement.
+
+        Une instance sans mesure (NaN) garde les pics du rapport précédent.
+
+        Args:
+            servers: Instances mesurées
+            cpu_peak: vCPU utilisés au 95e percentile, par instance
+            ram_peak_gb: RAM utilisée au 95e percentile en Go, par instance
+        """
+        with self._lock:
+            if self._sealed:
+                return
+            states = self._states["server"]
+            for server, cpu, ram in zip(servers, cpu_peak, ram_peak_gb):
+                if math.isfinite(cpu) and math.isfinite(ram):
+                    states[server.id] = states[server.id]._replace(cpu_peak=float(cpu), ram_peak_gb=float(ram))
+
+    def peaks(self, servers: Iterable[Any]) -> List[Tuple[float, float]]:
+        """Derniers pics enregistrés (vCPU, RAM en Go) de chaque instance, NaN s'ils sont inconnus."""
+        states = self._states.get("server", {})
+        peaks = []
+        for server in servers:
+            state = states.get(server.id)
+            if state is None or state.cpu_peak is None or state.ram_peak_gb is None:
+                peaks.append((math.nan, math.nan))
+            else:
+                peaks.append((state.cpu_peak, state.ram_peak_gb))
+        return peaks
+
+    def idle_instances(self) -> List[IdleInstance]:
+        """Instances ACTIVE jugées inactives, d'après le dernier verdict de chacune."""
+        idle = [
+            state.idle
+            for state in self._states.get("server", {}).values()
+            if state.idle is not None and state.status.upper() == "ACTIVE"
+        ]
+        return sorted(idle, key=lambda instance: instance.cpu_p95)
+
+    def idle_since(self, resource_id: str) -> Optional[float]:
+        """Date (epoch) depuis laquelle l'instance est jugée inactive."""
+        state = self._states.get("server", {}).get(resource_id)
+        return state.idle_since if state is not None else None
+
+    def seal(self, discard: Iterable[str] = ()) -> None:
+        """
+        Fige l'analyse : les mises à jour suivantes sont ignorées.
+
+        Args:
+            discard: Types dont l'état ne sera pas enregistré (source non terminée,
+                état partiel) ; le rapport suivant repart de l'état précédent
+        """
+        with self._lock:
+            self._sealed = True
+            self._discarded.update(discard)
+
+    def save(self) -> None:
+        """Enregistre l'état des types observés pendant ce rapport."""
+        with self._lock:
+            snapshot = {
+                kind: list(states.values()) for kind, states in self._states.items() if kind not in self._discarded
+            }
+        for kind, states in snapshot.items():
+            self.store.save(self.scope, kind, states)
+
+
+def open_incremental_analysis(scope: str) -> Optional[IncrementalAnalysis]:
+    """Analyse incrémentale configurée par les réglages ``analysis_*``, None si elle est désactivée."""
+    path = settings.get("analysis_store")
+    if not path:
+        return None
+    return IncrementalAnalysis(AnalysisStore(path), scope, settings.get("analysis_recheck"))
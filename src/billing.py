@@ -0,0 +1,685 @@
+#!/usr/bin/env python3
+"""
+Client CloudKitty (service "rating") utilisant la session openstacksdk déjà authentifiée.
+
+Remplace l'appel à ``openstack rating dataframes get`` : plus de second
+interpréteur ni de seconde authentification Keystone. Les dataframes de l'API v2
+sont lues page par page et aplaties en enregistrements, un par ressource et par
+période :
+
+    {
+        "resource_id": "c8a7...",
+        "type": "instance",
+        "project_id": "4b2e...",
+        "begin": "2024-03-15T10:00:00+00:00",
+        "end": "2024-03-15T11:00:00+00:00",
+        "qty": 1.0,
+        "unit": "instance",
+        "rating": 0.42,
+        "desc": {...},  # groupby et metadata de CloudKitty
+    }
+
+Les longues périodes sont découpées en tranches (un jour par défaut) lues en
+parallèle, chacune réessayée séparément. Les périodes passées ne changent plus :
+``BillingCache`` les garde sur disque par heure ou par jour et seule la période
+encore ouverte est redemandée à CloudKitty. Pour les agrégations, les
+enregistrements sont cumulés au fil de la lecture dans une ``BillingTable`` en
+colonnes NumPy.
+"""
+
+import json
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .config import settings
+from .exceptions import BillingError, TransientBillingError
+from .storage import SQLiteStore
+
+
+def normalize_dataframe(dataframe: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Aplatit une dataframe CloudKitty v2 en enregistrements.
+
+    Args:
+        dataframe: Dataframe {"period": {...}, "usage": {type: [point, ...]}}
+
+    Yields:
+        dict: Un enregistrement par point
+    """
+    period = dataframe.get("period") or {}
+    for resource_type, points in (dataframe.get("usage") or {}).items():
+        for point in points:
+            groupby = point.get("groupby") or {}
+            metadata = point.get("metadata") or {}
+            vol = point.get("vol") or {}
+            rating = point.get("rating") or {}
+            yield {
+                "resource_id": groupby.get("id") or metadata.get("id"),
+                "type": resource_type,
+                "project_id": groupby.get("project_id"),
+                "begin": period.get("begin"),
+                "end": period.get("end"),
+                "qty": float(vol.get("qty") or 0),
+                "unit": vol.get("unit"),
+                "rating": float(rating.get("price") or 0),
+                "desc": {**metadata, **groupby},
+            }
+
+
+class CloudKittyClient:
+    """
+    Lecture des dataframes de facturation via l'API REST CloudKitty v2.
+
+    Une période plus longue que ``chunk_hours`` est découpée en tranches alignées
+    (jours par défaut), demandées en parallèle par ``workers`` threads au plus et
+    rendues dans l'ordre. Une tranche en échec passager (timeout, erreur 5xx) est
+    redemandée seule, jusqu'à ``retries`` fois.
+
+    Args:
+        session: Session keystoneauth authentifiée (``conn.session``)
+        region_name: Région du endpoint "rating" (optionnel)
+        page_size: Nombre de dataframes par requête
+        timeout: Timeout HTTP par requête, en secondes (réglage ``http_timeout`` par défaut)
+        chunk_hours: Durée d'une tranche, en heures (réglage ``billing_chunk_hours`` par défaut)
+        workers: Nombre de tranches demandées en même temps (réglage ``billing_workers`` par défaut)
+        retries: Nouvelles tentatives par tranche (réglage ``billing_retries`` par défaut)
+
+    Examples:
+        >>> client = CloudKittyClient(conn.session, region_name=conn.config.region_name)
+        >>> records = client.get_records(start_dt, end_dt)
+        >>> sum(record["rating"] for record in records)
+        42.0
+    """
+
+    SERVICE_TYPE = "rating"
+    RETRY_DELAY = 1.0
+
+    def __init__(
+        self,
+        session,
+        region_name: Optional[str] = None,
+        page_size: int = 1000,
+        timeout=None,
+        chunk_hours: Optional[float] = None,
+        workers: Optional[int] = None,
+        retries: Optional[int] = None,
+    ):
+        self.session = session
+        self.page_size = page_size
+        self.timeout = timeout if timeout is not None else settings.get("http_timeout")
+        chunk_hours = chunk_hours if chunk_hours is not None else settings.get("billing_chunk_hours")
+        self.chunk = max(1, int(float(chunk_hours) * 3600))
+        self.workers = max(1, int(workers if workers is not None else settings.get("billing_workers")))
+        self.retries = max(0, int(retries if retries is not None else settings.get("billing_retries")))
+        self.endpoint_filter = {"service_type": self.SERVICE_TYPE, "interface": "public"}
+        if region_name:
+            self.endpoint_filter["region_name"] = region_name
+
+    def iter_dataframes(self, begin: datetime, end: datetime) -> Iterator[Dict[str, Any]]:
+        """
+        Parcourt les dataframes de la période, page par page.
+
+        Raises:
+            TransientBillingError: Si CloudKitty est injoignable, trop lent ou en erreur 5xx
+            BillingError: Si CloudKitty refuse la demande
+        """
+        offset = 0
+        while True:
+            params = {
+                "begin": begin.isoformat(),
+                "end": end.isoformat(),
+                "limit": self.page_size,
+                "offset": offset,
+            }
+            try:
+                response = self.session.get(
+                    "/v2/dataframes",
+                    endpoint_filter=self.endpoint_filter,
+                    params=params,
+                    timeout=self.timeout,
+                    raise_exc=False,
+                )
+            except Exception as e:
+                raise TransientBillingError(f"CloudKitty: {e}") from e
+            if response.status_code != 200:
+                error = TransientBillingError if response.status_code >= 500 else BillingError
+                raise error(f"CloudKitty HTTP {response.status_code}: {response.text[:200]}")
+
+            dataframes = response.json().get("dataframes") or []
+            yield from dataframes
+            if len(dataframes) < self.page_size:
+                return
+            offset += len(dataframes)
+
+    def processed_until(self, scope_id: str) -> Optional[float]:
+        """
+        Date (epoch) jusqu'à laquelle CloudKitty a valorisé un périmètre, d'après ``/v2/scope``.
+
+        Args:
+            scope_id: ID du projet facturé
+
+        Returns:
+            float: ``last_processed_timestamp`` du périmètre, None s'il est inconnu
+                (périmètre absent, droits insuffisants, CloudKitty injoignable)
+        """
+        try:
+            response = self.session.get(
+                "/v2/scope",
+                endpoint_filter=self.endpoint_filter,
+                params={"scope_id": scope_id},
+                timeout=self.timeout,
+                raise_exc=False,
+            )
+            if response.status_code != 200:
+                return None
+            timestamps = [
+                _to_epoch(state["last_processed_timestamp"])
+                for state in response.json().get("results") or []
+                if state.get("last_processed_timestamp")
+            ]
+        except Exception:
+            return None
+        return min(timestamps) if timestamps else None
+
+    def get_chunk(self, begin: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """
+        Enregistrements aplatis d'une tranche, redemandée en entier après une erreur passagère.
+
+        Raises:
+            BillingError: Si la tranche échoue encore après ``retries`` nouvelles tentatives
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                return [
+                    record
+                    for dataframe in self.iter_dataframes(begin, end)
+                    for record in normalize_dataframe(dataframe)
+                ]
+            except TransientBillingError:
+                if attempt == self.retries:
+                    raise
+                time.sleep(self.RETRY_DELAY * 2**attempt)
+        return []
+
+    def chunks(self, begin: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+        """Découpe la période en tranches alignées sur ``chunk`` secondes, la première et la dernière partielles."""
+        first, last = _to_epoch(begin), _to_epoch(end)
+        bounds = [begin]
+        boundary = first - first % self.chunk + self.chunk
+        while boundary < last:
+            bounds.append(datetime.fromtimestamp(boundary, timezone.utc))
+            boundary += self.chunk
+        bounds.append(end)
+        return list(zip(bounds, bounds[1:]))
+
+    def iter_records(self, begin: datetime, end: datetime) -> Iterator[Dict[str, Any]]:
+        """
+        Parcourt les enregistrements aplatis de la période (voir ``normalize_dataframe``).
+
+        Les tranches sont demandées en parallèle mais rendues dans l'ordre ; au plus
+        ``workers + 1`` tranches sont gardées en mémoire à la fois.
+
+        Raises:
+            BillingError: Si une tranche reste indisponible
+        """
+        chunks = self.chunks(begin, end)
+        if len(chunks) == 1 or self.workers == 1:
+            for chunk in chunks:
+                yield from self.get_chunk(*chunk)
+            return
+
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            remaining = iter(chunks)
+            pending = deque(executor.submit(self.get_chunk, *chunk) for chunk in islice(remaining, self.workers))
+            while pending:
+                records = pending.popleft().result()
+                chunk = next(remaining, None)
+                if chunk is not None:
+                    pending.append(executor.submit(self.get_chunk, *chunk))
+                yield from records
+        finally:
+            # Une tranche en échec (ou un parcours interrompu) annule les tranches pas encore commencées
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_records(self, begin: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """Enregistrements de facturation de la période, dans l'ordre de CloudKitty."""
+        return list(self.iter_records(begin, end))
+
+
+BUCKET_SECONDS = {"hour": 3600, "day": 86400}
+
+
+class BillingCache(SQLiteStore):
+    """
+    Cache SQLite des enregistrements de facturation, découpé en tranches (heure ou jour).
+
+    Une tranche close (terminée depuis plus de ``settle_delay`` secondes, et avant
+    la date jusqu'à laquelle CloudKitty a valorisé le projet quand elle est connue)
+    ne change plus : elle est lue une fois puis servie depuis le disque. Une tranche
+    vide n'est pas enregistrée, CloudKitty pouvant encore la valoriser en retard ;
+    ``clear`` oublie les tranches d'une période à relire. Les tranches manquantes et
+    les tranches encore ouvertes sont demandées par plages contiguës ; une fois le
+    cache chaud, une fenêtre ne coûte plus qu'une requête, pour sa fin encore ouverte.
+
+    Args:
+        path: Chemin du fichier SQLite
+        bucket: Taille des tranches, 'hour' ou 'day'
+        settle_delay: Délai après la fin d'une tranche avant de la considérer close, en secondes
+
+    Examples:
+        >>> cache = BillingCache("~/.config/openstack-toolbox/billing.db", bucket="day")
+        >>> records = cache.get_records(client, project_id, start_dt, end_dt)
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS buckets (
+            scope TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            start INTEGER NOT NULL,
+            fetched_at REAL NOT NULL,
+            records BLOB NOT NULL,
+            PRIMARY KEY (scope, size, start)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path: str, bucket: str = "day", settle_delay: float = 21600.0):
+        if bucket not in BUCKET_SECONDS:
+            raise ValueError(f"Tranche inconnue : {bucket!r} ('hour' ou 'day')")
+        super().__init__(path)
+        self.size = BUCKET_SECONDS[bucket]
+        self.settle_delay = settle_delay
+
+    def _cached_starts(self, scope: str, first: int, last: int) -> Set[int]:
+        db = self._connect()
+        try:
+            rows = db.execute(
+                "SELECT start FROM buckets WHERE scope = ? AND size = ? AND start >= ? AND start <= ?",
+                (scope, self.size, first, last),
+            ).fetchall()
+        finally:
+            db.close()
+        return {start for (start,) in rows}
+
+    def _read(self, scope: str, start: int) -> List[Dict[str, Any]]:
+        db = self._connect()
+        try:
+            row = db.execute(
+                "SELECT records FROM buckets WHERE scope = ? AND size = ? AND start = ?",
+                (scope, self.size, start),
+            ).fetchone()
+        finally:
+            db.close()
+        return json.loads(zlib.decompress(row[0])) if row else []
+
+    def _write(self, scope: str, buckets: Dict[int, List[Dict[str, Any]]]) -> None:
+        if not buckets:
+            return
+        now = time.time()
+        rows = [
+            (scope, self.size, start, now, zlib.compress(json.dumps(records).encode("utf-8")))
+            for start, records in buckets.items()
+        ]
+        with self._lock:
+            db = self._connect()
+            try:
+                with db:
+                    db.executemany("INSERT OR REPLACE INTO buckets VALUES (?, ?, ?, ?, ?)", rows)
+            finally:
+                db.close()
+
+    def _fetch(
+        self, client: CloudKittyClient, scope: str, range_start: int, range_end: int, closed_before: float
+    ) -> Iterator[Dict[str, Any]]:
+        records = client.iter_records(
+            datetime.fromtimestamp(range_start, timezone.utc), datetime.fromtimestamp(range_end, timezone.utc)
+        )
+        pending: Dict[int, List[Dict[str, Any]]] = {}
+        next_start = range_start
+        for record in records:
+            record_start = _to_epoch(record["begin"])
+            bucket = record_start - record_start % self.size
+            if bucket > next_start:
+                # CloudKitty renvoie les dataframes dans l'ordre chronologique : les tranches précédentes sont complètes
+                yield from self._flush(scope, pending, next_start, bucket, closed_before)
+                next_start = bucket
+            pending.setdefault(bucket, []).append(record)
+        yield from self._flush(scope, pending, next_start, range_end, closed_before)
+
+    def _flush(
+        self, scope: str, pending: Dict[int, List[Dict[str, Any]]], start: int, until: int, closed_before: float
+    ) -> Iterator[Dict[str, Any]]:
+        """Enregistre les tranches complètes et non vides de ``start`` à ``until``, et rend leurs enregistrements."""
+        complete = {bucket: pending.pop(bucket, []) for bucket in range(start, until, self.size)}
+        self._write(
+            scope,
+            {
+                bucket: records
+                for bucket, records in complete.items()
+                if records and bucket + self.size <= closed_before
+            },
+        )
+        # Enregistrements arrivés en retard pour une tranche déjà enregistrée : rendus sans réécrire la tranche
+        for bucket in sorted(bucket for bucket in pending if bucket < start):
+            yield from pending.pop(bucket)
+        for records in complete.values():
+            yield from records
+
+    def clear(
+        self, begin: Optional[datetime] = None, end: Optional[datetime] = None, scope: Optional[str] = None
+    ) -> int:
+        """
+        Oublie les tranches qui recoupent une période, pour qu'elles soient relues depuis CloudKitty.
+
+        Args:
+            begin: Début de la période (datetime avec fuseau ; sans limite par défaut)
+            end: Fin de la période (datetime avec fuseau ; sans limite par défaut)
+            scope: Périmètre (tous par défaut)
+
+        Returns:
+            int: Nombre de tranches oubliées
+        """
+        first = _to_epoch(begin) if begin is not None else None
+        last = _to_epoch(end) if end is not None else None
+        with self._lock:
+            db = self._connect()
+            try:
+                with db:
+                    return db.execute(
+                        "DELETE FROM buckets WHERE (? IS NULL OR scope = ?) AND (? IS NULL OR start + size > ?) "
+                        "AND (? IS NULL OR start < ?)",
+                        (scope, scope, first, first, last, last),
+                    ).rowcount
+            finally:
+                db.close()
+
+    def iter_records(
+        self,
+        client: CloudKittyClient,
+        scope: str,
+        begin: datetime,
+        end: datetime,
+        processed_until: Optional[float] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Parcourt les enregistrements de la période, depuis le cache pour les tranches closes.
+
+        Une seule tranche est gardée en mémoire à la fois, qu'elle vienne du disque ou
+        de CloudKitty.
+
+        Args:
+            client: Client CloudKitty utilisé pour les tranches absentes ou ouvertes
+            scope: Identifiant du périmètre facturé (projet, région...)
+            begin: Début de la période (datetime avec fuseau)
+            end: Fin de la période (datetime avec fuseau)
+            processed_until: Date (epoch) jusqu'à laquelle CloudKitty a valorisé le périmètre, si connue
+                (voir ``CloudKittyClient.processed_until``)
+
+        Raises:
+            BillingError: Si une tranche à télécharger est indisponible
+        """
+        first, last = _to_epoch(begin), _to_epoch(end)
+        if last <= first:
+            return
+        starts = list(range(first - first % self.size, last, self.size))
+        closed_before = time.time() - self.settle_delay
+        if processed_until is not None:
+            # CloudKitty en retard sur le délai : les tranches pas encore valorisées restent ouvertes
+            closed_before = min(closed_before, processed_until)
+        cached = self._cached_starts(scope, starts[0], starts[-1])
+
+        # Tranches lues sur disque, ou plages contiguës à télécharger (absentes ou encore ouvertes)
+        plan: List[List[int]] = []
+        for start in starts:
+            if start in cached and start + self.size <= closed_before:
+                plan.append([start])
+            elif plan and len(plan[-1]) == 2 and plan[-1][1] == start:
+                plan[-1][1] = start + self.size
+            else:
+                plan.append([start, start + self.size])
+
+        for step in plan:
+            records = self._read(scope, step[0]) if len(step) == 1 else self._fetch(client, scope, *step, closed_before)
+            for record in records:
+                if first <= _to_epoch(record["begin"]) < last:
+                    yield record
+
+    def get_records(
+        self,
+        client: CloudKittyClient,
+        scope: str,
+        begin: datetime,
+        end: datetime,
+        processed_until: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """Enregistrements de la période (voir ``iter_records``)."""
+        return list(self.iter_records(client, scope, begin, end, processed_until))
+
+
+def open_billing_cache() -> Optional[BillingCache]:
+    """Cache configuré par les réglages ``billing_*``, None s'il est désactivé."""
+    path = settings.get("billing_cache")
+    if not path:
+        return None
+    return BillingCache(path, settings.get("billing_bucket"), settings.get("billing_settle_delay"))
+
+
+def clear_billing_cache(begin: Optional[datetime] = None, end: Optional[datetime] = None) -> int:
+    """
+    Oublie les tranches en cache d'une période, tous projets confondus (voir ``BillingCache.clear``).
+
+    Returns:
+        int: Nombre de tranches oubliées (0 si le cache est désactivé)
+    """
+    cache = open_billing_cache()
+    return cache.clear(begin, end) if cache is not None else 0
+
+
+def iter_billing_records(conn, begin: datetime, end: datetime) -> Iterator[Dict[str, Any]]:
+    """
+    Parcourt les enregistrements de facturation d'une période pour la connexion donnée.
+
+    Les enregistrements arrivent page par page (ou tranche par tranche depuis le cache
+    local, réglage ``billing_cache``) : la mémoire utilisée ne dépend pas de la longueur
+    de la période.
+
+    Args:
+        conn (Connection): Connexion OpenStack authentifiée
+        begin: Début de la période (datetime avec fuseau)
+        end: Fin de la période (datetime avec fuseau)
+
+    Raises:
+        BillingError: Si la facturation est indisponible (pendant le parcours)
+    """
+    region_name = getattr(conn.config, "region_name", None)
+    client = CloudKittyClient(conn.session, region_name=region_name)
+    cache = open_billing_cache()
+    if cache is None:
+        return client.iter_records(begin, end)
+    scope = f"{conn.current_project_id}@{region_name or ''}"
+    processed_until = client.processed_until(conn.current_project_id)
+    return cache.iter_records(client, scope, begin, end, processed_until)
+
+
+def fetch_billing_table(conn, begin: datetime, end: datetime, granularity: Optional[int] = 3600) -> "BillingTable":
+    """
+    Facturation d'une période agrégée au fil de la lecture (voir ``BillingTable.from_records``).
+
+    Raises:
+        BillingError: Si la facturation est indisponible
+    """
+    return BillingTable.from_records(iter_billing_records(conn, begin, end), granularity=granularity)
+
+
+class BillingTable:
+    """
+    Enregistrements de facturation rangés en colonnes NumPy.
+
+    Chargée une seule fois, la table répond aux totaux et regroupements par
+    opérations vectorisées au lieu de reparcourir tous les enregistrements à
+    chaque question.
+
+    Colonnes : ``resource_id``, ``type``, ``project_id`` (chaînes), ``begin``,
+    ``end`` (secondes epoch entières, 0 si absentes), ``qty``, ``rating`` et
+    ``rated_seconds`` (flottants ; durée cumulée des périodes valorisées de la ligne,
+    plus courte que ``end - begin`` si la ressource n'a pas existé toute la période).
+
+    Args:
+        columns: Tableaux NumPy de même longueur, par nom de colonne
+        hours: Nombre d'heures facturées, si connu à la construction
+
+    Examples:
+        >>> table = BillingTable.from_records(records)
+        >>> table.total()
+        42.0
+        >>> table.group_by("type")
+        {('instance',): 30.5, ('volume',): 11.5}
+        >>> table.group_by("project_id", "hour")
+        {('4b2e...', 1710496800): 1.2, ...}
+    """
+
+    TEXT_COLUMNS = ("resource_id", "type", "project_id")
+    TIME_COLUMNS = ("begin", "end")
+    NUMBER_COLUMNS = ("qty", "rating", "rated_seconds")
+
+    def __init__(self, columns: Dict[str, Any], hours: Optional[int] = None):
+        self.columns = columns
+        self._hours = hours
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]], granularity: Optional[int] = 3600) -> "BillingTable":
+        """
+        Construit la table à partir d'enregistrements (voir ``normalize_dataframe``).
+
+        Les enregistrements sont lus un par un et cumulés dans une ligne par
+        ressource, type, projet et intervalle de ``granularity`` secondes : la table
+        et la mémoire utilisée grandissent avec le nombre de ressources, pas avec le
+        nombre d'enregistrements. Avec ``granularity=None``, une seule ligne par
+        ressource couvre toute la période (``begin`` au plus tôt, ``end`` au plus tard).
+
+        Args:
+            records: Enregistrements de facturation, liste ou itérateur
+            granularity: Intervalle des lignes en secondes (une heure par défaut), None pour toute la période
+        """
+        # Import différé : NumPy est long à charger et inutile sans facturation
+        import numpy as np
+
+        rows: Dict[Tuple[str, str, str, int], List[Any]] = {}
+        hours: Set[int] = set()
+        for record in records:
+            begin, end = _to_epoch(record.get("begin")), _to_epoch(record.get("end"))
+            if begin:
+                hours.add(begin - begin % 3600)
+            key = (
+                record.get("resource_id") or "",
+                record.get("type") or "",
+                record.get("project_id") or "",
+                begin - begin % granularity if granularity else 0,
+            )
+            rated = float(max(end - begin, 0))
+            row = rows.get(key)
+            if row is None:
+                rows[key] = [begin, end, record.get("qty") or 0.0, record.get("rating") or 0.0, rated]
+            else:
+                row[0], row[1] = min(row[0], begin), max(row[1], end)
+                row[2] += record.get("qty") or 0.0
+                row[3] += record.get("rating") or 0.0
+                row[4] += rated
+
+        columns = {}
+        for position, name in enumerate(cls.TEXT_COLUMNS):
+            columns[name] = np.array([key[position] for key in rows], dtype=object)
+        for position, name in enumerate(cls.TIME_COLUMNS + cls.NUMBER_COLUMNS):
+            dtype = np.int64 if name in cls.TIME_COLUMNS else np.float64
+            columns[name] = np.fromiter((row[position] for row in rows.values()), dtype=dtype, count=len(rows))
+        return cls(columns, hours=len(hours))
+
+    def __len__(self) -> int:
+        return len(self.columns["rating"])
+
+    def column(self, name: str):
+        """
+        Colonne par nom ; ``hour`` est le début de l'heure de ``begin`` (secondes epoch).
+        """
+        if name == "hour":
+            begin = self.columns["begin"]
+            return begin - begin % 3600
+        return self.columns[name]
+
+    def where(self, **conditions: Any) -> "BillingTable":
+        """
+        Sous-table des lignes dont les colonnes valent les valeurs données.
+
+        Examples:
+            >>> table.where(type="instance", project_id="4b2e...")
+        """
+        import numpy as np
+
+        mask = np.ones(len(self), dtype=bool)
+        for name, value in conditions.items():
+            mask &= self.column(name) == value
+        return BillingTable({name: column[mask] for name, column in self.columns.items()})
+
+    def total(self, value: str = "rating") -> float:
+        """Somme d'une colonne numérique (le coût par défaut)."""
+        return float(self.columns[value].sum())
+
+    def group_by(self, *keys: str, value: str = "rating") -> Dict[Tuple[Any, ...], float]:
+        """
+        Somme d'une colonne numérique par combinaison de clés.
+
+        Args:
+            keys: Colonnes de regroupement ('resource_id', 'type', 'project_id', 'hour'...)
+            value: Colonne sommée ('rating' ou 'qty')
+
+        Returns:
+            dict: Somme par tuple de clés
+        """
+        import numpy as np
+
+        if not len(self):
+            return {}
+        # Chaque clé est codée en entiers, puis les codes combinés en un seul indice de groupe
+        uniques, codes = [], []
+        for key in keys:
+            unique, inverse = np.unique(self.column(key), return_inverse=True)
+            uniques.append(unique)
+            codes.append(inverse.reshape(-1))
+        group_ids = (
+            np.ravel_multi_index(codes, [len(unique) for unique in uniques])
+            if keys
+            else np.zeros(len(self), dtype=np.intp)
+        )
+        present, inverse = np.unique(group_ids, return_inverse=True)
+        sums = np.bincount(inverse.reshape(-1), weights=self.columns[value])
+        combinations = np.unravel_index(present, [len(unique) for unique in uniques]) if keys else []
+        result = {}
+        for position, total in enumerate(sums):
+            group = tuple(_to_python(uniques[i][combinations[i][position]]) for i in range(len(keys)))
+            result[group] = float(total)
+        return result
+
+    def hours(self) -> int:
+        """Nombre d'heures distinctes couvertes par les enregistrements."""
+        import numpy as np
+
+        if self._hours is not None:
+            return self._hours
+        return int(len(np.unique(self.column("hour")))) if len(self) else 0
+
+
+def _to_epoch(value: Any) -> int:
+    if not value:
+        return 0
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    return int(value.timestamp())
+
+
+def _to_python(value: Any) -> Any:
+    return value.item() if hasattr(value, "item") else value
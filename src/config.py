@@ -4,11 +4,12 @@ import configparser
 import getpass
 import json
 import os
+import threading
+import time
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 from .exceptions import SMTPConfigError
-from .security import SecureConfig
 
 CONFIG_DIR = os.path.expanduser("~/.config/openstack-toolbox")
 CONFIG_FILE = os.path.join(CONFIG_DIR, "config.json")
@@ -18,12 +19,209 @@ SMTP_CONFIG_FILE = os.path.join(CONFIG_DIR, "smtp_config.ini")
 os.makedirs(CONFIG_DIR, exist_ok=True)
 
 
+# Valeurs par défaut des paramètres partagés par tous les modules
+DEFAULT_SETTINGS: Dict[str, Any] = {
+    "language": "fr",
+    "collector_workers": 5,
+    "gnocchi_workers": 10,
+    "api_workers": 10,
+    "http_timeout": 30,
+    "cli_timeout": 60,
+    "report_timeout": 300,
+    "source_timeout": 120.0,
+    "scrape_coalesce_window": 10.0,
+    "gnocchi_metrics_cache_ttl": 3600.0,
+    "log_level": "INFO",
+    "log_rate_limit": 10,
+    "log_rate_interval": 60.0,
+    "daemon_socket": os.path.join(CONFIG_DIR, "toolbox.sock"),
+    "inventory_ttl": 300.0,
+    "scheduler_log_dir": os.path.join(CONFIG_DIR, "logs"),
+    "inventory_store": os.path.join(CONFIG_DIR, "inventory.db"),
+    "inventory_max_age": 900.0,
+    "history_store": os.path.join(CONFIG_DIR, "history.db"),
+    "history_resolution": 3600,
+    "history_retention_days": 30,
+    "billing_cache": os.path.join(CONFIG_DIR, "billing.db"),
+    "billing_bucket": "day",
+    "billing_settle_delay": 21600.0,
+    "billing_chunk_hours": 24,
+    "billing_workers": 4,
+    "billing_retries": 2,
+    "idle_cpu_percent": 5.0,
+    "idle_network_bps": 10240.0,
+    "idle_disk_bps": 10240.0,
+    "idle_granularity": 3600,
+    "idle_batch_size": 200,
+    "rightsizing_headroom": 1.25,
+    "flavor_catalogue_ttl": 3600.0,
+    "analysis_store": os.path.join(CONFIG_DIR, "analysis.db"),
+    "analysis_recheck": 259200.0,
+}
+
+# Valeurs minimales des paramètres numériques : une valeur plus petite y est ramenée
+SETTING_MINIMUMS: Dict[str, Any] = {
+    "collector_workers": 1,
+    "gnocchi_workers": 1,
+    "api_workers": 1,
+    "billing_workers": 1,
+    "http_timeout": 1,
+    "cli_timeout": 1,
+    "report_timeout": 1,
+    "source_timeout": 0.0,
+    "scrape_coalesce_window": 0.0,
+    "gnocchi_metrics_cache_ttl": 0.0,
+    "log_rate_interval": 0.0,
+    "inventory_ttl": 0.0,
+    "inventory_max_age": 0.0,
+    "history_resolution": 1,
+    "history_retention_days": 1,
+    "billing_settle_delay": 0.0,
+    "billing_chunk_hours": 1,
+    "billing_retries": 0,
+    "idle_granularity": 1,
+    "idle_batch_size": 1,
+    "flavor_catalogue_ttl": 0.0,
+    "analysis_recheck": 0.0,
+}
+
+# Paramètres pouvant être surchargés par une variable d'environnement (voir ``setting_env_var``)
+ENV_OVERRIDABLE_SETTINGS = {key for key in DEFAULT_SETTINGS if key != "language"}
+
+# Préfixe de ces variables : des noms comme LOG_LEVEL ou HISTORY_STORE sont trop
+# courants pour être lus tels quels dans un conteneur
+ENV_PREFIX = "OPENSTACK_TOOLBOX_"
+
+
+def setting_env_var(key: str) -> str:
+    """
+    Nom de la variable d'environnement qui surcharge un paramètre.
+
+    Examples:
+        >>> setting_env_var("api_workers")
+        'OPENSTACK_TOOLBOX_API_WORKERS'
+    """
+    return ENV_PREFIX + key.upper()
+
+
+class Settings:
+    """
+    Paramètres partagés, lus une seule fois depuis config.json.
+
+    Le fichier n'est relu que si sa date de modification change, et sa date n'est
+    vérifiée qu'une fois par ``check_interval`` secondes : les appels répétés ne
+    coûtent donc presque rien. Pour les paramètres de ``ENV_OVERRIDABLE_SETTINGS``,
+    la variable d'environnement ``OPENSTACK_TOOLBOX_<NOM>`` a la priorité. Une valeur
+    inférieure à son minimum (``SETTING_MINIMUMS``) est ramenée à ce minimum.
+
+    Args:
+        path: Chemin du fichier de configuration JSON
+        defaults: Valeurs par défaut (DEFAULT_SETTINGS si absent)
+        check_interval: Intervalle minimal entre deux vérifications du fichier, en secondes
+
+    Examples:
+        >>> settings.language
+        'fr'
+        >>> settings.get("api_workers")
+        10
+    """
+
+    def __init__(
+        self,
+        path: str = CONFIG_FILE,
+        defaults: Optional[Dict[str, Any]] = None,
+        check_interval: float = 1.0,
+    ):
+        self.path = path
+        self.defaults = dict(DEFAULT_SETTINGS if defaults is None else defaults)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._values: Dict[str, Any] = {}
+        self._mtime: Optional[float] = None
+        self._checked_at: Optional[float] = None
+
+    def _refresh(self) -> None:
+        """Relit le fichier si sa date de modification a changé."""
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.check_interval:
+                return
+            try:
+                mtime: Optional[float] = os.stat(self.path).st_mtime
+            except OSError:
+                mtime = None
+            if mtime != self._mtime or self._checked_at is None:
+                self._values = self._load() if mtime is not None else {}
+                self._mtime = mtime
+            self._checked_at = now
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                values = json.load(f)
+            return values if isinstance(values, dict) else {}
+        except (OSError, IOError, json.JSONDecodeError):
+            return {}
+
+    def reload(self) -> None:
+        """Force la relecture du fichier au prochain accès."""
+        with self._lock:
+            self._checked_at = None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Retourne la valeur d'un paramètre.
+
+        Args:
+            key: Nom du paramètre
+            default: Valeur si le paramètre n'a pas de valeur par défaut connue
+
+        Returns:
+            Valeur de l'environnement, sinon du fichier, sinon la valeur par défaut
+        """
+        self._refresh()
+        fallback = self.defaults.get(key, default)
+        value = self._values.get(key)
+        if key in ENV_OVERRIDABLE_SETTINGS and os.getenv(setting_env_var(key)):
+            value = os.getenv(setting_env_var(key))
+        if value is None:
+            return fallback
+        value = _coerce(value, fallback)
+        minimum = SETTING_MINIMUMS.get(key)
+        if minimum is not None and isinstance(value, (int, float)) and value < minimum:
+            return minimum
+        return value
+
+    @property
+    def language(self) -> str:
+        """Code de langue ('fr' ou 'en')."""
+        return self.get("language")
+
+
+def _coerce(value: Any, fallback: Any) -> Any:
+    """Convertit une valeur au type de la valeur par défaut, ou retourne la valeur par défaut."""
+    if fallback is None or (isinstance(value, type(fallback)) and not isinstance(value, bool)):
+        return value
+    try:
+        if isinstance(fallback, bool):
+            return str(value).strip().lower() in ("1", "true", "yes", "on")
+        return type(fallback)(value)
+    except (TypeError, ValueError):
+        return fallback
+
+
+settings = Settings()
+
+
 def get_language_preference() -> str:
     """
     Récupère la préférence de langue depuis le fichier de configuration.
 
-    La langue est stockée dans le fichier ~/.config/openstack-toolbox/config.json.
-    Si le fichier n'existe pas ou si la langue n'est pas définie, retourne 'fr' par défaut.
+    La langue est stockée dans le fichier ~/.config/openstack-toolbox/config.json
+    et lue via l'objet ``settings`` partagé : le fichier n'est pas relu tant qu'il
+    n'a pas été modifié. Si la langue n'est pas définie, retourne 'fr' par défaut.
 
     Returns:
         str: Code de langue ('fr' ou 'en')
@@ -35,15 +233,7 @@ def get_language_preference() -> str:
         >>> get_language_preference()
         'en'
     """
-    try:
-        if os.path.exists(CONFIG_FILE):
-            with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-                config = json.load(f)
-                return config.get("language", "fr")
-    except (OSError, IOError, json.JSONDecodeError):
-        # Log error but return default
-        pass
-    return "fr"
+    return settings.language
 
 
 def set_language_preference(lang: str) -> bool:
@@ -75,6 +265,7 @@ def set_language_preference(lang: str) -> bool:
 
         with open(CONFIG_FILE, "w", encoding="utf-8") as f:
             json.dump(config, f, indent=4)
+        settings.reload()
         return True
     except (OSError, IOError, json.JSONDecodeError):
         return False
@@ -128,7 +319,9 @@ def create_smtp_config_interactive() -> bool:
     username = input("Utilisateur SMTP: ").strip()
     password = getpass.getpass("Mot de passe SMTP: ").strip()
 
-    # Encrypt password for security
+    # Encrypt password for security (cryptography n'est chargé qu'ici)
+    from .security import SecureConfig
+
     secure = SecureConfig(Path(CONFIG_DIR))
     encrypted_password = secure.encrypt(password)
 
@@ -194,6 +387,8 @@ def load_smtp_config() -> Optional[Dict[str, Any]]:
 
         # Decrypt password if it's encrypted
         if is_encrypted:
+            from .security import SecureConfig
+
             secure = SecureConfig(Path(CONFIG_DIR))
             password = secure.decrypt(password)
 
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Daemon résident de l'OpenStack Toolbox.
+
+Garde en mémoire la connexion OpenStack (et son token Keystone) ainsi qu'un
+inventaire des ressources, puis exécute les commandes reçues sur un socket Unix
+local. Les commandes lancées avec ``--via-daemon`` se contentent d'envoyer leur
+demande et d'afficher la sortie renvoyée, sans payer le démarrage de Python,
+l'import d'openstacksdk ni l'authentification.
+
+Protocole : le client envoie une ligne JSON ``{"command", "options", "columns", "cwd"}``,
+le daemon renvoie la sortie de la commande puis ferme la connexion. Les fichiers
+produits (rapport d'optimisation) sont écrits dans ``cwd``, le répertoire courant
+du client.
+"""
+
+import io
+import json
+import os
+import shutil
+import socket
+import socketserver
+import sys
+from typing import Any, Dict, Optional
+
+from rich import print
+
+from .config import get_language_preference, load_openstack_credentials, settings
+from .inventory import Inventory
+from .utils import redirect_output
+
+# Dictionnaire des traductions
+TRANSLATIONS = {
+    "fr": {
+        "daemon_started": "🧰 Daemon OpenStack Toolbox à l'écoute sur {}",
+        "daemon_stopped": "👋 Daemon arrêté.",
+        "credentials_error": "❌ Identifiants OpenStack manquants : {}",
+        "auth_error": "❌ Échec de l'authentification OpenStack",
+        "unknown_command": "❌ Commande inconnue : {}",
+        "command_error": "❌ Erreur lors de l'exécution de {} : {}",
+        "invalid_request": "❌ Demande invalide : un objet JSON est attendu.",
+    },
+    "en": {
+        "daemon_started": "🧰 OpenStack Toolbox daemon listening on {}",
+        "daemon_stopped": "👋 Daemon stopped.",
+        "credentials_error": "❌ Missing OpenStack credentials: {}",
+        "auth_error": "❌ OpenStack authentication failed",
+        "unknown_command": "❌ Unknown command: {}",
+        "command_error": "❌ Error while running {}: {}",
+        "invalid_request": "❌ Invalid request: a JSON object is expected.",
+    },
+}
+
+
+def get_socket_path() -> str:
+    """Chemin du socket Unix du daemon (réglage ``daemon_socket``)."""
+    return os.path.expanduser(settings.get("daemon_socket"))
+
+
+def run_in_daemon(command: str, options: Optional[Dict[str, Any]] = None, path: Optional[str] = None) -> bool:
+    """
+    Exécute une commande dans le daemon et recopie sa sortie sur la sortie standard.
+
+    Args:
+        command: Nom de la commande ('summary', 'optimization')
+        options: Paramètres de la commande, sérialisables en JSON
+        path: Chemin du socket (réglage ``daemon_socket`` par défaut)
+
+    Returns:
+        bool: True si le daemon a traité la demande, False s'il est injoignable
+
+    Examples:
+        >>> if not run_in_daemon("summary", {"period": ["2024-03-15 10:00", "2024-03-15 12:00"]}):
+        ...     run_summary(conn, period)
+    """
+    request = {
+        "command": command,
+        "options": options or {},
+        "columns": shutil.get_terminal_size().columns,
+        "cwd": os.getcwd(),
+    }
+    try:
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    except (AttributeError, OSError):
+        # Pas de socket Unix sur cette plateforme
+        return False
+    with client:
+        try:
+            client.connect(path or get_socket_path())
+            client.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        except OSError:
+            return False
+        sys.stdout.flush()
+        while True:
+            chunk = client.recv(65536)
+            if not chunk:
+                break
+            sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+    return True
+
+
+class ToolboxDaemon:
+    """
+    Exécute les commandes de rapport sur une connexion et un inventaire partagés.
+
+    Args:
+        conn: Connexion OpenStack authentifiée
+        inventory_ttl: Durée de vie de l'inventaire en mémoire, en secondes
+    """
+
+    def __init__(self, conn, inventory_ttl: float):
+        self.conn = conn
+        self.inventory = Inventory(conn, ttl=inventory_ttl)
+        self.commands = {
+            "summary": self._summary,
+            "optimization": self._optimization,
+        }
+
+    def _summary(self, options: Dict[str, Any], cwd: Optional[str]) -> None:
+        from .openstack_summary import run_summary
+
+        run_summary(self.conn, tuple(options["period"]), inventory=self.inventory)
+
+    def _optimization(self, options: Dict[str, Any], cwd: Optional[str]) -> None:
+        from .openstack_optimization import run_optimization
+
+        run_optimization(
+            self.conn, inventory=self.inventory, all_projects=options.get("all_projects", False), output_dir=cwd
+        )
+
+    def execute(self, request: Dict[str, Any], output: io.TextIOBase) -> None:
+        """
+        Exécute une demande en envoyant tout son affichage vers ``output``.
+
+        Args:
+            request: Demande décodée (command, options, columns, cwd)
+            output: Flux texte renvoyé au client
+        """
+        lang = get_language_preference()
+        if not isinstance(request, dict) or not isinstance(request.get("options") or {}, dict):
+            output.write(TRANSLATIONS[lang]["invalid_request"] + "\n")
+            return
+        command = request.get("command")
+        columns = request.get("columns")
+        cwd = request.get("cwd")
+        # Répertoire du client : un chemin absolu, sinon celui du daemon
+        cwd = cwd if isinstance(cwd, str) and os.path.isabs(cwd) else None
+        with redirect_output(output, columns=columns if isinstance(columns, int) else None):
+            handler = self.commands.get(command)
+            if handler is None:
+                print(f"[bold red]{TRANSLATIONS[lang]['unknown_command'].format(command)}[/bold red]")
+                return
+            try:
+                handler(request.get("options") or {}, cwd)
+            except Exception as e:
+                print(f"[bold red]{TRANSLATIONS[lang]['command_error'].format(command, e)}[/bold red]")
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """Lit une demande JSON et renvoie la sortie de la commande au client."""
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError:
+            # Rejetée par ``execute`` comme toute demande qui n'est pas un objet JSON
+            request = None
+        output = io.TextIOWrapper(self.wfile, encoding="utf-8", write_through=True)
+        try:
+            self.server.toolbox.execute(request, output)
+        except BrokenPipeError:
+            # Le client est parti avant la fin de la commande
+            pass
+        finally:
+            # Rend le flux à socketserver, qui se charge de le fermer
+            output.detach()
+
+
+class ThreadingUnixStreamServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def main():
+    lang = get_language_preference()
+
+    creds, missing_vars = load_openstack_credentials()
+    if not creds:
+        print(f"[bold red]{TRANSLATIONS[lang]['credentials_error'].format(', '.join(missing_vars))}[/bold red]")
+        sys.exit(1)
+
+    # Import différé : openstacksdk est long à charger et inutile avant ce point
+    from openstack import connection
+
+    conn = connection.Connection(**creds)
+    if not conn.authorize():
+        print(f"[bold red]{TRANSLATIONS[lang]['auth_error']}[/bold red]")
+        sys.exit(1)
+
+    path = get_socket_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Un socket resté d'un daemon précédent empêcherait le bind
+    if os.path.exists(path):
+        os.unlink(path)
+
+    # Seul l'utilisateur courant peut utiliser la connexion authentifiée : le socket
+    # est créé directement en 0600, sans fenêtre où il serait accessible aux autres
+    previous_umask = os.umask(0o077)
+    try:
+        server = ThreadingUnixStreamServer(path, RequestHandler)
+    finally:
+        os.umask(previous_umask)
+    os.chmod(path, 0o600)
+    server.toolbox = ToolboxDaemon(conn, settings.get("inventory_ttl"))
+
+    print(f"[bold green]{TRANSLATIONS[lang]['daemon_started'].format(path)}[/bold green]")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n[bold]{TRANSLATIONS[lang]['daemon_stopped']}[/bold]")
+    finally:
+        server.server_close()
+        conn.close()
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
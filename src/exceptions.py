@@ -67,6 +67,12 @@ class BillingError(OpenStackToolboxError):
     pass
 
 
+class TransientBillingError(BillingError):
+    """Raised when a billing request fails in a way that may succeed on retry (timeout, 5xx)."""
+
+    pass
+
+
 class ParsingError(OpenStackToolboxError):
     """Raised when parsing data fails."""
 
@@ -77,3 +83,9 @@ class FileOperationError(OpenStackToolboxError):
     """Raised when file operations fail."""
 
     pass
+
+
+class StaleInventoryError(OpenStackToolboxError):
+    """Raised when the local inventory store is missing a collection or is too old."""
+
+    pass
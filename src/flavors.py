@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Catalogue des flavors et recommandations de redimensionnement des instances.
+
+Le catalogue range les flavors disponibles (vCPU, RAM et disque décodés par
+``utils.parse_flavor_name``, ou lus sur le flavor) dans des tableaux NumPy ; le
+prix horaire de chaque flavor est appris de la facturation. Pour chaque instance,
+les pics observés de CPU et de mémoire (95e percentile sur la semaine, mesures
+Gnocchi) donnent le besoin réel, et le flavor le moins cher qui le couvre est
+trouvé pour toutes les instances d'un coup, par une matrice instances × flavors
+triée par prix plutôt que par des boucles imbriquées.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from functools import cached_property
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+from .config import settings
+from .usage import UsageSnapshot, measure_usage, row_percentile
+from .utils import parse_flavor_name
+
+HOURS_PER_MONTH = 730
+
+
+class FlavorCatalogue:
+    """
+    Flavors disponibles, indexés par ID et par nom, avec leurs ressources en colonnes NumPy.
+
+    Construit une fois par rapport (ou gardé ``ttl`` secondes par le daemon et le
+    collecteur), il résout le flavor de chaque instance sans appel API. Les
+    colonnes NumPy ne sont créées qu'au premier calcul.
+
+    Args:
+        flavors: Flavors openstacksdk (ou StoredResource)
+
+    Examples:
+        >>> catalogue = FlavorCatalogue(conn.compute.flavors())
+        >>> index = catalogue.index(server.flavor)
+        >>> catalogue.names[index], catalogue.vcpus[index], catalogue.ram_gb[index]
+        ('a2-ram4-disk50-perf1', 2.0, 4.0)
+        >>> catalogue.cheapest_fitting(vcpus=[1, 4], ram_gb=[2, 16], disk_gb=[20, 50])
+        array([ 3, 11])
+    """
+
+    def __init__(self, flavors: Iterable[Any]):
+        self.flavors = list(flavors)
+        self.ids: List[str] = []
+        self.names: List[str] = []
+        vcpus, ram_gb, disk_gb = [], [], []
+        for flavor in self.flavors:
+            _, cpu, ram, disk = parse_flavor_name(flavor.name or "")
+            if cpu is None:
+                # Nom hors convention 'aX-ramY-diskZ' : ressources déclarées par le flavor
+                cpu, ram, disk = flavor.vcpus or 0, (flavor.ram or 0) / 1024, flavor.disk or 0
+            self.ids.append(flavor.id)
+            self.names.append(flavor.name or flavor.id)
+            vcpus.append(cpu)
+            ram_gb.append(ram)
+            disk_gb.append(disk)
+
+        self.by_id = {flavor_id: index for index, flavor_id in enumerate(self.ids)}
+        self.by_name = {name: index for index, name in enumerate(self.names)}
+        self._resources = (vcpus, ram_gb, disk_gb)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @cached_property
+    def vcpus(self):
+        import numpy as np
+
+        return np.array(self._resources[0], dtype=np.float64)
+
+    @cached_property
+    def ram_gb(self):
+        import numpy as np
+
+        return np.array(self._resources[1], dtype=np.float64)
+
+    @cached_property
+    def disk_gb(self):
+        import numpy as np
+
+        return np.array(self._resources[2], dtype=np.float64)
+
+    @cached_property
+    def prices(self):
+        """Prix horaire en ICU, NaN tant qu'il n'est pas connu (voir ``learn_prices``)."""
+        import numpy as np
+
+        return np.full(len(self.ids), np.nan)
+
+    def index(self, flavor: Any) -> Optional[int]:
+        """
+        Position d'un flavor dans le catalogue.
+
+        Args:
+            flavor: ID, nom, ou flavor embarqué d'une instance (``server.flavor``,
+                avec ``id`` ou ``original_name`` selon la microversion de Nova)
+        """
+        if isinstance(flavor, str):
+            return self.by_id.get(flavor, self.by_name.get(flavor))
+        if not flavor:
+            return None
+        for key, lookup in (("id", self.by_id), ("original_name", self.by_name), ("name", self.by_name)):
+            value = flavor.get(key)
+            if value in lookup:
+                return lookup[value]
+        return None
+
+    def name_of(self, flavor: Any) -> Optional[str]:
+        """Nom d'un flavor (voir ``index``), None s'il n'est pas au catalogue."""
+        index = self.index(flavor)
+        return self.names[index] if index is not None else None
+
+    def id_of(self, flavor: Any) -> Optional[str]:
+        """ID d'un flavor (voir ``index``), None s'il n'est pas au catalogue."""
+        index = self.index(flavor)
+        return self.ids[index] if index is not None else None
+
+    def learn_prices(self, observed: Dict[int, List[float]]) -> None:
+        """
+        Fixe le prix horaire des flavors à partir des prix observés de leurs instances.
+
+        Chaque flavor facturé prend la médiane de ses instances. Les autres sont
+        estimés par une régression linéaire ICU ≈ a·vCPU + b·RAM + c sur les flavors
+        facturés, dès qu'au moins trois le sont.
+
+        Args:
+            observed: Prix horaires observés (ICU) par position de flavor
+        """
+        import numpy as np
+
+        for index, prices in observed.items():
+            if prices:
+                self.prices[index] = float(np.median(prices))
+        known = np.isfinite(self.prices)
+        if known.sum() >= 3 and not known.all():
+            features = np.column_stack([self.vcpus, self.ram_gb, np.ones(len(self))])
+            coefficients, *_ = np.linalg.lstsq(features[known], self.prices[known], rcond=None)
+            self.prices[~known] = np.maximum(features[~known] @ coefficients, 0.0)
+
+    def cheapest_fitting(self, vcpus: Sequence[float], ram_gb: Sequence[float], disk_gb: Sequence[float]):
+        """
+        Flavor le moins cher couvrant chaque besoin, pour tous les besoins à la fois.
+
+        Sans prix connus, le plus petit flavor (vCPU, puis RAM, puis disque) est retenu.
+
+        Args:
+            vcpus: vCPU nécessaires, par instance
+            ram_gb: RAM nécessaire en Go, par instance
+            disk_gb: Disque minimal en Go, par instance (un redimensionnement ne réduit pas le disque)
+
+        Returns:
+            numpy.ndarray: Position du flavor retenu par instance, -1 si aucun ne convient
+        """
+        import numpy as np
+
+        needs = [np.asarray(values, dtype=np.float64)[:, None] for values in (vcpus, ram_gb, disk_gb)]
+        if not len(self) or not len(needs[0]):
+            return np.full(len(needs[0]), -1, dtype=np.intp)
+        prices = np.where(np.isfinite(self.prices), self.prices, np.inf)
+        # np.lexsort trie sur la dernière clé d'abord : prix, puis vCPU, RAM et disque
+        order = np.lexsort((self.disk_gb, self.ram_gb, self.vcpus, prices))
+        fits = (self.vcpus[order] >= needs[0]) & (self.ram_gb[order] >= needs[1]) & (self.disk_gb[order] >= needs[2])
+        first = fits.argmax(axis=1)
+        return np.where(fits.any(axis=1), order[first], -1)
+
+
+class FlavorCatalogueCache:
+    """
+    Catalogues de flavors gardés en mémoire ``ttl`` secondes, par clé (projet), pour les processus de longue durée.
+
+    Args:
+        ttl: Durée de vie d'un catalogue en secondes
+
+    Examples:
+        >>> cache = FlavorCatalogueCache(ttl=3600)
+        >>> catalogue = cache.get("my-project", lambda: list(conn.compute.flavors()))
+    """
+
+    def __init__(self, ttl: float = 3600.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Any] = {}
+
+    def get(self, key: str, loader: Callable[[], Optional[Iterable[Any]]]) -> Optional[FlavorCatalogue]:
+        """
+        Catalogue en cache, ou rechargé par ``loader`` s'il est absent ou expiré.
+
+        Si ``loader`` échoue (None), le catalogue expiré est gardé faute de mieux.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+        flavors = loader()
+        if flavors is None:
+            return entry[1] if entry is not None else None
+        catalogue = FlavorCatalogue(flavors)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), catalogue)
+        return catalogue
+
+
+class Recommendation(NamedTuple):
+    """Flavor moins cher couvrant les pics observés d'une instance."""
+
+    id: str
+    name: str
+    project: str
+    flavor: str
+    recommended: str
+    cpu_peak: float
+    ram_peak_gb: float
+    monthly_savings_icu: Optional[float]
+
+
+class RightsizingPlan:
+    """
+    Besoins observés des instances, prêts à être confrontés aux prix de la facturation.
+
+    Args:
+        catalogue: Catalogue des flavors
+        servers: Instances analysées (ACTIVE, flavor connu)
+        current: Position du flavor actuel de chaque instance
+        cpu_peak: vCPU utilisés au 95e percentile, par instance
+        ram_peak_gb: RAM utilisée au 95e percentile en Go, par instance
+        flavor_of: Position du flavor de chaque instance connue (ID → position), pour apprendre les prix
+    """
+
+    def __init__(self, catalogue, servers, current, cpu_peak, ram_peak_gb, flavor_of):
+        self.catalogue = catalogue
+        self.servers = servers
+        self.current = current
+        self.cpu_peak = cpu_peak
+        self.ram_peak_gb = ram_peak_gb
+        self.flavor_of = flavor_of
+
+    def recommendations(self, billing_table=None) -> List[Recommendation]:
+        """
+        Instances dont un flavor moins cher couvre les pics, avec l'économie mensuelle estimée.
+
+        Args:
+            billing_table (BillingTable): Facturation de la période, pour les prix (optionnelle)
+
+        Returns:
+            list: Recommendation, de la plus grosse économie à la plus petite
+        """
+        import numpy as np
+
+        catalogue = self.catalogue
+        if billing_table is not None and len(billing_table):
+            catalogue.learn_prices(observed_flavor_prices(billing_table, self.flavor_of))
+
+        headroom = settings.get("rightsizing_headroom")
+        current = np.asarray(self.current, dtype=np.intp)
+        need_cpu = np.maximum(np.ceil(self.cpu_peak * headroom), 1)
+        need_ram = self.ram_peak_gb * headroom
+        target = catalogue.cheapest_fitting(need_cpu, need_ram, catalogue.disk_gb[current])
+
+        valid = target >= 0
+        candidate = np.where(valid, target, current)
+        priced = np.isfinite(catalogue.prices)
+        both = valid & priced[current] & priced[candidate]
+        savings = np.full(len(current), np.nan)
+        savings[both] = (catalogue.prices[current[both]] - catalogue.prices[target[both]]) * HOURS_PER_MONTH
+        # Sans prix, seule une réduction stricte des ressources compte comme recommandation
+        smaller = (catalogue.vcpus[candidate] < catalogue.vcpus[current]) | (
+            catalogue.ram_gb[candidate] < catalogue.ram_gb[current]
+        )
+        useful = valid & (target != current) & np.where(both, savings > 0, smaller)
+
+        recommendations = [
+            Recommendation(
+                id=self.servers[row].id,
+                name=self.servers[row].name,
+                project=self.servers[row].project_id or "",
+                flavor=catalogue.names[current[row]],
+                recommended=catalogue.names[target[row]],
+                cpu_peak=float(self.cpu_peak[row]),
+                ram_peak_gb=float(self.ram_peak_gb[row]),
+                monthly_savings_icu=float(savings[row]) if both[row] else None,
+            )
+            for row in np.flatnonzero(useful)
+        ]
+        return sorted(recommendations, key=lambda item: -(item.monthly_savings_icu or 0.0))
+
+
+def observed_flavor_prices(billing_table, flavor_of: Dict[str, int]) -> Dict[int, List[float]]:
+    """
+    Prix horaires observés (ICU) de chaque flavor, d'après la facturation de ses instances.
+
+    Args:
+        billing_table (BillingTable): Facturation de la période
+        flavor_of: Position du flavor par ID d'instance
+    """
+    instances = billing_table.where(type="instance")
+    observed: Dict[int, List[float]] = {}
+    # Heures réellement valorisées : une instance créée ou supprimée en cours de période n'en a que quelques-unes
+    hours = instances.column("rated_seconds") / 3600
+    for resource_id, rating, billed_hours in zip(instances.column("resource_id"), instances.column("rating"), hours):
+        index = flavor_of.get(resource_id)
+        if index is not None and billed_hours >= 1:
+            observed.setdefault(index, []).append(float(rating / billed_hours))
+    return observed
+
+
+def plan_rightsizing(
+    conn,
+    servers: Sequence[Any],
+    flavors: Iterable[Any],
+    days: int = 7,
+    analysis=None,
+    usage: Optional[UsageSnapshot] = None,
+) -> RightsizingPlan:
+    """
+    Relève les pics de CPU et de mémoire des instances ACTIVE et prépare leur redimensionnement.
+
+    Avec une analyse incrémentale, seules les instances à revérifier
+    (``due_for_idle_check``) sont mesurées ; les autres reprennent les pics
+    enregistrés au rapport précédent.
+
+    Args:
+        conn (Connection): Connexion OpenStack authentifiée
+        servers: Instances (openstacksdk ou StoredResource)
+        flavors: Flavors disponibles
+        days: Durée de la période observée, jusqu'à maintenant
+        analysis (IncrementalAnalysis): État du rapport précédent, où ``observe("server", ...)``
+            a été appelée (optionnel)
+        usage: Relevé partagé avec les autres sources du rapport (sinon, relevé propre)
+
+    Raises:
+        GnocchiError: Si Gnocchi est indisponible
+    """
+    import numpy as np
+
+    catalogue = FlavorCatalogue(flavors)
+    flavor_of = {}
+    for server in servers:
+        index = catalogue.index(server.flavor)
+        if index is not None:
+            flavor_of[server.id] = index
+    running = [server for server in servers if (server.status or "").upper() == "ACTIVE"]
+    active = [server for server in running if server.id in flavor_of]
+    current = np.array([flavor_of[server.id] for server in active], dtype=np.intp)
+    if not active:
+        return RightsizingPlan(catalogue, [], current, np.zeros(0), np.zeros(0), flavor_of)
+
+    # Instances à mesurer : les mêmes que pour la détection d'inactivité, dont le relevé est partagé
+    to_measure = running if analysis is None else analysis.due_for_idle_check(running)
+    due = [server for server in to_measure if server.id in flavor_of]
+    cpu_peak = ram_peak_gb = np.zeros(0)
+    if due:
+        ids = [server.id for server in due]
+        if usage is not None:
+            matrix = usage.measure([server.id for server in to_measure])
+        else:
+            stop = datetime.now(timezone.utc)
+            matrix = measure_usage(conn, ids, stop - timedelta(days=days), stop, ("cpu", "memory"))
+        # Temps CPU (ns par intervalle) converti en vCPU occupés
+        cpu_peak = row_percentile(matrix.get("cpu", ids) / (matrix.granularity * 1e9), 95)
+        ram_peak_gb = row_percentile(matrix.get("memory", ids), 95) / 1024
+    if analysis is not None:
+        analysis.record_peaks(due, cpu_peak, ram_peak_gb)
+        peaks = np.array(analysis.peaks(active), dtype=np.float64)
+        cpu_peak, ram_peak_gb = peaks[:, 0], peaks[:, 1]
+    vcpus = catalogue.vcpus[current]
+
+    # Une instance sans mesure n'est pas redimensionnée
+    measured = np.isfinite(cpu_peak) & np.isfinite(ram_peak_gb)
+    cpu_peak = np.minimum(cpu_peak, vcpus)
+    return RightsizingPlan(
+        catalogue,
+        [server for server, keep in zip(active, measured) if keep],
+        current[measured],
+        cpu_peak[measured],
+        ram_peak_gb[measured],
+        flavor_of,
+    )
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Historique local de l'utilisation des projets OpenStack.
+
+Le collecteur de métriques y ajoute à chaque cycle les compteurs d'un projet
+(instances, volumes, tailles, quotas...) et les rapports y ajoutent les coûts.
+Les points récents sont gardés à la résolution ``history_resolution`` ; au-delà
+de ``history_retention_days`` ils sont agrégés par jour (moyenne, min, max) et
+rangés par mois dans des blocs compressés. Les tendances hebdomadaires ou
+mensuelles se calculent ainsi localement, sans appel au cloud.
+"""
+
+import calendar
+import os
+import sqlite3
+import struct
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .config import settings
+from .storage import SQLiteStore
+
+DAY = 86400
+
+# Un point agrégé : début du jour (epoch), moyenne, minimum, maximum
+_POINT = struct.Struct("<Iddd")
+
+
+class TrendPoint(NamedTuple):
+    """Valeur d'une métrique sur une période (semaine ou mois)."""
+
+    start: datetime
+    average: float
+    minimum: float
+    maximum: float
+
+
+def _month_start(ts: int) -> int:
+    dt = datetime.fromtimestamp(ts, timezone.utc)
+    return calendar.timegm((dt.year, dt.month, 1, 0, 0, 0))
+
+
+def _pack(points: Iterable[Tuple[int, float, float, float]]) -> bytes:
+    return zlib.compress(b"".join(_POINT.pack(*point) for point in sorted(points)), 9)
+
+
+def _unpack(blob: bytes) -> List[Tuple[int, float, float, float]]:
+    return list(_POINT.iter_unpack(zlib.decompress(blob)))
+
+
+class HistoryStore(SQLiteStore):
+    """
+    Base SQLite en ajout seul des valeurs historiques par projet et par métrique.
+
+    Args:
+        path: Chemin du fichier SQLite
+        resolution: Résolution des points récents, en secondes (un point par intervalle)
+        retention_days: Nombre de jours gardés à pleine résolution avant agrégation
+
+    Examples:
+        >>> history = HistoryStore("~/.config/openstack-toolbox/history.db")
+        >>> history.record("my-project", {"instances": 12, "volumes_gb": 480})
+        >>> history.trend("my-project", "instances", period="week", periods=4)
+        [TrendPoint(start=datetime(2024, 2, 19, ...), average=10.0, minimum=9.0, maximum=11.0), ...]
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS samples (
+            project TEXT NOT NULL,
+            metric TEXT NOT NULL,
+            ts INTEGER NOT NULL,
+            value REAL NOT NULL,
+            PRIMARY KEY (project, metric, ts)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS archive (
+            project TEXT NOT NULL,
+            metric TEXT NOT NULL,
+            month INTEGER NOT NULL,
+            points BLOB NOT NULL,
+            PRIMARY KEY (project, metric, month)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path: str, resolution: float = 3600, retention_days: float = 30):
+        super().__init__(path)
+        self.resolution = max(1, int(resolution))
+        self.retention = int(retention_days * DAY)
+        self._last_compaction = 0.0
+
+    def record(self, project: str, values: Dict[str, Optional[float]], ts: Optional[float] = None) -> None:
+        """
+        Ajoute les valeurs d'un projet à l'historique.
+
+        Une seule valeur est gardée par intervalle de ``resolution`` : la dernière.
+        Les valeurs None sont ignorées, de même qu'un point plus ancien que la
+        rétention, dont le jour est peut-être déjà archivé. Les données anciennes
+        sont agrégées au plus une fois par intervalle.
+
+        Args:
+            project: Nom du projet
+            values: Valeurs par nom de métrique
+            ts: Horodatage epoch (maintenant par défaut)
+        """
+        now = time.time()
+        ts = now if ts is None else ts
+        if ts < self._cutoff(now):
+            return
+        bucket = int(ts) - int(ts) % self.resolution
+        rows = [(project, metric, bucket, float(value)) for metric, value in values.items() if value is not None]
+        with self._lock:
+            db = self._connect()
+            try:
+                with db:
+                    db.executemany("INSERT OR REPLACE INTO samples VALUES (?, ?, ?, ?)", rows)
+                if now - self._last_compaction >= self.resolution:
+                    self._compact(db, now)
+                    self._last_compaction = now
+            finally:
+                db.close()
+
+    def compact(self, now: Optional[float] = None) -> None:
+        """Agrège par jour les points plus anciens que la rétention et les archive compressés."""
+        with self._lock:
+            db = self._connect()
+            try:
+                self._compact(db, time.time() if now is None else now)
+            finally:
+                db.close()
+
+    def _cutoff(self, now: float) -> int:
+        # Seuls les jours entiers sortis de la rétention sont agrégés
+        cutoff = int(now) - self.retention
+        return cutoff - cutoff % DAY
+
+    def _compact(self, db: sqlite3.Connection, now: float) -> None:
+        cutoff = self._cutoff(now)
+        daily = db.execute(
+            """
+            SELECT project, metric, ts - ts % ?, AVG(value), MIN(value), MAX(value)
+            FROM samples WHERE ts < ?
+            GROUP BY project, metric, ts - ts % ?
+            """,
+            (DAY, cutoff, DAY),
+        ).fetchall()
+        if not daily:
+            return
+
+        blocks: Dict[Tuple[str, str, int], Dict[int, Tuple[int, float, float, float]]] = {}
+        for project, metric, day, average, minimum, maximum in daily:
+            blocks.setdefault((project, metric, _month_start(day)), {})[day] = (day, average, minimum, maximum)
+
+        with db:
+            for (project, metric, month), points in blocks.items():
+                row = db.execute(
+                    "SELECT points FROM archive WHERE project = ? AND metric = ? AND month = ?",
+                    (project, metric, month),
+                ).fetchone()
+                merged = {point[0]: point for point in _unpack(row[0])} if row else {}
+                merged.update(points)
+                db.execute(
+                    "INSERT OR REPLACE INTO archive VALUES (?, ?, ?, ?)",
+                    (project, metric, month, _pack(merged.values())),
+                )
+            db.execute("DELETE FROM samples WHERE ts < ?", (cutoff,))
+
+    def points(self, project: str, metric: str, start: float, end: float) -> List[Tuple[int, float, float, float]]:
+        """
+        Points d'une métrique entre ``start`` et ``end`` (epoch), archives comprises.
+
+        Returns:
+            list: (horodatage, moyenne, minimum, maximum) triés par date ;
+                pour un point récent, les trois valeurs sont égales
+        """
+        if not os.path.exists(self.path):
+            return []
+        db = self._connect()
+        try:
+            points = []
+            for (blob,) in db.execute(
+                "SELECT points FROM archive WHERE project = ? AND metric = ? AND month >= ? AND month < ?",
+                (project, metric, _month_start(int(start)), int(end)),
+            ):
+                points.extend(point for point in _unpack(blob) if start <= point[0] < end)
+            points.extend(
+                (ts, value, value, value)
+                for ts, value in db.execute(
+                    "SELECT ts, value FROM samples WHERE project = ? AND metric = ? AND ts >= ? AND ts < ?",
+                    (project, metric, int(start), int(end)),
+                )
+            )
+            return sorted(points)
+        finally:
+            db.close()
+
+    def trend(self, project: str, metric: str, period: str = "week", periods: int = 4) -> List[TrendPoint]:
+        """
+        Tendance d'une métrique sur les dernières semaines ou les derniers mois.
+
+        Args:
+            project: Nom du projet
+            metric: Nom de la métrique
+            period: 'week' (semaines commençant le lundi) ou 'month' (mois calendaires)
+            periods: Nombre de périodes, la période en cours comprise
+
+        Returns:
+            list: Un TrendPoint par période contenant des données, de la plus ancienne à la plus récente
+        """
+        today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        if period == "week":
+            current = today - timedelta(days=today.weekday())
+            starts = [current - timedelta(weeks=i) for i in range(periods - 1, -1, -1)]
+            starts.append(current + timedelta(weeks=1))
+        elif period == "month":
+            starts = []
+            year, month = today.year, today.month
+            for _ in range(periods):
+                starts.insert(0, datetime(year, month, 1, tzinfo=timezone.utc))
+                year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+            # Le mois suivant borne la période en cours
+            year, month = (today.year, today.month + 1) if today.month < 12 else (today.year + 1, 1)
+            starts.append(datetime(year, month, 1, tzinfo=timezone.utc))
+        else:
+            raise ValueError(f"Période inconnue : {period!r} ('week' ou 'month')")
+
+        points = self.points(project, metric, starts[0].timestamp(), starts[-1].timestamp())
+        # Moyenne par jour d'abord : un jour archivé et un jour à pleine résolution pèsent autant
+        days: Dict[int, List[Tuple[int, float, float, float]]] = {}
+        for point in points:
+            days.setdefault(point[0] - point[0] % DAY, []).append(point)
+        daily = [
+            (day, sum(p[1] for p in selected) / len(selected), min(p[2] for p in selected), max(p[3] for p in selected))
+            for day, selected in sorted(days.items())
+        ]
+
+        trend = []
+        for start, end in zip(starts, starts[1:]):
+            selected = [point for point in daily if start.timestamp() <= point[0] < end.timestamp()]
+            if selected:
+                trend.append(
+                    TrendPoint(
+                        start=start,
+                        average=sum(point[1] for point in selected) / len(selected),
+                        minimum=min(point[2] for point in selected),
+                        maximum=max(point[3] for point in selected),
+                    )
+                )
+        return trend
+
+    def metrics(self, project: str) -> List[str]:
+        """Noms des métriques enregistrées pour un projet."""
+        if not os.path.exists(self.path):
+            return []
+        db = self._connect()
+        try:
+            names = db.execute(
+                "SELECT metric FROM samples WHERE project = ? UNION SELECT metric FROM archive WHERE project = ?",
+                (project, project),
+            ).fetchall()
+            return sorted(name for (name,) in names)
+        finally:
+            db.close()
+
+
+def open_history_store() -> Optional[HistoryStore]:
+    """Historique configuré par les réglages ``history_*``, None s'il est désactivé."""
+    path = settings.get("history_store")
+    if not path:
+        return None
+    return HistoryStore(path, settings.get("history_resolution"), settings.get("history_retention_days"))
@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+Inventaire des ressources OpenStack partagé par les commandes de rapport.
+
+Chaque collection (instances, volumes, images...) n'est demandée qu'une seule fois
+à l'API puis gardée en mémoire : pour toute la durée d'un rapport, ou pendant
+``ttl`` secondes dans les processus de longue durée (daemon).
+
+Le collecteur de métriques enregistre aussi chaque inventaire dans une base
+SQLite locale (``InventoryStore``) ; les commandes de rapport lancées avec
+``--from-cache`` la relisent (``StoredInventory``) sans aucun appel API.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .config import settings
+from .exceptions import StaleInventoryError
+from .flavors import FlavorCatalogue
+from .storage import SQLiteStore
+
+
+class Inventory:
+    """
+    Inventaire des ressources d'un projet, chargé à la demande et mis en cache.
+
+    Args:
+        conn: Connexion OpenStack authentifiée
+        ttl: Durée de vie d'une collection en secondes (None : jamais rechargée)
+
+    Examples:
+        >>> inventory = Inventory(conn)
+        >>> servers = inventory.servers()  # Appel API
+        >>> servers = inventory.servers()  # Servi depuis la mémoire
+        >>> inventory.invalidate()
+    """
+
+    SERVER_PAGE_SIZE = 1000
+    # Ressources par requête pour les listes de tous les projets (voir ``sweep``)
+    SWEEP_PAGE_SIZE = 1000
+
+    def __init__(self, conn, ttl: Optional[float] = None):
+        self.conn = conn
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._kind_locks: Dict[str, threading.Lock] = {}
+        self._collections: Dict[str, Tuple[float, Any]] = {}
+
+    def _get(self, kind: str, loader: Callable[[], Any]) -> Any:
+        """Retourne une collection depuis le cache, ou la charge une seule fois même en cas d'appels concurrents."""
+        with self._lock:
+            kind_lock = self._kind_locks.setdefault(kind, threading.Lock())
+        with kind_lock:
+            entry = self._collections.get(kind)
+            if entry is not None and (self.ttl is None or time.monotonic() - entry[0] < self.ttl):
+                return entry[1]
+            value = loader()
+            self._collections[kind] = (time.monotonic(), value)
+            return value
+
+    def invalidate(self, kind: Optional[str] = None) -> None:
+        """
+        Oublie une collection, ou tout l'inventaire.
+
+        Args:
+            kind: Nom de la collection (None pour tout oublier)
+        """
+        with self._lock:
+            if kind is None:
+                self._collections.clear()
+            else:
+                self._collections.pop(kind, None)
+                if kind == "flavors":
+                    self._collections.pop("flavor_catalogue", None)
+
+    def project(self, project_id: str) -> Any:
+        """Détails d'un projet Keystone (non mis en cache)."""
+        return self.conn.identity.get_project(project_id)
+
+    def projects(self) -> List[Any]:
+        """Projets Keystone visibles (droits administrateur requis pour les voir tous)."""
+        return self._get("projects", lambda: list(self.conn.identity.projects()))
+
+    def servers(self, all_projects: bool = False) -> List[Any]:
+        """
+        Instances du projet, ou de tous les projets (droits administrateur requis).
+
+        openstacksdk suit la pagination de Nova ; ``SERVER_PAGE_SIZE`` instances par requête.
+        """
+        if all_projects:
+            return self._get(
+                "servers:all",
+                lambda: list(self.conn.compute.servers(all_projects=True, limit=self.SERVER_PAGE_SIZE)),
+            )
+        return self._get("servers", lambda: list(self.conn.compute.servers(limit=self.SERVER_PAGE_SIZE)))
+
+    def flavors(self) -> Dict[str, Any]:
+        """Flavors disponibles, indexés par ID."""
+        return self._get("flavors", lambda: {f.id: f for f in self.conn.compute.flavors()})
+
+    def flavor_catalogue(self) -> FlavorCatalogue:
+        """Catalogue des flavors, pour résoudre le flavor des instances sans appel API."""
+        return self._get("flavor_catalogue", lambda: FlavorCatalogue(self.flavors().values()))
+
+    def images(self, visibility: Optional[str] = None) -> List[Any]:
+        """Images, éventuellement filtrées par visibilité ('private', 'shared'...)."""
+        if visibility is None:
+            return self._get("images", lambda: list(self.conn.image.images()))
+        return self._get(f"images:{visibility}", lambda: list(self.conn.image.images(visibility=visibility)))
+
+    def volumes(self, all_projects: bool = False) -> List[Any]:
+        """Volumes du projet, ou de tous les projets (droits administrateur requis)."""
+        if all_projects:
+            return self._get("volumes:all", lambda: self._sweep(self.conn.block_storage.volumes))
+        return self._get("volumes", lambda: list(self.conn.block_storage.volumes()))
+
+    def snapshots(self, all_projects: bool = False) -> List[Any]:
+        """Snapshots de volumes du projet, ou de tous les projets (droits administrateur requis)."""
+        if all_projects:
+            return self._get("snapshots:all", lambda: self._sweep(self.conn.block_storage.snapshots))
+        return self._get("snapshots", lambda: list(self.conn.block_storage.snapshots()))
+
+    def backups(self, all_projects: bool = False) -> List[Any]:
+        """Backups de volumes du projet, ou de tous les projets (droits administrateur requis)."""
+        if all_projects:
+            return self._get("backups:all", lambda: self._sweep(self.conn.block_storage.backups))
+        return self._get("backups", lambda: list(self.conn.block_storage.backups()))
+
+    def floating_ips(self, all_projects: bool = False) -> List[Any]:
+        """IP flottantes du projet, ou de tous les projets (droits administrateur requis)."""
+        if all_projects:
+            # Neutron renvoie les IP de tous les projets à un administrateur qui ne filtre pas
+            return self._get("floating_ips:all", lambda: list(self.conn.network.ips(limit=self.SWEEP_PAGE_SIZE)))
+        return self._get("floating_ips", lambda: list(self.conn.network.ips()))
+
+    def _sweep(self, lister: Callable[..., Iterable[Any]]) -> List[Any]:
+        """Liste Cinder de tous les projets (``all_tenants``), paginée par ``SWEEP_PAGE_SIZE``."""
+        return list(lister(details=True, all_projects=True, limit=self.SWEEP_PAGE_SIZE))
+
+    def containers(self) -> List[Any]:
+        """Containers Swift du projet."""
+        return self._get("containers", lambda: list(self.conn.object_store.containers()))
+
+
+class StoredResource(dict):
+    """
+    Ressource relue depuis l'inventaire local.
+
+    Se manipule comme une ressource openstacksdk : ``server.name``,
+    ``server.flavor["id"]`` ou ``flavor.get("name")``. Un attribut absent vaut None.
+    """
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return self.get(name)
+
+
+def resource_to_dict(resource: Any) -> Dict[str, Any]:
+    """Convertit une ressource openstacksdk en dictionnaire sérialisable."""
+    if hasattr(resource, "to_dict"):
+        return resource.to_dict(computed=False)
+    return dict(resource)
+
+
+class InventoryStore(SQLiteStore):
+    """
+    Base SQLite des inventaires écrits par le collecteur de métriques.
+
+    Chaque collection d'un projet est remplacée en une transaction, avec sa date de
+    collecte ; les ressources sont indexées par projet, type, nom et statut.
+
+    Args:
+        path: Chemin du fichier SQLite
+
+    Examples:
+        >>> store = InventoryStore("~/.config/openstack-toolbox/inventory.db")
+        >>> store.write("my-project", "servers", conn.compute.servers())
+        >>> servers, collected_at = store.read("my-project", "servers")
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS collections (
+            project TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            collected_at REAL NOT NULL,
+            PRIMARY KEY (project, kind)
+        );
+        CREATE TABLE IF NOT EXISTS resources (
+            project TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            id TEXT NOT NULL,
+            name TEXT,
+            status TEXT,
+            data TEXT NOT NULL,
+            PRIMARY KEY (project, kind, id)
+        );
+        CREATE INDEX IF NOT EXISTS resources_by_name ON resources (project, kind, name);
+        CREATE INDEX IF NOT EXISTS resources_by_status ON resources (project, kind, status);
+    """
+
+    def write(self, project: str, kind: str, resources: Iterable[Any]) -> None:
+        """
+        Remplace une collection d'un projet.
+
+        Args:
+            project: Nom du projet
+            kind: Type de collection ('servers', 'volumes'...)
+            resources: Ressources openstacksdk ou dictionnaires
+        """
+        rows = []
+        for resource in resources:
+            data = resource_to_dict(resource)
+            # Les containers Swift n'ont pas d'ID : leur nom en tient lieu
+            resource_id = data.get("id") or data.get("name")
+            rows.append(
+                (project, kind, str(resource_id), data.get("name"), data.get("status"), json.dumps(data, default=str))
+            )
+        with self._lock:
+            db = self._connect()
+            try:
+                with db:
+                    db.execute("DELETE FROM resources WHERE project = ? AND kind = ?", (project, kind))
+                    db.executemany(
+                        "INSERT OR REPLACE INTO resources (project, kind, id, name, status, data) VALUES (?, ?, ?, ?, ?, ?)",
+                        rows,
+                    )
+                    db.execute(
+                        "INSERT OR REPLACE INTO collections (project, kind, collected_at) VALUES (?, ?, ?)",
+                        (project, kind, time.time()),
+                    )
+            finally:
+                db.close()
+
+    def read(self, project: str, kind: str) -> Tuple[Optional[List[StoredResource]], Optional[float]]:
+        """
+        Relit une collection d'un projet.
+
+        Returns:
+            tuple: (ressources, date de collecte en secondes epoch), (None, None) si absente
+        """
+        if not os.path.exists(self.path):
+            return None, None
+        db = self._connect()
+        try:
+            row = db.execute(
+                "SELECT collected_at FROM collections WHERE project = ? AND kind = ?", (project, kind)
+            ).fetchone()
+            if row is None:
+                return None, None
+            resources = [
+                StoredResource(json.loads(data))
+                for (data,) in db.execute(
+                    "SELECT data FROM resources WHERE project = ? AND kind = ? ORDER BY rowid", (project, kind)
+                )
+            ]
+            return resources, row[0]
+        finally:
+            db.close()
+
+
+class StoredInventory:
+    """
+    Inventaire relu depuis ``InventoryStore``, avec la même interface que ``Inventory``.
+
+    Args:
+        store: Base des inventaires
+        project: Nom du projet
+        max_age: Âge maximal accepté d'une collection, en secondes
+
+    Raises:
+        StaleInventoryError: Si une collection est absente ou plus ancienne que ``max_age``
+
+    Examples:
+        >>> inventory = StoredInventory(InventoryStore(path), "my-project", max_age=900)
+        >>> run_summary(None, period, inventory=inventory)
+    """
+
+    conn = None
+
+    def __init__(self, store: InventoryStore, project: str, max_age: float):
+        self.store = store
+        self.project_name = project
+        self.max_age = max_age
+        self._collections: Dict[str, List[StoredResource]] = {}
+        self._catalogue: Optional[FlavorCatalogue] = None
+
+    def _get(self, kind: str) -> List[StoredResource]:
+        if kind not in self._collections:
+            resources, collected_at = self.store.read(self.project_name, kind)
+            if resources is None:
+                raise StaleInventoryError(f"{self.project_name}/{kind}: absent")
+            age = time.time() - collected_at
+            if age > self.max_age:
+                raise StaleInventoryError(f"{self.project_name}/{kind}: {age:.0f}s > {self.max_age:.0f}s")
+            self._collections[kind] = resources
+        return self._collections[kind]
+
+    def invalidate(self, kind: Optional[str] = None) -> None:
+        """Oublie une collection relue, ou toutes."""
+        if kind in (None, "flavors"):
+            self._catalogue = None
+        if kind is None:
+            self._collections.clear()
+        else:
+            self._collections.pop(kind, None)
+
+    def project(self, project_id: str) -> Optional[StoredResource]:
+        """Détails d'un projet Keystone enregistrés par le collecteur."""
+        return next((project for project in self._get("projects") if project.id == project_id), None)
+
+    def servers(self, all_projects: bool = False) -> List[StoredResource]:
+        return self._get(self._scoped("servers", all_projects))
+
+    def flavors(self) -> Dict[str, StoredResource]:
+        return {flavor.id: flavor for flavor in self._get("flavors")}
+
+    def flavor_catalogue(self) -> FlavorCatalogue:
+        if self._catalogue is None:
+            self._catalogue = FlavorCatalogue(self._get("flavors"))
+        return self._catalogue
+
+    def images(self, visibility: Optional[str] = None) -> List[StoredResource]:
+        images = self._get("images")
+        if visibility is None:
+            return images
+        return [image for image in images if image.visibility == visibility]
+
+    def projects(self) -> List[StoredResource]:
+        return self._get("projects")
+
+    def volumes(self, all_projects: bool = False) -> List[StoredResource]:
+        return self._get(self._scoped("volumes", all_projects))
+
+    def snapshots(self, all_projects: bool = False) -> List[StoredResource]:
+        return self._get(self._scoped("snapshots", all_projects))
+
+    def backups(self, all_projects: bool = False) -> List[StoredResource]:
+        return self._get(self._scoped("backups", all_projects))
+
+    def floating_ips(self, all_projects: bool = False) -> List[StoredResource]:
+        return self._get(self._scoped("floating_ips", all_projects))
+
+    def _scoped(self, kind: str, all_projects: bool) -> str:
+        if all_projects:
+            # Le collecteur n'enregistre que les ressources de son projet
+            raise StaleInventoryError(f"{self.project_name}/{kind}: all_projects absent")
+        return kind
+
+    def containers(self) -> List[StoredResource]:
+        return self._get("containers")
+
+
+def attachment_index(volumes: Iterable[Any]) -> Dict[str, List[Any]]:
+    """Volumes attachés, indexés par ID d'instance, en un seul passage sur les volumes."""
+    index: Dict[str, List[Any]] = {}
+    for volume in volumes:
+        for attachment in volume.attachments or []:
+            index.setdefault(attachment["server_id"], []).append(volume)
+    return index
+
+
+class InventorySnapshot:
+    """
+    Vue figée d'un inventaire pour la durée d'un rapport.
+
+    Chaque collection est lue une seule fois dans l'inventaire sous-jacent (API,
+    inventaire du daemon ou base locale) puis gardée telle quelle : toutes les
+    sections d'un rapport voient les mêmes ressources, même si le ``ttl`` du
+    daemon expire en cours de route.
+
+    Args:
+        inventory: Inventory ou StoredInventory
+
+    Examples:
+        >>> snapshot = InventorySnapshot(Inventory(conn))
+        >>> servers = snapshot.servers()
+        >>> volumes = snapshot.volumes_by_server().get(servers[0].id, [])
+    """
+
+    def __init__(self, inventory):
+        self.inventory = inventory
+        self.conn = inventory.conn
+        self._values: Dict[Any, Any] = {}
+
+    def _get(self, key: Any, loader: Callable[[], Any]) -> Any:
+        if key not in self._values:
+            # Sous plusieurs threads, le premier résultat enregistré fait foi
+            self._values.setdefault(key, loader())
+        return self._values[key]
+
+    def project(self, project_id: str) -> Any:
+        return self._get(("project", project_id), lambda: self.inventory.project(project_id))
+
+    def servers(self, all_projects: bool = False) -> List[Any]:
+        return self._get(("servers", all_projects), lambda: self.inventory.servers(all_projects=all_projects))
+
+    def flavors(self) -> Dict[str, Any]:
+        return self._get("flavors", self.inventory.flavors)
+
+    def flavor_catalogue(self) -> FlavorCatalogue:
+        return self._get("flavor_catalogue", self.inventory.flavor_catalogue)
+
+    def images(self, visibility: Optional[str] = None) -> List[Any]:
+        return self._get(("images", visibility), lambda: self.inventory.images(visibility=visibility))
+
+    def projects(self) -> List[Any]:
+        return self._get("projects", self.inventory.projects)
+
+    def volumes(self, all_projects: bool = False) -> List[Any]:
+        return self._get(("volumes", all_projects), lambda: self.inventory.volumes(all_projects=all_projects))
+
+    def snapshots(self, all_projects: bool = False) -> List[Any]:
+        return self._get(("snapshots", all_projects), lambda: self.inventory.snapshots(all_projects=all_projects))
+
+    def backups(self, all_projects: bool = False) -> List[Any]:
+        return self._get(("backups", all_projects), lambda: self.inventory.backups(all_projects=all_projects))
+
+    def floating_ips(self, all_projects: bool = False) -> List[Any]:
+        return self._get(("floating_ips", all_projects), lambda: self.inventory.floating_ips(all_projects=all_projects))
+
+    def containers(self) -> List[Any]:
+        return self._get("containers", self.inventory.containers)
+
+    def volumes_by_server(self) -> Dict[str, List[Any]]:
+        """Volumes attachés à chaque instance (voir ``attachment_index``)."""
+        return self._get("volumes_by_server", lambda: attachment_index(self.volumes()))
+
+
+def open_stored_inventory(max_age: Optional[float] = None) -> StoredInventory:
+    """
+    Ouvre l'inventaire local du projet courant (``OS_PROJECT_NAME``).
+
+    Args:
+        max_age: Âge maximal accepté en secondes (réglage ``inventory_max_age`` par défaut)
+    """
+    store = InventoryStore(settings.get("inventory_store"))
+    if max_age is None:
+        max_age = settings.get("inventory_max_age")
+    return StoredInventory(store, os.getenv("OS_PROJECT_NAME", ""), max_age)
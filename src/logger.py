@@ -7,13 +7,17 @@ This module provides a centralized logging configuration with support for:
 - Console and file handlers
 - JSON formatting for structured logs
 - Rotation of log files
+- Asynchronous, rate-limited logging for hot paths
 """
 
 import logging
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 from pythonjsonlogger import jsonlogger
 
@@ -32,6 +36,8 @@ class ColoredFormatter(logging.Formatter):
 
     def format(self, record: logging.LogRecord) -> str:
         """Format log record with colors."""
+        # Work on a copy so other handlers sharing the record keep a plain level name
+        record = logging.makeLogRecord(record.__dict__)
         log_color = self.COLORS.get(record.levelname, self.COLORS["RESET"])
         record.levelname = f"{log_color}{record.levelname}{self.COLORS['RESET']}"
         return super().format(record)
@@ -101,6 +107,95 @@ def setup_logger(
     return logger
 
 
+class RateLimitFilter(logging.Filter):
+    """
+    Limit how many records a single logging call site may emit per interval.
+
+    Records beyond ``max_records`` within ``interval`` seconds are dropped. The first
+    record let through once a new interval starts carries a "suppressed N" summary.
+    """
+
+    def __init__(self, max_records: int = 10, interval: float = 60.0):
+        super().__init__()
+        self.max_records = max_records
+        self.interval = interval
+        self._lock = threading.Lock()
+        # call site -> [window start, records emitted, records suppressed]
+        self._windows: Dict[Tuple[str, str, int, int], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Return False when the record's call site exceeded its budget."""
+        key = (record.name, record.pathname, record.lineno, record.levelno)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                self._windows[key] = [now, 1, 0]
+            elif window[1] < self.max_records:
+                window[1] += 1
+                return True
+            else:
+                window[2] += 1
+                return False
+
+        if suppressed:
+            record.msg = f"{record.getMessage()} (suppressed {suppressed} similar messages)"
+            record.args = None
+        return True
+
+
+def setup_async_logger(
+    name: str,
+    log_level: str = "INFO",
+    log_file: Optional[str] = None,
+    json_format: bool = False,
+    max_bytes: int = 10 * 1024 * 1024,  # 10MB
+    backup_count: int = 5,
+    rate_limit: int = 10,
+    rate_interval: float = 60.0,
+) -> Tuple[logging.Logger, QueueListener]:
+    """
+    Configure a logger whose handlers run on a background thread.
+
+    The console and rotating file handlers are built by ``setup_logger`` and moved
+    behind a queue: logging calls only enqueue the record, and a ``QueueListener``
+    thread does the formatting and I/O. Each call site is rate-limited with
+    ``RateLimitFilter`` before anything is enqueued.
+
+    Args:
+        name: Logger name (usually __name__)
+        log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+        log_file: Optional path to log file
+        json_format: Use JSON format for file logs
+        max_bytes: Maximum size of log file before rotation
+        backup_count: Number of backup files to keep
+        rate_limit: Maximum records per call site and interval (0 disables rate limiting)
+        rate_interval: Rate-limiting interval in seconds
+
+    Returns:
+        Configured logger instance and the started listener (call ``stop()`` on exit)
+
+    Examples:
+        >>> logger, listener = setup_async_logger(__name__, log_file="app.log", json_format=True)
+        >>> logger.info("Collector started")
+        >>> listener.stop()
+    """
+    logger = setup_logger(name, log_level, log_file, json_format, max_bytes, backup_count)
+    handlers = list(logger.handlers)
+    logger.handlers.clear()
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    if rate_limit > 0:
+        queue_handler.addFilter(RateLimitFilter(rate_limit, rate_interval))
+    logger.addHandler(queue_handler)
+
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return logger, listener
+
+
 def get_log_level_from_verbosity(verbose: int = 0) -> str:
     """
     Convert verbosity count to log level.
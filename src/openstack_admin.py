@@ -1,15 +1,17 @@
 #!/usr/bin/env python3
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-from openstack import connection
 from rich import print
 from rich.console import Console
 from rich.table import Table
 from rich.tree import Tree
 
 from .config import get_language_preference, load_openstack_credentials
+from .exceptions import StaleInventoryError
+from .inventory import Inventory, InventorySnapshot, open_stored_inventory
 from .utils import format_size, get_version, print_header
 
 # Dictionnaire des traductions
@@ -29,6 +31,7 @@ TRANSLATIONS = {
         "yes": "Oui",
         "no": "Non",
         "no_project": "❌ Aucun projet trouvé avec l'ID: {}",
+        "cache_stale": "❌ Inventaire local absent ou trop ancien ({}). Lancez le collecteur de métriques ou retirez --from-cache.",
         "no_images": "🚫 Aucune image trouvée.",
         "no_instances": "🚫 Aucune instance trouvée.",
         "no_snapshots": "🚫 Aucun snapshot trouvé.",
@@ -48,8 +51,20 @@ TRANSLATIONS = {
         "backups_header": "LISTE DES BACKUPS",
         "volumes_header": "LISTE DES VOLUMES",
         "volumes_tree_header": "ARBORESCENCE DES VOLUMES",
+        "unknown": "inconnu",
         "floating_ips_header": "LISTE DES FLOATING IPs",
         "containers_header": "LISTE DES CONTAINERS",
+        "all_projects_header": "INVENTAIRE DE TOUS LES PROJETS",
+        "project_resources_header": "RESSOURCES DU PROJET {} ({})",
+        "project_names_unavailable": "⚠️ Noms des projets indisponibles ({}) : affichage par ID.",
+        "project_column": "Projet",
+        "instance_count": "Instances",
+        "volume_count": "Volumes",
+        "snapshot_count": "Snapshots",
+        "backup_count": "Backups",
+        "floating_ip_count": "IP flottantes",
+        "image_count": "Images",
+        "volume_size_column": "Volumes (taille)",
     },
     "en": {
         "welcome": "🎉 Welcome to OpenStack Toolbox 🧰 v{} 🎉",
@@ -66,6 +81,7 @@ TRANSLATIONS = {
         "yes": "Yes",
         "no": "No",
         "no_project": "❌ No project found with ID: {}",
+        "cache_stale": "❌ Local inventory missing or too old ({}). Start the metrics collector or drop --from-cache.",
         "no_images": "🚫 No images found.",
         "no_instances": "🚫 No instances found.",
         "no_snapshots": "🚫 No snapshots found.",
@@ -85,18 +101,30 @@ TRANSLATIONS = {
         "backups_header": "LIST OF BACKUPS",
         "volumes_header": "LIST OF VOLUMES",
         "volumes_tree_header": "VOLUMES TREE VIEW",
+        "unknown": "unknown",
         "floating_ips_header": "LIST OF FLOATING IPs",
         "containers_header": "LIST OF CONTAINERS",
+        "all_projects_header": "INVENTORY OF ALL PROJECTS",
+        "project_resources_header": "RESOURCES OF PROJECT {} ({})",
+        "project_names_unavailable": "⚠️ Project names unavailable ({}): showing IDs.",
+        "project_column": "Project",
+        "instance_count": "Instances",
+        "volume_count": "Volumes",
+        "snapshot_count": "Snapshots",
+        "backup_count": "Backups",
+        "floating_ip_count": "Floating IPs",
+        "image_count": "Images",
+        "volume_size_column": "Volumes (size)",
     },
 }
 
 console = Console()
 
 
-def get_project_details(conn, project_id):
+def get_project_details(inventory, project_id):
     lang = get_language_preference()
     print_header(TRANSLATIONS[lang]["project_details"].format(project_id))
-    project = conn.identity.get_project(project_id)
+    project = inventory.project(project_id)
 
     if project:
         print(TRANSLATIONS[lang]["project_id"].format(project.id))
@@ -109,11 +137,11 @@ def get_project_details(conn, project_id):
         print(f"[bold red]{TRANSLATIONS[lang]['no_project'].format(project_id)}[/bold red]")
 
 
-def list_images(conn):
+def list_images(inventory):
     lang = get_language_preference()
     print_header(TRANSLATIONS[lang]["images_header"])
-    private_images = list(conn.image.images(visibility="private"))
-    shared_images = list(conn.image.images(visibility="shared"))
+    private_images = inventory.images(visibility="private")
+    shared_images = inventory.images(visibility="shared")
     all_images = private_images + shared_images
 
     if not all_images:
@@ -129,10 +157,10 @@ def list_images(conn):
     console.print(table)
 
 
-def list_instances(conn):
+def list_instances(inventory):
     lang = get_language_preference()
     print_header(TRANSLATIONS[lang]["instances_header"])
-    instances = list(conn.compute.servers())
+    instances = inventory.servers()
 
     if not instances:
         print(TRANSLATIONS[lang]["no_instances"])
@@ -143,8 +171,9 @@ def list_instances(conn):
     table.add_column("Nom", style="cyan")
     table.add_column("Flavor ID", style="green")
     table.add_column("Uptime", justify="right")
+    catalogue = inventory.flavor_catalogue()
     for instance in instances:
-        flavor_id = instance.flavor["id"]
+        flavor_id = catalogue.id_of(instance.flavor) or TRANSLATIONS[lang]["unknown"]
         created_at = datetime.strptime(instance.created_at, "%Y-%m-%dT%H:%M:%SZ")
         uptime = datetime.now() - created_at
         uptime_str = str(uptime).split(".")[0]
@@ -152,10 +181,10 @@ def list_instances(conn):
     console.print(table)
 
 
-def list_snapshots(conn):
+def list_snapshots(inventory):
     lang = get_language_preference()
     print_header(TRANSLATIONS[lang]["snapshots_header"])
-    snapshots = list(conn.block_storage.snapshots())
+    snapshots = inventory.snapshots()
 
     if not snapshots:
         print(TRANSLATIONS[lang]["no_snapshots"])
@@ -170,10 +199,10 @@ def list_snapshots(conn):
     console.print(table)
 
 
-def list_backups(conn):
+def list_backups(inventory):
     lang = get_language_preference()
     print_header(TRANSLATIONS[lang]["backups_header"])
-    backups = list(conn.block_storage.backups())
+    backups = inventory.backups()
 
     if not backups:
         print(TRANSLATIONS[lang]["no_backups"])
@@ -188,10 +217,10 @@ def list_backups(conn):
     console.print(table)
 
 
-def list_volumes(conn):
+def list_volumes(inventory):
     lang = get_language_preference()
     print_header(TRANSLATIONS[lang]["volumes_header"])
-    volumes = list(conn.block_storage.volumes())
+    volumes = inventory.volumes()
 
     if not volumes:
         print(TRANSLATIONS[lang]["no_volumes"])
@@ -218,29 +247,18 @@ def list_volumes(conn):
     console.print(table)
 
 
-def mounted_volumes(conn):
-    instances = conn.compute.servers()
-    volumes = conn.block_storage.volumes()
-    instance_volumes = {}
-
-    for volume in volumes:
-        if volume.attachments:
-            for attachment in volume.attachments:
-                instance_id = attachment["server_id"]
-                if instance_id not in instance_volumes:
-                    instance_volumes[instance_id] = []
-                instance_volumes[instance_id].append(volume)
-
-    tree = {}
-    for instance in instances:
-        instance_id = instance.id
-        instance_name = instance.name
-        if instance_id in instance_volumes:
-            tree[instance_name] = [volume.name for volume in instance_volumes[instance_id]]
-        else:
-            tree[instance_name] = []
+def mounted_volumes(inventory):
+    """
+    Arborescence instance → volumes montés, tirée de l'index des attachements de l'inventaire.
 
-    return tree
+    Args:
+        inventory (InventorySnapshot): Inventaire figé du rapport
+    """
+    instance_volumes = inventory.volumes_by_server()
+    return {
+        instance.name: [volume.name for volume in instance_volumes.get(instance.id, [])]
+        for instance in inventory.servers()
+    }
 
 
 def print_tree(tree_data):
@@ -256,10 +274,10 @@ def print_tree(tree_data):
     console.print(tree)
 
 
-def list_floating_ips(conn):
+def list_floating_ips(inventory):
     lang = get_language_preference()
     print_header(TRANSLATIONS[lang]["floating_ips_header"])
-    floating_ips = list(conn.network.ips())
+    floating_ips = inventory.floating_ips()
 
     if not floating_ips:
         print(TRANSLATIONS[lang]["no_floating_ips"])
@@ -274,10 +292,10 @@ def list_floating_ips(conn):
     console.print(table)
 
 
-def list_containers(conn):
+def list_containers(inventory):
     lang = get_language_preference()
     print_header(TRANSLATIONS[lang]["containers_header"])
-    containers = list(conn.object_store.containers())
+    containers = inventory.containers()
 
     if not containers:
         print(TRANSLATIONS[lang]["no_containers"])
@@ -292,31 +310,27 @@ def list_containers(conn):
     console.print(table)
 
 
-def process_resource_parallel(resource_type, resource, conn):
+def process_resource_parallel(resource_type, resource, catalogue):
     """
-    Traite une ressource OpenStack de manière parallèle.
+    Met en forme une ressource OpenStack, sans appel API.
 
     Args:
-        resource_type (str): Type de ressource ("instance", "volume", "image")
+        resource_type (str): Type de ressource ("instance", "volume", "image", "snapshot", "backup", "floating_ip")
         resource (obj): Objet ressource OpenStack
-        conn (Connection): Connexion OpenStack
+        catalogue (FlavorCatalogue): Catalogue des flavors de l'inventaire
 
     Returns:
         dict: Informations formatées sur la ressource ou None si erreur
 
     Examples:
-        >>> with ThreadPoolExecutor(max_workers=10) as executor:
-        ...     future = executor.submit(process_resource_parallel,
-        ...         "instance", instance, conn)
-        ...     result = future.result()
+        >>> result = process_resource_parallel("instance", instance, inventory.flavor_catalogue())
         >>> if result:
         ...     print(f"Name: {result['name']}, Type: {result['type']}")
     """
     lang = get_language_preference()
     try:
         if resource_type == "instance":
-            flavor = conn.compute.find_flavor(resource.flavor["id"])
-            flavor_name = flavor.name if flavor else TRANSLATIONS[lang]["unknown"]
+            flavor_name = catalogue.name_of(resource.flavor) or TRANSLATIONS[lang]["unknown"]
             created_at = datetime.strptime(resource.created_at, "%Y-%m-%dT%H:%M:%SZ")
             uptime = datetime.now() - created_at
             return {
@@ -341,14 +355,29 @@ def process_resource_parallel(resource_type, resource, conn):
                 "type": "Image",
                 "details": f"Size: {size}, Status: {resource.status}",
             }
+        elif resource_type in ("snapshot", "backup"):
+            size = format_size(resource.size * 1024 * 1024 * 1024)
+            return {
+                "id": resource.id,
+                "name": resource.name,
+                "type": resource_type.capitalize(),
+                "details": f"Size: {size}, Volume: {resource.volume_id}, Status: {resource.status}",
+            }
+        elif resource_type == "floating_ip":
+            return {
+                "id": resource.id,
+                "name": resource.floating_ip_address,
+                "type": "Floating IP",
+                "details": f"Port: {resource.port_id or TRANSLATIONS[lang]['none']}, Status: {resource.status}",
+            }
     except Exception as e:
         print(f"[red]Erreur lors du traitement de la ressource {resource.id}: {str(e)}[/red]")
         return None
 
 
-def list_all_resources(conn):
+def list_all_resources(inventory):
     """
-    Liste toutes les ressources OpenStack avec parallélisation.
+    Liste toutes les ressources OpenStack ; les flavors sont résolus par le catalogue de l'inventaire.
 
     Cette fonction collecte et affiche de manière efficace :
     - Les instances
@@ -356,11 +385,11 @@ def list_all_resources(conn):
     - Les images
 
     Args:
-        conn (Connection): Connexion OpenStack
+        inventory (Inventory): Inventaire du projet
 
     Examples:
         >>> conn = connection.Connection(**creds)
-        >>> list_all_resources(conn)
+        >>> list_all_resources(Inventory(conn))
         ==========================================
                   LISTE DES RESSOURCES
         ==========================================
@@ -375,9 +404,11 @@ def list_all_resources(conn):
     resources_to_process = []
 
     # Collecte des ressources
-    instances = list(conn.compute.servers())
-    volumes = list(conn.block_storage.volumes())
-    images = list(conn.image.images())
+    instances = inventory.servers()
+    volumes = inventory.volumes()
+    images = inventory.images()
+    # Catalogue des flavors chargé une seule fois : aucun appel API par instance
+    catalogue = inventory.flavor_catalogue()
 
     for instance in instances:
         resources_to_process.append(("instance", instance))
@@ -386,21 +417,12 @@ def list_all_resources(conn):
     for image in images:
         resources_to_process.append(("image", image))
 
-    # Traitement parallèle des ressources
+    # Mise en forme locale : plus d'appel API, donc plus besoin de pool de threads
     processed_resources = []
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        futures = [
-            executor.submit(process_resource_parallel, res_type, resource, conn)
-            for res_type, resource in resources_to_process
-        ]
-
-        for future in as_completed(futures):
-            try:
-                result = future.result()
-                if result:
-                    processed_resources.append(result)
-            except Exception as e:
-                print(f"[red]Erreur lors du traitement d'une ressource : {str(e)}[/red]")
+    for res_type, resource in resources_to_process:
+        result = process_resource_parallel(res_type, resource, catalogue)
+        if result:
+            processed_resources.append(result)
 
     # Affichage des résultats
     table = Table(title="")
@@ -416,7 +438,150 @@ def list_all_resources(conn):
     console.print(table)
 
 
+# Collections de tous les projets, une liste paginée par service, avec leur type pour ``process_resource_parallel``
+SWEEP_COLLECTIONS = {
+    "instance": lambda inventory: inventory.servers(all_projects=True),
+    "volume": lambda inventory: inventory.volumes(all_projects=True),
+    "snapshot": lambda inventory: inventory.snapshots(all_projects=True),
+    "backup": lambda inventory: inventory.backups(all_projects=True),
+    "floating_ip": lambda inventory: inventory.floating_ips(all_projects=True),
+    "image": lambda inventory: inventory.images(),
+}
+
+
+def resource_project(resource):
+    """ID du projet propriétaire d'une ressource (``owner`` pour les images)."""
+    return getattr(resource, "project_id", None) or getattr(resource, "owner", None) or ""
+
+
+def sweep_all_projects(inventory):
+    """
+    Liste les ressources de tous les projets, puis les range par projet en mémoire.
+
+    Chaque collection est demandée une seule fois pour tous les projets (en
+    parallèle, paginée) : quelques appels API au lieu de plusieurs par projet.
+
+    Args:
+        inventory (InventorySnapshot): Inventaire du rapport
+
+    Returns:
+        dict: {ID de projet: {type: [ressources]}}
+
+    Raises:
+        StaleInventoryError: Avec l'inventaire local, qui ne contient qu'un projet
+    """
+    with ThreadPoolExecutor(max_workers=len(SWEEP_COLLECTIONS)) as executor:
+        futures = {kind: executor.submit(fetch, inventory) for kind, fetch in SWEEP_COLLECTIONS.items()}
+        collections = {kind: future.result() for kind, future in futures.items()}
+
+    grouped = {}
+    for kind, resources in collections.items():
+        for resource in resources:
+            grouped.setdefault(resource_project(resource), {}).setdefault(kind, []).append(resource)
+    return grouped
+
+
+def run_admin_sweep(inventory):
+    """
+    Affiche les ressources de tous les projets, regroupées par projet (droits administrateur requis).
+
+    Args:
+        inventory (Inventory): Inventaire avec accès à tous les projets
+    """
+    lang = get_language_preference()
+    inventory = InventorySnapshot(inventory)
+    print_header(TRANSLATIONS[lang]["all_projects_header"])
+
+    grouped = sweep_all_projects(inventory)
+    try:
+        names = {project.id: project.name for project in inventory.projects()}
+    except Exception as e:
+        # Lister les projets demande des droits Keystone que le balayage n'exige pas
+        print(f"[bold yellow]{TRANSLATIONS[lang]['project_names_unavailable'].format(e)}[/bold yellow]")
+        names = {}
+    catalogue = inventory.flavor_catalogue()
+    project_ids = sorted(grouped, key=lambda project_id: (names.get(project_id, project_id), project_id))
+
+    overview = Table(title="")
+    overview.add_column(TRANSLATIONS[lang]["project_column"], style="cyan")
+    overview.add_column("ID", style="magenta")
+    for kind in SWEEP_COLLECTIONS:
+        overview.add_column(TRANSLATIONS[lang][f"{kind}_count"], justify="right")
+    overview.add_column(TRANSLATIONS[lang]["volume_size_column"], justify="right", style="green")
+    for project_id in project_ids:
+        resources = grouped[project_id]
+        volume_gb = sum(volume.size or 0 for volume in resources.get("volume", []))
+        overview.add_row(
+            names.get(project_id, TRANSLATIONS[lang]["unknown"]),
+            project_id or TRANSLATIONS[lang]["unknown"],
+            *(str(len(resources.get(kind, []))) for kind in SWEEP_COLLECTIONS),
+            format_size(volume_gb * 1024 * 1024 * 1024),
+        )
+    console.print(overview)
+
+    for project_id in project_ids:
+        print_header(
+            TRANSLATIONS[lang]["project_resources_header"].format(names.get(project_id, project_id), project_id)
+        )
+        table = Table(title="")
+        table.add_column("Type", style="cyan")
+        table.add_column("ID", style="magenta")
+        table.add_column(TRANSLATIONS[lang]["name_column"], style="green")
+        table.add_column(TRANSLATIONS[lang]["details_column"], style="white")
+        for kind, resources in grouped[project_id].items():
+            for resource in resources:
+                result = process_resource_parallel(kind, resource, catalogue)
+                if result:
+                    table.add_row(result["type"], result["id"], result["name"], result["details"])
+        console.print(table)
+
+
+def run_admin(inventory, project_id):
+    """
+    Affiche les détails d'un projet et toutes ses ressources.
+
+    Args:
+        inventory (Inventory): Inventaire du projet (API ou inventaire local)
+        project_id (str): ID du projet
+    """
+    lang = get_language_preference()
+    # Un seul état de l'inventaire pour toutes les sections
+    inventory = InventorySnapshot(inventory)
+    get_project_details(inventory, project_id)
+
+    # Lister les ressources
+    list_images(inventory)
+    list_instances(inventory)
+    list_snapshots(inventory)
+    list_backups(inventory)
+    list_volumes(inventory)
+    print_header(TRANSLATIONS[lang]["volumes_tree_header"])
+    tree = mounted_volumes(inventory)
+    print_tree(tree)
+    list_floating_ips(inventory)
+    list_containers(inventory)
+    list_all_resources(inventory)
+
+
 def main():
+    parser = argparse.ArgumentParser(description="OpenStack Admin")
+    parser.add_argument(
+        "--from-cache",
+        action="store_true",
+        help="Lit l'inventaire local écrit par le collecteur de métriques, sans appel API",
+    )
+    parser.add_argument(
+        "--all-projects",
+        action="store_true",
+        help="Inventaire de tous les projets, regroupé par projet (droits administrateur requis)",
+    )
+    parser.add_argument(
+        "--max-age",
+        type=float,
+        help="Âge maximal accepté de l'inventaire local, en secondes (réglage inventory_max_age par défaut)",
+    )
+    args = parser.parse_args()
+
     lang = get_language_preference()
     version = get_version()
     print(f"[yellow bold]{TRANSLATIONS[lang]['welcome'].format(version)}[/yellow bold]")
@@ -438,34 +603,39 @@ def main():
 
     print(header)
 
+    if args.from_cache:
+        try:
+            if args.all_projects:
+                run_admin_sweep(open_stored_inventory(args.max_age))
+                return
+            project_id = input(TRANSLATIONS[lang]["enter_project_id"])
+            run_admin(open_stored_inventory(args.max_age), project_id)
+        except StaleInventoryError as e:
+            print(f"[bold red]{TRANSLATIONS[lang]['cache_stale'].format(e)}[/bold red]")
+        return
+
     # Test des credentials
     creds, missing_vars = load_openstack_credentials()
     if not creds:
         print(f"[bold red]{TRANSLATIONS[lang]['connection_error']}[/bold red]")
         return
 
+    # Import différé : openstacksdk est long à charger et inutile avant ce point
+    from openstack import connection
+
     conn = connection.Connection(**creds)
     try:
         if not conn.authorize():
             print(f"[bold red]{TRANSLATIONS[lang]['auth_error']}[/bold red]")
             return
 
+        if args.all_projects:
+            run_admin_sweep(Inventory(conn))
+            return
+
         # Demander à l'utilisateur de saisir l'ID du projet
         project_id = input(TRANSLATIONS[lang]["enter_project_id"])
-        get_project_details(conn, project_id)
-
-        # Lister les ressources
-        list_images(conn)
-        list_instances(conn)
-        list_snapshots(conn)
-        list_backups(conn)
-        list_volumes(conn)
-        print_header(TRANSLATIONS[lang]["volumes_tree_header"])
-        tree = mounted_volumes(conn)
-        print_tree(tree)
-        list_floating_ips(conn)
-        list_containers(conn)
-        list_all_resources(conn)
+        run_admin(Inventory(conn), project_id)
     finally:
         conn.close()
 
@@ -1,16 +1,18 @@
 #!/usr/bin/env python3
 
+import argparse
+import atexit
 import logging
 import os
 import re
-import sys
+import threading
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
-from wsgiref.simple_server import make_server
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIServer, make_server
 
 import requests
-from openstack import connection
 from prometheus_client import (
     CollectorRegistry,
     Counter,
@@ -18,9 +20,14 @@ from prometheus_client import (
     Histogram,
     make_wsgi_app,
 )
-from pythonjsonlogger import jsonlogger
 
-from .config import get_language_preference, load_openstack_credentials
+from .config import get_language_preference, load_openstack_credentials, settings
+from .flavors import FlavorCatalogueCache
+from .history import open_history_store
+from .inventory import InventoryStore
+from .logger import setup_async_logger
+from .scheduler import create_scheduler, scheduler_job_duration, scheduler_job_failures, scheduler_job_last_success
+from .usage import GNOCCHI_URLS
 
 # Dictionnaire des traductions
 TRANSLATIONS = {
@@ -41,6 +48,10 @@ TRANSLATIONS = {
         "floating_ips_success": "✅ IP flottantes récupérées avec succès",
         "containers_error": "❌ Erreur lors de la récupération des containers",
         "containers_success": "✅ Containers récupérées avec succès",
+        "flavors_error": "❌ Erreur lors de la récupération des flavors",
+        "flavors_success": "✅ Flavors récupérés avec succès",
+        "inventory_store_error": "❌ Erreur lors de l'enregistrement de l'inventaire local pour le projet {}",
+        "history_error": "❌ Erreur lors de l'enregistrement de l'historique pour le projet {}",
         "no_project_vars": "⚠️ Aucun projet trouvé dans les variables d'environnement avec suffixe _PROJECT.",
         "missing_env_var": "⚠️ Variable d'environnement manquante : {}",
         "single_project": "ℹ️ 1 seul projet détecté",
@@ -81,14 +92,13 @@ TRANSLATIONS = {
         "object_storage_metrics_desc": "Métriques du service de stockage d'objets OpenStack",
         "quota_metrics_desc": "Quotas de ressources OpenStack par projet",
         "gnocchi_metrics_desc": "Métriques Gnocchi par ressource",
+        "gnocchi_timestamp_desc": "Horodatage Unix du dernier point Gnocchi exporté par ressource",
         "exporter_uptime_desc": "Temps de fonctionnement de l'exporteur en secondes",
         "exporter_errors_desc": "Nombre total d'erreurs de l'exporteur",
         "exporter_scrape_desc": "Durée de la collecte des métriques en secondes",
-        "log_format": "%(asctime)s %(levelname)s %(name)s %(message)s",
-        "console_log_format": "%(asctime)s %(levelname)s: %(message)s",
+        "exporter_coalesced_desc": "Nombre de scrapes servis par une collecte déjà en cours ou récente",
         "log_file": "openstack-metrics.log",
         "unknown": "inconnu",
-        "date_format": "%H:%M:%S",
         "metric_name": "nom",
         "metric_description": "description",
         "metric_domain_id": "domaine_id",
@@ -112,6 +122,10 @@ TRANSLATIONS = {
         "floating_ips_success": "✅ Floating IPs retrieved successfully",
         "containers_error": "❌ Error retrieving containers",
         "containers_success": "✅ Containers retrieved successfully",
+        "flavors_error": "❌ Error retrieving flavors",
+        "flavors_success": "✅ Flavors retrieved successfully",
+        "inventory_store_error": "❌ Error saving the local inventory for project {}",
+        "history_error": "❌ Error saving the history for project {}",
         "no_project_vars": "⚠️ No projects found in environment variables with _PROJECT suffix.",
         "missing_env_var": "⚠️ Missing environment variable: {}",
         "single_project": "ℹ️ 1 single project detected",
@@ -152,14 +166,13 @@ TRANSLATIONS = {
         "object_storage_metrics_desc": "Metrics for OpenStack Object Storage service",
         "quota_metrics_desc": "OpenStack resource quotas per project",
         "gnocchi_metrics_desc": "Gnocchi metrics per resource",
+        "gnocchi_timestamp_desc": "Unix timestamp of the last exported Gnocchi point per resource",
         "exporter_uptime_desc": "Exporter uptime in seconds",
         "exporter_errors_desc": "Total number of exporter errors",
         "exporter_scrape_desc": "Duration of exporter scrape in seconds",
-        "log_format": "%(asctime)s %(levelname)s %(name)s %(message)s",
-        "console_log_format": "%(asctime)s %(levelname)s: %(message)s",
+        "exporter_coalesced_desc": "Number of scrapes served by an in-flight or recent collection",
         "log_file": "openstack-metrics.log",
         "unknown": "unknown",
-        "date_format": "%H:%M:%S",
         "metric_name": "name",
         "metric_description": "description",
         "metric_domain_id": "domain_id",
@@ -168,26 +181,34 @@ TRANSLATIONS = {
     },
 }
 
-# --- Logging configuration ---
-logger = logging.getLogger()
-logger.setLevel(logging.DEBUG)
 
-# Handler fichier JSON
+# --- Logging configuration ---
+# Les handlers sont installés par configure_logging() depuis main() : importer le module n'ouvre aucun fichier
+logger = logging.getLogger("openstack_metrics_collector")
 lang = get_language_preference()
-json_handler = logging.FileHandler(TRANSLATIONS[lang]["log_file"])
-json_handler.setLevel(logging.DEBUG)
-json_formatter = jsonlogger.JsonFormatter(TRANSLATIONS[lang]["log_format"])
-json_handler.setFormatter(json_formatter)
-logger.addHandler(json_handler)
-
-# Handler console simple
-console_handler = logging.StreamHandler(sys.stdout)
-console_handler.setLevel(logging.INFO)
-console_formatter = logging.Formatter(
-    TRANSLATIONS[lang]["console_log_format"], datefmt=TRANSLATIONS[lang]["date_format"]
-)
-console_handler.setFormatter(console_formatter)
-logger.addHandler(console_handler)
+
+
+def configure_logging():
+    """
+    Installe les logs asynchrones du collecteur (console + fichier JSON avec rotation).
+
+    Les logs sont écrits par un thread dédié : les threads de collecte ne font
+    qu'empiler les messages.
+
+    Returns:
+        QueueListener: Thread d'écriture des logs, arrêté automatiquement à la sortie
+    """
+    lang = get_language_preference()
+    _, log_listener = setup_async_logger(
+        "openstack_metrics_collector",
+        log_level=settings.get("log_level"),
+        log_file=TRANSLATIONS[lang]["log_file"],
+        json_format=True,
+        rate_limit=settings.get("log_rate_limit"),
+        rate_interval=settings.get("log_rate_interval"),
+    )
+    atexit.register(log_listener.stop)
+    return log_listener
 
 
 # Fonction utilitaire pour nettoyer les labels Prometheus
@@ -217,14 +238,14 @@ def clean_label_value(value):
 
 
 # Fonction pour Identity
-def get_identity_metrics(conn, project_id):
+def get_identity(conn, project_id):
     lang = get_language_preference()
     identity = conn.identity.get_project(project_id)
     if identity is None:
-        logging.error(TRANSLATIONS[lang]["no_identity"])
+        logger.error(TRANSLATIONS[lang]["no_identity"])
         return None
-    logging.info(TRANSLATIONS[lang]["identity_success"])
-    return identity.id
+    logger.info(TRANSLATIONS[lang]["identity_success"])
+    return identity
 
 
 # Fonction pour Compute
@@ -233,11 +254,11 @@ def list_instances(conn):
     try:
         instances = list(conn.compute.servers())
     except Exception:
-        logging.exception(TRANSLATIONS[lang]["instances_error"])
+        logger.exception(TRANSLATIONS[lang]["instances_error"])
         return None
     if not instances:
         return []
-    logging.info(TRANSLATIONS[lang]["instances_success"])
+    logger.info(TRANSLATIONS[lang]["instances_success"])
     return instances
 
 
@@ -245,13 +266,13 @@ def list_instances(conn):
 def list_images(conn):
     lang = get_language_preference()
     try:
-        images = list(conn.compute.images())
+        images = list(conn.image.images())
     except Exception:
-        logging.exception(TRANSLATIONS[lang]["images_error"])
+        logger.exception(TRANSLATIONS[lang]["images_error"])
         return None
     if not images:
         return []
-    logging.info(TRANSLATIONS[lang]["images_success"])
+    logger.info(TRANSLATIONS[lang]["images_success"])
     return images
 
 
@@ -261,11 +282,11 @@ def list_snapshots(conn):
     try:
         snapshots = list(conn.block_storage.snapshots())
     except Exception:
-        logging.exception(TRANSLATIONS[lang]["snapshots_error"])
+        logger.exception(TRANSLATIONS[lang]["snapshots_error"])
         return None
     if not snapshots:
         return []
-    logging.info(TRANSLATIONS[lang]["snapshots_success"])
+    logger.info(TRANSLATIONS[lang]["snapshots_success"])
     return snapshots
 
 
@@ -274,11 +295,11 @@ def list_backups(conn):
     try:
         backups = list(conn.block_storage.backups())
     except Exception:
-        logging.exception(TRANSLATIONS[lang]["backups_error"])
+        logger.exception(TRANSLATIONS[lang]["backups_error"])
         return None
     if not backups:
         return []
-    logging.info(TRANSLATIONS[lang]["backups_success"])
+    logger.info(TRANSLATIONS[lang]["backups_success"])
     return backups
 
 
@@ -287,24 +308,37 @@ def list_volumes(conn):
     try:
         volumes = list(conn.block_storage.volumes())
     except Exception:
-        logging.exception(TRANSLATIONS[lang]["volumes_error"])
+        logger.exception(TRANSLATIONS[lang]["volumes_error"])
         return None
     if not volumes:
         return []
-    logging.info(TRANSLATIONS[lang]["volumes_success"])
+    logger.info(TRANSLATIONS[lang]["volumes_success"])
     return volumes
 
 
+def list_flavors(conn):
+    lang = get_language_preference()
+    try:
+        flavors = list(conn.compute.flavors())
+    except Exception:
+        logger.exception(TRANSLATIONS[lang]["flavors_error"])
+        return None
+    if not flavors:
+        return []
+    logger.info(TRANSLATIONS[lang]["flavors_success"])
+    return flavors
+
+
 def list_floating_ips(conn):
     lang = get_language_preference()
     try:
         floating_ips = list(conn.network.ips())
     except Exception:
-        logging.exception(TRANSLATIONS[lang]["floating_ips_error"])
+        logger.exception(TRANSLATIONS[lang]["floating_ips_error"])
         return None
     if not floating_ips:
         return []
-    logging.info(TRANSLATIONS[lang]["floating_ips_success"])
+    logger.info(TRANSLATIONS[lang]["floating_ips_success"])
     return floating_ips
 
 
@@ -313,11 +347,11 @@ def list_containers(conn):
     try:
         containers = list(conn.object_store.containers())
     except Exception:
-        logging.exception(TRANSLATIONS[lang]["containers_error"])
+        logger.exception(TRANSLATIONS[lang]["containers_error"])
         return None
     if not containers:
         return []
-    logging.info(TRANSLATIONS[lang]["containers_success"])
+    logger.info(TRANSLATIONS[lang]["containers_success"])
     return containers
 
 
@@ -372,57 +406,256 @@ def update_metrics(metric, project_name, label_name, label_value):
     label_value_clean = clean_label_value(label_value)
     # Vérifier si la valeur du label est vide
     if label_value_clean == "":
-        logging.warning(TRANSLATIONS[lang]["invalid_metric_id"].format(metric._name, label_value))
+        logger.warning(TRANSLATIONS[lang]["invalid_metric_id"].format(metric._name, label_value))
         return
     try:
         metric.labels(project_name=project_name, **{label_name: label_value_clean}).set(1)
     except Exception:
-        logging.exception(TRANSLATIONS[lang]["metric_update_error"].format(metric._name, label_name, label_value_clean))
+        logger.exception(TRANSLATIONS[lang]["metric_update_error"].format(metric._name, label_name, label_value_clean))
 
 
-# Gauge Prometheus
+# Gauge Prometheus (non enregistrées dans le registre global : main() les expose via CustomCollector)
 identity_metrics = Gauge(
     "openstack_identity_metrics",
     TRANSLATIONS[lang]["identity_metrics_desc"],
     ["project_name", "identity_id"],
+    registry=None,
 )
 compute_metrics = Gauge(
     "openstack_compute_metrics",
     TRANSLATIONS[lang]["compute_metrics_desc"],
     ["project_name", "instance_id", "flavor_id"],
+    registry=None,
 )
 image_metrics = Gauge(
     "openstack_image_metrics",
     TRANSLATIONS[lang]["image_metrics_desc"],
     ["project_name", "image_id"],
+    registry=None,
 )
 block_storage_metrics = Gauge(
     "openstack_block_storage_metrics",
     TRANSLATIONS[lang]["block_storage_metrics_desc"],
     ["project_name", "volume_id"],
+    registry=None,
 )
 network_metrics = Gauge(
     "openstack_network_metrics",
     TRANSLATIONS[lang]["network_metrics_desc"],
     ["project_name", "network_id"],
+    registry=None,
 )
 object_storage_metrics = Gauge(
     "openstack_object_storage_metrics",
     TRANSLATIONS[lang]["object_storage_metrics_desc"],
     ["project_name", "container_id"],
+    registry=None,
 )
 quota_metrics = Gauge(
     "openstack_quota_metrics",
     TRANSLATIONS[lang]["quota_metrics_desc"],
     ["project_name", "resource"],
+    registry=None,
 )
 gnocchi_metrics = Gauge(
     "openstack_gnocchi_metric",
     TRANSLATIONS[lang]["gnocchi_metrics_desc"],
     ["project_name", "resource_id", "metric_name"],
+    registry=None,
+)
+gnocchi_metrics_timestamp = Gauge(
+    "openstack_gnocchi_metric_timestamp_seconds",
+    TRANSLATIONS[lang]["gnocchi_timestamp_desc"],
+    ["project_name", "resource_id", "metric_name"],
+    registry=None,
 )
 
 
+def parse_measure_timestamp(value):
+    """
+    Convertit l'horodatage d'une mesure Gnocchi en datetime UTC.
+
+    Args:
+        value (str): Horodatage ISO 8601 renvoyé par Gnocchi
+
+    Returns:
+        datetime: Horodatage avec timezone, ou None s'il est invalide
+
+    Examples:
+        >>> parse_measure_timestamp("2024-03-15T10:05:00+00:00")
+        datetime.datetime(2024, 3, 15, 10, 5, tzinfo=datetime.timezone.utc)
+    """
+    try:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+class MeasureCursor:
+    """
+    Mémorise le dernier point vu pour chaque métrique Gnocchi entre deux cycles.
+
+    Au cycle suivant, seules les mesures plus récentes que ce point sont demandées.
+    Si une métrique ne renvoie aucun nouveau point, la dernière valeur connue est
+    conservée avec son horodatage.
+
+    Args:
+        max_age_seconds (int): Durée après laquelle une métrique sans nouveau point est oubliée
+
+    Examples:
+        >>> cursor = MeasureCursor()
+        >>> cursor.start_for("metric-id-123", "2024-03-15T10:00:00+00:00")
+        '2024-03-15T10:00:00+00:00'
+        >>> cursor.update("metric-id-123", [["2024-03-15T10:05:00+00:00", 300.0, 42.0]])
+        (datetime.datetime(2024, 3, 15, 10, 5, tzinfo=datetime.timezone.utc), 42.0)
+        >>> cursor.start_for("metric-id-123", "2024-03-15T10:01:00+00:00")
+        '2024-03-15T10:05:00+00:00'
+    """
+
+    def __init__(self, max_age_seconds=86400):
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._last = {}
+
+    def start_for(self, metric_id, default_start_iso):
+        """
+        Retourne la date de début à demander pour une métrique.
+
+        Args:
+            metric_id (str): ID de la métrique
+            default_start_iso (str): Début de la fenêtre par défaut au format ISO 8601
+
+        Returns:
+            str: Horodatage du dernier point vu s'il est plus récent, sinon la valeur par défaut
+        """
+        with self._lock:
+            last = self._last.get(metric_id)
+        default_start = parse_measure_timestamp(default_start_iso)
+        if last is None or default_start is None or last[0] <= default_start:
+            return default_start_iso
+        return last[0].astimezone(timezone.utc).isoformat()
+
+    def update(self, metric_id, measures):
+        """
+        Intègre les mesures reçues et retourne le dernier point connu.
+
+        Args:
+            metric_id (str): ID de la métrique
+            measures (list): Mesures Gnocchi [(timestamp, granularity, value), ...]
+
+        Returns:
+            tuple: (timestamp, value) du dernier point connu, ou None si aucun
+        """
+        with self._lock:
+            last = self._last.get(metric_id)
+            for measure in measures or []:
+                ts = parse_measure_timestamp(measure[0])
+                if ts is None or measure[2] is None:
+                    continue
+                if last is None or ts > last[0]:
+                    last = (ts, measure[2])
+            if last is not None:
+                self._last[metric_id] = last
+            return last
+
+    def prune(self, now=None):
+        """
+        Oublie les métriques dont le dernier point est plus vieux que ``max_age_seconds``.
+
+        Args:
+            now (datetime): Date de référence (maintenant par défaut)
+        """
+        now = now or datetime.now(timezone.utc)
+        limit = now - timedelta(seconds=self.max_age_seconds)
+        with self._lock:
+            for metric_id in [mid for mid, (ts, _) in self._last.items() if ts < limit]:
+                del self._last[metric_id]
+
+
+measure_cursor = MeasureCursor()
+
+
+class ResourceMetricsCache:
+    """
+    Cache en mémoire, avec TTL, des métriques Gnocchi associées à chaque instance.
+
+    La correspondance instance → IDs de métriques ne change quasiment plus après la
+    création de l'instance : elle est donc gardée ``ttl_seconds`` secondes, et
+    invalidée dès que l'instance disparaît de Nova (voir ``retain``).
+
+    Args:
+        ttl_seconds (float): Durée de vie d'une entrée en secondes
+
+    Examples:
+        >>> cache = ResourceMetricsCache(ttl_seconds=3600)
+        >>> cache.set("instance-id-123", [{"id": "metric-id", "name": "cpu"}], scope="my-project")
+        >>> cache.get("instance-id-123")
+        [{'id': 'metric-id', 'name': 'cpu'}]
+        >>> cache.retain(set(), scope="my-project")
+        >>> cache.get("instance-id-123") is None
+        True
+    """
+
+    def __init__(self, ttl_seconds=3600):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, resource_id):
+        """
+        Retourne les métriques en cache d'une ressource.
+
+        Args:
+            resource_id (str): ID de la ressource
+
+        Returns:
+            list: Métriques de la ressource, ou None si absentes ou expirées
+        """
+        with self._lock:
+            entry = self._entries.get(resource_id)
+            if entry is None:
+                return None
+            expires_at, _, metrics = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[resource_id]
+                return None
+            return metrics
+
+    def set(self, resource_id, metrics, scope=None):
+        """
+        Met en cache les métriques d'une ressource.
+
+        Args:
+            resource_id (str): ID de la ressource
+            metrics (list): Métriques renvoyées par Gnocchi
+            scope (str): Projet auquel appartient la ressource
+        """
+        with self._lock:
+            self._entries[resource_id] = (time.monotonic() + self.ttl_seconds, scope, metrics)
+
+    def retain(self, live_ids, scope=None):
+        """
+        Invalide les ressources d'un projet qui n'existent plus dans Nova.
+
+        Args:
+            live_ids (set): IDs des instances actuellement listées par Nova
+            scope (str): Projet concerné
+        """
+        with self._lock:
+            stale = [rid for rid, (_, s, _) in self._entries.items() if s == scope and rid not in live_ids]
+            for rid in stale:
+                del self._entries[rid]
+
+
+resource_metrics_cache = ResourceMetricsCache(settings.get("gnocchi_metrics_cache_ttl"))
+
+# Catalogue des flavors de chaque projet, relisté au plus une fois par ``flavor_catalogue_ttl``
+flavor_catalogues = FlavorCatalogueCache(settings.get("flavor_catalogue_ttl"))
+
+
 # Classe GnocchiAPI pour interagir avec l'API REST Gnocchi
 class GnocchiAPI:
     """
@@ -464,7 +697,7 @@ class GnocchiAPI:
         """
         lang = get_language_preference()
         url = f"{self.gnocchi_url}/v1/resource/{resource_type}"
-        resp = requests.get(url, headers=self.headers, timeout=30)
+        resp = requests.get(url, headers=self.headers, timeout=settings.get("http_timeout"))
         if resp.status_code != 200:
             logger.error(TRANSLATIONS[lang]["resources_error"].format(resp.status_code, resp.text))
             return []
@@ -487,7 +720,7 @@ class GnocchiAPI:
         """
         lang = get_language_preference()
         url = f"{self.gnocchi_url}/v1/resource/instance/{resource_id}/metric"
-        resp = requests.get(url, headers=self.headers, timeout=30)
+        resp = requests.get(url, headers=self.headers, timeout=settings.get("http_timeout"))
         if resp.status_code != 200:
             logger.warning(
                 TRANSLATIONS[lang]["metrics_resource_error"].format(resource_id, resp.status_code, resp.text)
@@ -520,47 +753,67 @@ class GnocchiAPI:
             "start": start_iso,
             "stop": end_iso,
         }
-        resp = requests.get(url, headers=self.headers, params=params, timeout=30)
+        resp = requests.get(url, headers=self.headers, params=params, timeout=settings.get("http_timeout"))
         if resp.status_code != 200:
             logger.warning(TRANSLATIONS[lang]["measures_error"].format(metric_id, resp.status_code, resp.text))
             return []
         return resp.json()
 
 
-def collect_resource_metrics(gnocchi, rid, start_iso, end_iso):
+def collect_resource_metrics(gnocchi, rid, start_iso, end_iso, cursor=None, metrics_cache=None, scope=None):
     """
     Collecte les métriques pour une ressource spécifique.
 
+    Avec un ``cursor``, seules les mesures plus récentes que le dernier point vu
+    sont demandées, et la dernière valeur connue est renvoyée si rien de nouveau
+    n'est disponible. Avec un ``metrics_cache``, la liste des métriques de la
+    ressource n'est redemandée à Gnocchi qu'à l'expiration du cache.
+
     Args:
         gnocchi (GnocchiAPI): Instance du client Gnocchi
         rid (str): ID de la ressource
         start_iso (str): Date de début au format ISO 8601
         end_iso (str): Date de fin au format ISO 8601
+        cursor (MeasureCursor): Dernier point vu par métrique (optionnel)
+        metrics_cache (ResourceMetricsCache): Cache instance → métriques (optionnel)
+        scope (str): Projet de la ressource, pour l'invalidation du cache
 
     Returns:
-        list: Liste de tuples (resource_id, metric_name, value)
+        list: Liste de tuples (resource_id, metric_name, value, timestamp)
 
     Examples:
         >>> metrics = collect_resource_metrics(gnocchi, "instance-id-123",
         ...     "2024-03-15T00:00:00+00:00",
         ...     "2024-03-15T23:59:59+00:00")
-        >>> for rid, name, value in metrics:
+        >>> for rid, name, value, ts in metrics:
         ...     print(f"Resource: {rid}, Metric: {name}, Value: {value}")
     """
-    metrics = gnocchi.get_metrics_for_resource(rid)
+    metrics = metrics_cache.get(rid) if metrics_cache is not None else None
+    if metrics is None:
+        metrics = gnocchi.get_metrics_for_resource(rid)
+        if metrics_cache is not None and metrics:
+            metrics_cache.set(rid, metrics, scope=scope)
     results = []
     for metric in metrics:
         metric_id = metric.get("id")
         metric_name = metric.get("name")
         if not metric_id or not metric_name:
             continue
-        measures = gnocchi.get_measures(metric_id, start_iso, end_iso)
-        if measures:
-            results.append((rid, metric_name, measures[-1][2]))
+        if cursor is None:
+            measures = gnocchi.get_measures(metric_id, start_iso, end_iso)
+            if measures:
+                results.append((rid, metric_name, measures[-1][2], parse_measure_timestamp(measures[-1][0])))
+            continue
+        measures = gnocchi.get_measures(metric_id, cursor.start_for(metric_id, start_iso), end_iso)
+        last = cursor.update(metric_id, measures)
+        if last is not None:
+            results.append((rid, metric_name, last[1], last[0]))
     return results
 
 
-def collect_gnocchi_metrics_parallel(gnocchi, resources, start_iso, end_iso, project_name):
+def collect_gnocchi_metrics_parallel(
+    gnocchi, resources, start_iso, end_iso, project_name, cursor=None, metrics_cache=None
+):
     """
     Collecte les métriques Gnocchi en parallèle pour toutes les ressources.
 
@@ -570,43 +823,135 @@ def collect_gnocchi_metrics_parallel(gnocchi, resources, start_iso, end_iso, pro
         start_iso (str): Date de début au format ISO 8601
         end_iso (str): Date de fin au format ISO 8601
         project_name (str): Nom du projet OpenStack
+        cursor (MeasureCursor): Dernier point vu par métrique (optionnel)
+        metrics_cache (ResourceMetricsCache): Cache instance → métriques (optionnel)
 
     Examples:
         >>> collect_gnocchi_metrics_parallel(gnocchi, resources,
         ...     "2024-03-15T00:00:00+00:00",
         ...     "2024-03-15T23:59:59+00:00",
-        ...     "my-project")
+        ...     "my-project", cursor=measure_cursor,
+        ...     metrics_cache=resource_metrics_cache)
     """
-    with ThreadPoolExecutor(max_workers=10) as executor:
+    with ThreadPoolExecutor(max_workers=settings.get("gnocchi_workers")) as executor:
         futures = []
         for res in resources:
             rid = res.get("id")
             if rid:
-                futures.append(executor.submit(collect_resource_metrics, gnocchi, rid, start_iso, end_iso))
+                futures.append(
+                    executor.submit(
+                        collect_resource_metrics,
+                        gnocchi,
+                        rid,
+                        start_iso,
+                        end_iso,
+                        cursor,
+                        metrics_cache,
+                        project_name,
+                    )
+                )
 
         for future in as_completed(futures):
             try:
                 metrics = future.result()
-                for rid, metric_name, value in metrics:
+                for rid, metric_name, value, timestamp in metrics:
                     if value is not None:
-                        gnocchi_metrics.labels(
-                            project_name=project_name,
-                            resource_id=clean_label_value(rid),
-                            metric_name=clean_label_value(metric_name),
-                        ).set(float(value))
+                        labels = {
+                            "project_name": project_name,
+                            "resource_id": clean_label_value(rid),
+                            "metric_name": clean_label_value(metric_name),
+                        }
+                        gnocchi_metrics.labels(**labels).set(float(value))
+                        if timestamp is not None:
+                            gnocchi_metrics_timestamp.labels(**labels).set(timestamp.timestamp())
             except Exception as e:
                 logger.exception(f"Error collecting Gnocchi metrics: {e}")
                 exporter_errors.inc()
 
 
 # Métriques internes globales
-exporter_uptime = Gauge("exporter_uptime_seconds", TRANSLATIONS[lang]["exporter_uptime_desc"])
-exporter_errors = Counter("exporter_errors_total", TRANSLATIONS[lang]["exporter_errors_desc"])
-exporter_scrape_duration = Histogram("exporter_scrape_duration_seconds", TRANSLATIONS[lang]["exporter_scrape_desc"])
+exporter_uptime = Gauge("exporter_uptime_seconds", TRANSLATIONS[lang]["exporter_uptime_desc"], registry=None)
+exporter_errors = Counter("exporter_errors_total", TRANSLATIONS[lang]["exporter_errors_desc"], registry=None)
+exporter_scrape_duration = Histogram(
+    "exporter_scrape_duration_seconds", TRANSLATIONS[lang]["exporter_scrape_desc"], registry=None
+)
+exporter_scrapes_coalesced = Counter(
+    "exporter_scrapes_coalesced_total", TRANSLATIONS[lang]["exporter_coalesced_desc"], registry=None
+)
 
 start_time = time.time()
 
 
+# Inventaire local partagé avec les commandes de rapport (désactivé si le chemin est vide)
+inventory_store = InventoryStore(settings.get("inventory_store")) if settings.get("inventory_store") else None
+
+
+def save_inventory_snapshot(conn, project_name, collections):
+    """
+    Enregistre l'inventaire d'un projet dans la base locale.
+
+    Complète les collections déjà listées pour les métriques avec celles dont seuls
+    les rapports ont besoin (snapshots, backups). Une collection en échec
+    (None) n'est pas écrite : les rapports gardent la précédente et son âge.
+
+    Args:
+        conn (Connection): Connexion OpenStack du projet
+        project_name (str): Nom du projet
+        collections (dict): Collections déjà listées, par type
+    """
+    lang = get_language_preference()
+    collections = dict(
+        collections,
+        snapshots=list_snapshots(conn),
+        backups=list_backups(conn),
+    )
+    try:
+        for kind, resources in collections.items():
+            if resources is not None:
+                inventory_store.write(project_name, kind, resources)
+    except Exception:
+        exporter_errors.inc()
+        logger.exception(TRANSLATIONS[lang]["inventory_store_error"].format(project_name))
+
+
+# Historique local de l'utilisation (désactivé si le chemin est vide)
+history_store = open_history_store()
+
+
+def usage_values(instances, images, volumes, floating_ips, containers, quotas):
+    """
+    Valeurs d'utilisation d'un projet enregistrées dans l'historique.
+
+    Une collection en échec (None) ne produit pas de valeur, pour ne pas
+    enregistrer un faux zéro.
+
+    Returns:
+        dict: Valeur par nom de métrique
+    """
+
+    def count(resources):
+        return None if resources is None else len(resources)
+
+    def total(resources, attribute):
+        if resources is None:
+            return None
+        return sum(getattr(resource, attribute, None) or 0 for resource in resources)
+
+    values = {
+        "instances": count(instances),
+        "images": count(images),
+        "volumes": count(volumes),
+        "volumes_gb": total(volumes, "size"),
+        "floating_ips": count(floating_ips),
+        "containers": count(containers),
+        "containers_bytes": total(containers, "bytes"),
+    }
+    for resource in ("cores", "ram", "instances"):
+        value = (quotas or {}).get(resource)
+        values[f"quota_{resource}"] = float(value) if value is not None else None
+    return values
+
+
 # Collecter les métrics
 def collect_project_metrics(project_config, conn_cache):
     lang = get_language_preference()
@@ -633,6 +978,8 @@ def collect_project_metrics(project_config, conn_cache):
         if cache_key in conn_cache:
             conn = conn_cache[cache_key]
         else:
+            from openstack import connection
+
             conn = connection.Connection(
                 auth_url=project_config["auth_url"],
                 project_name=project_name,
@@ -654,11 +1001,12 @@ def collect_project_metrics(project_config, conn_cache):
 
     # Récupérer les métriques pour chaque service
     try:
-        identity_id = get_identity_metrics(conn, project_os_id)
+        identity = get_identity(conn, project_os_id)
     except Exception:
         exporter_errors.inc()
         logger.exception(TRANSLATIONS[lang]["identity_metrics_error"].format(project_name))
-        identity_id = None
+        identity = None
+    identity_id = identity.id if identity is not None else None
 
     try:
         instances = list_instances(conn)
@@ -667,10 +1015,15 @@ def collect_project_metrics(project_config, conn_cache):
         logger.exception(TRANSLATIONS[lang]["instances_project_error"].format(project_name))
         instances = None
 
+    # Invalider le cache des métriques Gnocchi pour les instances disparues de Nova
+    if instances is not None:
+        resource_metrics_cache.retain({instance.id for instance in instances}, scope=project_name)
+
     images = None
+    all_images = None
     try:
-        if instances:
-            used_image_ids = {getattr(inst.image, "id", None) for inst in instances if hasattr(inst, "image")}
+        if instances or inventory_store is not None:
+            used_image_ids = {getattr(inst.image, "id", None) for inst in instances or [] if hasattr(inst, "image")}
             all_images = list_images(conn)
             if all_images is not None:
                 images = [img for img in all_images if img.id in used_image_ids]
@@ -701,21 +1054,37 @@ def collect_project_metrics(project_config, conn_cache):
         logger.exception(TRANSLATIONS[lang]["containers_project_error"].format(project_name))
         containers = None
 
+    # Catalogue des flavors : libellé des instances et inventaire local
+    catalogue = None
+    if instances or inventory_store is not None:
+        catalogue = flavor_catalogues.get(project_name, lambda: list_flavors(conn))
+
+    # Inventaire local, relu par les commandes de rapport avec --from-cache
+    if inventory_store is not None:
+        save_inventory_snapshot(
+            conn,
+            project_name,
+            {
+                "projects": [identity] if identity is not None else None,
+                "servers": instances,
+                "images": all_images,
+                "volumes": volumes,
+                "floating_ips": floating_ips,
+                "containers": containers,
+                "flavors": catalogue.flavors if catalogue is not None else None,
+            },
+        )
+
     # Identity
     update_metrics(identity_metrics, project_name, "identity_id", identity_id)
 
     # Compute
     if instances:
         for instance in instances:
-            if instance.flavor:
-                if isinstance(instance.flavor, dict):
-                    flavor_id = instance.flavor.get("id", TRANSLATIONS[lang]["unknown"])
-                elif hasattr(instance.flavor, "id"):
-                    flavor_id = instance.flavor.id
-                else:
-                    flavor_id = TRANSLATIONS[lang]["unknown"]
-            else:
-                flavor_id = TRANSLATIONS[lang]["unknown"]
+            # Nova ≥ 2.47 n'embarque plus que le nom du flavor : le catalogue retrouve son ID
+            flavor_id = catalogue.id_of(instance.flavor) if catalogue is not None else None
+            if flavor_id is None:
+                flavor_id = (instance.flavor or {}).get("id") or TRANSLATIONS[lang]["unknown"]
             compute_metrics.labels(
                 project_name=project_name,
                 instance_id=clean_label_value(instance.id),
@@ -781,14 +1150,20 @@ def collect_project_metrics(project_config, conn_cache):
                     float(value) if value is not None else 0
                 )
 
+    # Historique
+    if history_store is not None:
+        try:
+            history_store.record(
+                project_name, usage_values(instances, all_images, volumes, floating_ips, containers, quotas)
+            )
+        except Exception:
+            exporter_errors.inc()
+            logger.exception(TRANSLATIONS[lang]["history_error"].format(project_name))
+
     # Gnocchi metrics
     try:
         region = os.getenv("OS_REGION_NAME", "").lower()
-        REGION_TO_GNOCCHI_URL = {
-            "dc3-a": "https://api.pub1.infomaniak.cloud/metric",
-            "dc4-a": "https://api.pub2.infomaniak.cloud/metric",
-        }
-        gnocchi_url = REGION_TO_GNOCCHI_URL.get(region)
+        gnocchi_url = GNOCCHI_URLS.get(region)
 
         if not gnocchi_url:
             logger.error(TRANSLATIONS[lang]["gnocchi_endpoint_error"].format(region))
@@ -804,9 +1179,18 @@ def collect_project_metrics(project_config, conn_cache):
         end_iso = end.strftime("%Y-%m-%dT%H:%M:%S+00:00")
 
         resources = gnocchi.get_resources("instance")
-        collect_gnocchi_metrics_parallel(gnocchi, resources, start_iso, end_iso, project_name)
-
-        logging.info(TRANSLATIONS[lang]["metrics_success"])
+        collect_gnocchi_metrics_parallel(
+            gnocchi,
+            resources,
+            start_iso,
+            end_iso,
+            project_name,
+            cursor=measure_cursor,
+            metrics_cache=resource_metrics_cache,
+        )
+        measure_cursor.prune(end)
+
+        logger.info(TRANSLATIONS[lang]["metrics_success"])
     except Exception:
         exporter_errors.inc()
         logger.exception(TRANSLATIONS[lang]["gnocchi_error"].format(project_name))
@@ -846,7 +1230,7 @@ def collect_metrics():
     with exporter_scrape_duration.time():
         projects = get_project_configs()
         conn_cache = {}
-        with ThreadPoolExecutor(max_workers=5) as executor:
+        with ThreadPoolExecutor(max_workers=settings.get("collector_workers")) as executor:
             futures = []
             for project_name, config in projects.items():
                 futures.append(executor.submit(collect_project_metrics, config, conn_cache))
@@ -860,39 +1244,154 @@ def collect_metrics():
         exporter_uptime.set(uptime_seconds)
 
 
+class ScrapeCoalescer:
+    """
+    Regroupe les scrapes concurrents sur une seule collecte en cours (single-flight).
+
+    Le premier scrape lance la collecte ; ceux qui arrivent pendant qu'elle tourne
+    attendent sa fin et réutilisent son résultat. Les scrapes qui arrivent moins de
+    ``window_seconds`` après la fin d'une collecte réutilisent aussi ce résultat.
+    Le résultat est celui retourné par ``func`` à la fin de sa collecte : une
+    collecte suivante, lancée entre-temps, ne le modifie pas.
+
+    Args:
+        func (callable): Fonction de collecte à exécuter, qui retourne son résultat
+        window_seconds (float): Fenêtre de réutilisation du dernier résultat (0 pour la désactiver)
+
+    Examples:
+        >>> coalescer = ScrapeCoalescer(collect_snapshot, window_seconds=10)
+        >>> coalescer.run()  # Lance la collecte
+        (True, [...])
+        >>> coalescer.run()  # Réutilise le résultat de la collecte précédente
+        (False, [...])
+    """
+
+    def __init__(self, func, window_seconds=0.0):
+        self._func = func
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._in_flight = None
+        self._last_completed = None
+        self._last_result = None
+
+    def run(self):
+        """
+        Exécute la collecte ou se greffe sur celle en cours.
+
+        Returns:
+            tuple: (True si cet appel a effectué la collecte, False s'il a été regroupé ;
+                résultat de la dernière collecte terminée)
+        """
+        with self._lock:
+            if self._in_flight is not None:
+                done = self._in_flight
+                leader = False
+            elif self._last_completed is not None and time.monotonic() - self._last_completed < self.window_seconds:
+                return False, self._last_result
+            else:
+                done = self._in_flight = threading.Event()
+                leader = True
+
+        if not leader:
+            done.wait()
+            # Résultat de la collecte attendue (ou de la précédente si elle a échoué)
+            with self._lock:
+                return False, self._last_result
+
+        result = None
+        try:
+            result = self._func()
+        finally:
+            with self._lock:
+                self._last_completed = time.monotonic()
+                if result is not None:
+                    self._last_result = result
+                self._in_flight = None
+            done.set()
+        return True, result
+
+
+def collect_snapshot():
+    """
+    Met à jour les métriques OpenStack et retourne leurs familles telles qu'à la fin de la collecte.
+
+    Les scrapes regroupés servent cette copie au lieu de relire les gauges, qu'une
+    collecte suivante peut être en train de vider et de remplir.
+
+    Returns:
+        list: Familles de métriques (prometheus_client.Metric)
+    """
+    collect_metrics()
+    families = []
+    for metric in [
+        identity_metrics,
+        compute_metrics,
+        image_metrics,
+        block_storage_metrics,
+        network_metrics,
+        object_storage_metrics,
+        quota_metrics,
+        gnocchi_metrics,
+        gnocchi_metrics_timestamp,
+    ]:
+        families.extend(metric.collect())
+    return families
+
+
 # CustomCollector pour déclencher la collecte à chaque scrape
 class CustomCollector:
+    def __init__(self, coalescer=None):
+        self.coalescer = coalescer or ScrapeCoalescer(collect_snapshot, settings.get("scrape_coalesce_window"))
+
     def collect(self):
-        collect_metrics()  # Met à jour toutes les métriques
-        # Retourne toutes les métriques collectées
+        # Met à jour toutes les métriques, ou réutilise la collecte en cours / récente
+        leader, families = self.coalescer.run()
+        if not leader:
+            exporter_scrapes_coalesced.inc()
+        # Métriques OpenStack de la collecte, puis métriques de l'exporteur (lues en direct)
+        yield from families or []
         for metric in [
-            identity_metrics,
-            compute_metrics,
-            image_metrics,
-            block_storage_metrics,
-            network_metrics,
-            object_storage_metrics,
-            quota_metrics,
-            gnocchi_metrics,
             exporter_uptime,
             exporter_errors,
             exporter_scrape_duration,
+            exporter_scrapes_coalesced,
+            scheduler_job_duration,
+            scheduler_job_failures,
+            scheduler_job_last_success,
         ]:
             yield from metric.collect()
 
 
+# Serveur WSGI multi-thread : les scrapes simultanés peuvent ainsi être regroupés
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
 # Fonction principale pour démarrer le serveur WSGI
 def main():
+    parser = argparse.ArgumentParser(description="OpenStack Metrics Collector")
+    parser.add_argument(
+        "--with-scheduler",
+        action="store_true",
+        help="Exécute aussi les tâches planifiées (CRON_*) dans ce processus, à la place de cron",
+    )
+    args = parser.parse_args()
+
+    configure_logging()
     lang = get_language_preference()
     creds, missing_vars = load_openstack_credentials()
     if not creds:
         print(f"[bold red]{TRANSLATIONS[lang]['credentials_error']}[/]")
         return
 
+    scheduler = create_scheduler() if args.with_scheduler else None
+    if scheduler is not None:
+        scheduler.start()
+
     registry = CollectorRegistry()
     registry.register(CustomCollector())
     app = make_wsgi_app(registry)
-    httpd = make_server("", 8000, app)
+    httpd = make_server("", 8000, app, server_class=ThreadingWSGIServer)
     logger.info(TRANSLATIONS[lang]["exporter_started"])
 
     try:
@@ -900,6 +1399,9 @@ def main():
     except KeyboardInterrupt:
         logger.info(TRANSLATIONS[lang]["manual_stop"])
         httpd.server_close()
+    finally:
+        if scheduler is not None:
+            scheduler.stop()
 
 
 if __name__ == "__main__":
@@ -1,16 +1,37 @@
 #!/usr/bin/env python3
 
-import json
-import subprocess
+import argparse
+import os
+import threading
+import time
 from datetime import datetime, timedelta, timezone
 
-from openstack import connection
 from rich import print
 from rich.console import Console
 from rich.table import Table
 
-from .config import get_language_preference, load_openstack_credentials
-from .utils import get_version, isoformat
+from .analysis import open_incremental_analysis
+from .billing import fetch_billing_table
+from .config import get_language_preference, load_openstack_credentials, settings
+from .daemon import run_in_daemon
+from .exceptions import BillingError, StaleInventoryError
+from .flavors import plan_rightsizing
+from .inventory import Inventory, InventorySnapshot, open_stored_inventory
+from .orphans import attach_costs, find_inventory_orphans
+from .usage import UsageSnapshot, find_idle_instances
+from .utils import get_version
+
+# Taux de conversion des ICU facturées
+ICU_TO_CHF = 1 / 50
+ICU_TO_EUR = 1 / 55.5
+
+# Type de ressources dont chaque source du rapport met à jour l'état d'analyse
+ANALYSIS_KINDS = {
+    "inactive_instances": "server",
+    "idle_instances": "server",
+    "rightsizing": "server",
+    "unused_volumes": "volume",
+}
 
 # Dictionnaire des traductions
 TRANSLATIONS = {
@@ -23,20 +44,49 @@ TRANSLATIONS = {
         "billing_error": "❌ Échec de la récupération des données : {}",
         "billing_exception": "❌ Exception lors de la récupération du billing : {}",
         "flavor_parse_error": "❌ Échec du parsing pour le flavor '{}' : {}",
-        "openstack_error": "❌ La commande `openstack server list` a échoué.",
-        "cli_error": "❌ Erreur lors de l'appel à `openstack server list`: {}",
         "no_inactive": "✅ Aucune instance inactive détectée.",
         "no_unused": "✅ Aucun volume inutilisé détecté.",
+        "no_idle": "✅ Aucune instance active inutilisée détectée.",
+        "no_rightsizing": "✅ Aucune instance surdimensionnée détectée.",
+        "source_error": "⚠️ {} : données indisponibles ({}), rapport partiel.",
+        "source_timeout": "⚠️ {} : pas de réponse après {} s, rapport partiel.",
+        "source_unavailable": "⚠️ Données indisponibles.",
         "no_billing": "❌ Aucune donnée de facturation disponible (trop faibles ou non disponibles).",
-        "billing_json_error": "❌ Erreur lors de la lecture des données de facturation : format JSON invalide.",
         "report_title": "RÉCAPITULATIF HEBDOMADAIRE DES RESSOURCES SOUS-UTILISÉES",
         "inactive_instances": "INSTANCES INACTIVES",
+        "idle_instances": "INSTANCES ACTIVES INUTILISÉES (7 DERNIERS JOURS)",
+        "cpu_p95": "CPU p95",
+        "idle_ratio": "Temps inactif",
+        "rightsizing": "REDIMENSIONNEMENTS RECOMMANDÉS (PICS P95 DES 7 DERNIERS JOURS)",
+        "flavor": "Flavor",
+        "recommended_flavor": "Flavor conseillé",
+        "ram_p95": "RAM p95",
+        "monthly_savings": "Économie / mois",
         "unused_volumes": "VOLUMES NON UTILISÉS",
+        "orphans": "RESSOURCES ORPHELINES",
+        "no_orphans": "✅ Aucune ressource orpheline détectée.",
+        "orphan_kind": "Type",
+        "orphan_reference": "Référence pendante",
+        "size": "Taille",
+        "cost": "Coût",
+        "orphan_snapshot": "Snapshot sans volume",
+        "orphan_backup": "Backup sans volume",
+        "orphan_attachment": "Volume attaché à une instance supprimée",
+        "orphan_floating_ip": "IP flottante sans port",
+        "orphan_image": "Image privée inutilisée",
         "underutilized_costs": "COÛTS DES RESSOURCES SOUS-UTILISÉES",
         "report_generated": "🎉 Rapport généré avec succès : {}",
         "resource": "Ressource",
         "status": "Statut",
         "name": "Nom",
+        "project": "Projet",
+        "since": "Depuis",
+        "idle_since": "Inutilisée depuis",
+        "days": "{:.0f} j",
+        "gigabytes": "{:.1f} Go",
+        "incremental": "🔁 Analyse incrémentale : {} instances et {} volumes modifiés, {} instances mesurées.",
+        "daemon_unavailable": "⚠️ Daemon injoignable, exécution locale.",
+        "cache_stale": "❌ Inventaire local absent ou trop ancien ({}). Lancez le collecteur de métriques ou retirez --from-cache.",
     },
     "en": {
         "welcome": "🎉 Welcome to OpenStack Toolbox 🧰 v{} 🎉",
@@ -47,107 +97,122 @@ TRANSLATIONS = {
         "billing_error": "❌ Failed to retrieve data: {}",
         "billing_exception": "❌ Exception while retrieving billing: {}",
         "flavor_parse_error": "❌ Failed to parse flavor '{}': {}",
-        "openstack_error": "❌ The `openstack server list` command failed.",
-        "cli_error": "❌ Error calling `openstack server list`: {}",
         "no_inactive": "✅ No inactive instances detected.",
         "no_unused": "✅ No unused volumes detected.",
+        "no_idle": "✅ No idle active instances detected.",
+        "no_rightsizing": "✅ No oversized instances detected.",
+        "source_error": "⚠️ {}: data unavailable ({}), partial report.",
+        "source_timeout": "⚠️ {}: no answer after {} s, partial report.",
+        "source_unavailable": "⚠️ Data unavailable.",
         "no_billing": "❌ No billing data available (too low or unavailable).",
-        "billing_json_error": "❌ Error reading billing data: invalid JSON format.",
         "report_title": "WEEKLY SUMMARY OF UNDERUTILIZED RESOURCES",
         "inactive_instances": "INACTIVE INSTANCES",
+        "idle_instances": "IDLE ACTIVE INSTANCES (LAST 7 DAYS)",
+        "cpu_p95": "CPU p95",
+        "idle_ratio": "Idle time",
+        "rightsizing": "RECOMMENDED RESIZES (P95 PEAKS OVER THE LAST 7 DAYS)",
+        "flavor": "Flavor",
+        "recommended_flavor": "Recommended flavor",
+        "ram_p95": "RAM p95",
+        "monthly_savings": "Savings / month",
         "unused_volumes": "UNUSED VOLUMES",
+        "orphans": "ORPHANED RESOURCES",
+        "no_orphans": "✅ No orphaned resources detected.",
+        "orphan_kind": "Type",
+        "orphan_reference": "Dangling reference",
+        "size": "Size",
+        "cost": "Cost",
+        "orphan_snapshot": "Snapshot without volume",
+        "orphan_backup": "Backup without volume",
+        "orphan_attachment": "Volume attached to a deleted instance",
+        "orphan_floating_ip": "Floating IP without port",
+        "orphan_image": "Unused private image",
         "underutilized_costs": "COSTS OF UNDERUTILIZED RESOURCES",
         "report_generated": "🎉 Report generated successfully: {}",
         "resource": "Resource",
         "status": "Status",
         "name": "Name",
+        "project": "Project",
+        "since": "Since",
+        "idle_since": "Idle for",
+        "days": "{:.0f} d",
+        "gigabytes": "{:.1f} GB",
+        "incremental": "🔁 Incremental analysis: {} instances and {} volumes changed, {} instances measured.",
+        "daemon_unavailable": "⚠️ Daemon unreachable, running locally.",
+        "cache_stale": "❌ Local inventory missing or too old ({}). Start the metrics collector or drop --from-cache.",
     },
 }
 
 
-# Fonction pour générer le fichier de billing
-def generate_billing():
+# Fonction pour récupérer la facturation de la semaine dernière
+def generate_billing(conn):
+    """
+    Récupère la facturation CloudKitty de la semaine dernière, cumulée par ressource au fil de la lecture.
+
+    Args:
+        conn (Connection): Connexion OpenStack authentifiée
+
+    Returns:
+        BillingTable: Une ligne par ressource pour la semaine, None en cas d'échec
+    """
     lang = get_language_preference()
+    today = datetime.now(timezone.utc).date()
+    last_monday = today - timedelta(days=today.weekday() + 7)
+    last_sunday = last_monday + timedelta(days=6)
+
+    start_dt = datetime.combine(last_monday, datetime.min.time()).replace(tzinfo=timezone.utc)
+    end_dt = datetime.combine(last_sunday, datetime.max.time()).replace(tzinfo=timezone.utc)
+
+    print(TRANSLATIONS[lang]["billing_period"].format(start_dt, end_dt))
+
     try:
-        today = datetime.now(timezone.utc).date()
-        last_monday = today - timedelta(days=today.weekday() + 7)
-        last_sunday = last_monday + timedelta(days=6)
-
-        start_dt = datetime.combine(last_monday, datetime.min.time()).replace(tzinfo=timezone.utc)
-        end_dt = datetime.combine(last_sunday, datetime.max.time()).replace(tzinfo=timezone.utc)
-
-        print(TRANSLATIONS[lang]["billing_period"].format(start_dt, end_dt))
-
-        start_iso = isoformat(start_dt)
-        end_iso = isoformat(end_dt)
-
-        cmd = [
-            "openstack",
-            "rating",
-            "dataframes",
-            "get",
-            "-b",
-            start_iso,
-            "-e",
-            end_iso,
-            "-c",
-            "Resources",
-            "-f",
-            "json",
-        ]
-
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-
-        if result.returncode == 0:
-            return result.stdout
-        else:
-            return TRANSLATIONS[lang]["billing_error"].format(result.stderr.strip())
+        return fetch_billing_table(conn, start_dt, end_dt, granularity=None)
+    except BillingError as e:
+        print(TRANSLATIONS[lang]["billing_error"].format(e))
     except Exception as e:
-        return TRANSLATIONS[lang]["billing_exception"].format(e)
+        print(TRANSLATIONS[lang]["billing_exception"].format(e))
+    return None
 
 
 console = Console()
 
 
 # Fonction pour récupérer les statuts des VMs via l'API OpenStack
-def get_vm_statuses_from_cli():
-    lang = get_language_preference()
-    try:
-        result = subprocess.run(
-            ["openstack", "server", "list", "-f", "json"],
-            capture_output=True,
-            text=True,
-            timeout=60,
-        )
-        if result.returncode != 0:
-            print(TRANSLATIONS[lang]["openstack_error"])
-            print("STDERR:", result.stderr)
-            return []
-        servers = json.loads(result.stdout)
-        return [
-            {
-                "id": s["ID"],
-                "name": s["Name"],
-                "status": s["Status"],
-                "project": s.get("Project ID", "inconnu"),
-            }
-            for s in servers
-        ]
-    except Exception as e:
-        print(TRANSLATIONS[lang]["cli_error"].format(e))
-        return []
+def get_vm_statuses(inventory, all_projects=False):
+    """
+    Statuts des instances, depuis l'inventaire (liste paginée par openstacksdk).
+
+    Args:
+        inventory (Inventory): Inventaire du projet (ou StoredInventory)
+        all_projects (bool): Instances de tous les projets (droits administrateur requis)
+
+    Returns:
+        list: Dictionnaires {id, name, status, project}
+    """
+    servers = inventory.servers(all_projects=all_projects)
+    return [
+        {
+            "id": server.id,
+            "name": server.name,
+            "status": server.status or "",
+            "project": server.project_id or "inconnu",
+        }
+        for server in servers
+    ]
 
 
 # Liste des statuts de VM à vérifier
-def get_inactive_instances_from_cli():
-    servers = get_vm_statuses_from_cli()
-    inactive = [s for s in servers if s["status"].upper() != "ACTIVE"]
-    return inactive
+def get_inactive_instances(inventory, all_projects=False, analysis=None):
+    if analysis is not None:
+        analysis.observe("server", inventory.servers(all_projects=all_projects), lambda server: server.status or "")
+    return [server for server in get_vm_statuses(inventory, all_projects) if server["status"].upper() != "ACTIVE"]
 
 
-def get_unused_volumes(conn):
+def get_unused_volumes(inventory, analysis=None):
     # Récupérer la liste des volumes
-    volumes = conn.block_storage.volumes()
+    volumes = inventory.volumes()
+    if analysis is not None:
+        analysis.observe("volume", volumes, lambda volume: "attached" if volume.attachments else "detached")
 
     unused_volumes = []
     for volume in volumes:
@@ -158,42 +223,196 @@ def get_unused_volumes(conn):
     return unused_volumes
 
 
-def calculate_underutilized_costs(billing_json):
+def calculate_underutilized_costs(billing_table):
+    # Coût total de chaque ressource sur la période (le type pour les lignes sans ressource)
+    costs_icu = {}
+    for (resource_id, resource_type), cost_icu in billing_table.group_by("resource_id", "type").items():
+        resource = resource_id or resource_type
+        costs_icu[resource] = costs_icu.get(resource, 0.0) + cost_icu
+
+    underutilized_costs = {}
+    for resource, cost_icu in costs_icu.items():
+        underutilized_costs[resource] = {
+            "ICU": cost_icu,
+            "CHF": round(cost_icu * ICU_TO_CHF, 2),
+            "EUR": round(cost_icu * ICU_TO_EUR, 2),
+        }
+    return underutilized_costs
+
+
+# Instances actives mais inutilisées, d'après les mesures Gnocchi
+def get_idle_instances(conn, inventory, all_projects=False, analysis=None, usage=None):
+    """
+    Instances ACTIVE restées quasi inactives sur les 7 derniers jours (voir ``usage.find_idle_instances``).
+
+    Avec une analyse incrémentale, seules les instances nouvelles, modifiées ou
+    dont le verdict a dépassé ``analysis_recheck`` sont mesurées ; les autres, et
+    celles sans mesures suffisantes, gardent leur verdict précédent. Avec un
+    relevé partagé (``UsageSnapshot``), les mesures servent aussi au redimensionnement.
+
+    Returns:
+        list: IdleInstance
+
+    Raises:
+        GnocchiError: Si les mesures sont indisponibles
+    """
+    servers = inventory.servers(all_projects=all_projects)
+    catalogue = inventory.flavor_catalogue()
+    if analysis is None:
+        return find_idle_instances(conn, servers, usage=usage, catalogue=catalogue)[0]
+    analysis.observe("server", servers, lambda server: server.status or "")
+    due = analysis.due_for_idle_check(servers)
+    if due:
+        idle, measured = find_idle_instances(conn, due, usage=usage, catalogue=catalogue)
+        analysis.record_idle_check(measured, idle)
+    return analysis.idle_instances()
+
+
+# Flavors plus économiques couvrant les pics observés des instances
+def get_rightsizing(conn, inventory, all_projects=False, analysis=None, usage=None):
+    """
+    Redimensionnement des instances ACTIVE d'après leurs pics sur 7 jours (voir ``flavors.plan_rightsizing``).
+
+    Avec une analyse incrémentale, seules les instances mesurées par
+    ``get_idle_instances`` le sont ici aussi ; les autres reprennent leurs pics
+    enregistrés. Avec un relevé partagé (``UsageSnapshot``), les mesures de
+    ``get_idle_instances`` sont réutilisées au lieu d'être redemandées.
+
+    Returns:
+        RightsizingPlan
+
+    Raises:
+        GnocchiError: Si les mesures sont indisponibles
+    """
+    servers = inventory.servers(all_projects=all_projects)
+    if analysis is not None:
+        analysis.observe("server", servers, lambda server: server.status or "")
+    return plan_rightsizing(conn, servers, inventory.flavors().values(), analysis=analysis, usage=usage)
+
+
+def fetch_report_sources(conn, inventory, all_projects=False, from_cache=False, analysis=None):
+    """
+    Récupère en parallèle les données indépendantes du rapport.
+
+    Facturation, statuts des instances, volumes et mesures Gnocchi sont demandés
+    en même temps : la durée totale est celle de la source la plus lente, bornée
+    par le réglage ``source_timeout``. Une source en échec ou hors délai est
+    signalée et vaut None ; le rapport est alors partiel.
+
+    Une source hors délai continue dans un thread démon, qui ne retient pas le
+    processus (ses requêtes restent bornées par ``http_timeout``). L'analyse est
+    scellée au retour : ses mises à jour tardives sont ignorées et l'état du type
+    de ressources qu'elle analysait n'est pas enregistré.
+
+    Args:
+        conn (Connection): Connexion OpenStack authentifiée
+        inventory (Inventory): Inventaire partagé (chaque collection n'est chargée qu'une fois)
+        all_projects (bool): Instances de tous les projets (droits administrateur requis)
+        from_cache (bool): Inventaire local : ni facturation ni mesures Gnocchi
+        analysis (IncrementalAnalysis): État du rapport précédent, mis à jour par les sources (optionnel)
+
+    Returns:
+        dict: Données par section du rapport ; une section non interrogée est absente
+
+    Raises:
+        StaleInventoryError: Si l'inventaire local est absent ou trop ancien
+    """
     lang = get_language_preference()
-    ICU_to_CHF = 1 / 50
-    ICU_to_EUR = 1 / 55.5
+    sources = {
+        "inactive_instances": lambda: get_inactive_instances(inventory, all_projects, analysis),
+        "unused_volumes": lambda: get_unused_volumes(inventory, analysis),
+        "orphans": lambda: find_inventory_orphans(inventory),
+    }
+    if not from_cache:
+        # CPU, réseau, disque et mémoire relevés une seule fois pour l'inactivité et le redimensionnement
+        usage = UsageSnapshot(conn)
+        sources["idle_instances"] = lambda: get_idle_instances(conn, inventory, all_projects, analysis, usage)
+        sources["rightsizing"] = lambda: get_rightsizing(conn, inventory, all_projects, analysis, usage)
+        sources["underutilized_costs"] = lambda: generate_billing(conn)
+
+    timeout = settings.get("source_timeout")
+    outcomes, errors = {}, {}
+
+    def run(name, fetch):
+        try:
+            outcomes[name] = fetch()
+        except Exception as e:
+            errors[name] = e
+
+    threads = {
+        name: threading.Thread(target=run, args=(name, fetch), name=f"report-{name}", daemon=True)
+        for name, fetch in sources.items()
+    }
+    for thread in threads.values():
+        thread.start()
+    deadline = time.monotonic() + timeout
+    for thread in threads.values():
+        thread.join(max(0.0, deadline - time.monotonic()))
+    unfinished = {name for name, thread in threads.items() if thread.is_alive()}
+    if analysis is not None:
+        # État partiel d'une source non terminée : le rapport suivant repart du précédent
+        analysis.seal(discard={ANALYSIS_KINDS[name] for name in unfinished if name in ANALYSIS_KINDS})
+
+    results = {}
+    for name in sources:
+        label = TRANSLATIONS[lang][name]
+        if name in unfinished:
+            print(f"[bold yellow]{TRANSLATIONS[lang]['source_timeout'].format(label, timeout)}[/bold yellow]")
+            results[name] = None
+        elif isinstance(errors.get(name), StaleInventoryError):
+            raise errors[name]
+        elif name in errors:
+            print(f"[bold yellow]{TRANSLATIONS[lang]['source_error'].format(label, errors[name])}[/bold yellow]")
+            results[name] = None
+        else:
+            results[name] = outcomes[name]
+    return results
 
-    try:
-        billing_data = json.loads(billing_json)
-    except json.JSONDecodeError:
-        print(TRANSLATIONS[lang]["billing_json_error"])
-        return {}
 
-    underutilized_costs = {}
-    for entry in billing_data:
-        resource = entry.get("name") or entry.get("resource") or entry.get("ID") or entry.get("id")
-        cost_icu = (
-            entry.get("rate:unit") or entry.get("ICU") or entry.get("icu") or entry.get("cost") or entry.get("rate:sum")
+def collect_and_analyze_data(conn, inventory, all_projects=False, from_cache=False):
+    """
+    Récupère les données du rapport en parallèle puis le met en forme, section par section.
+
+    Returns:
+        str: Contenu du rapport
+    """
+    lang = get_language_preference()
+    analysis = None
+    if not from_cache:
+        # État par ressource du rapport précédent, propre au périmètre analysé
+        scope = conn.current_project_id + (":all" if all_projects else "")
+        analysis = open_incremental_analysis(scope)
+    sources = fetch_report_sources(conn, inventory, all_projects=all_projects, from_cache=from_cache, analysis=analysis)
+    if analysis is not None:
+        analysis.save()
+        print(
+            TRANSLATIONS[lang]["incremental"].format(
+                analysis.reanalysed.get("server", 0), analysis.reanalysed.get("volume", 0), analysis.measured
+            )
         )
-        if resource is not None and cost_icu is not None:
-            try:
-                cost_icu = float(cost_icu)
-            except Exception:
-                continue
-            cost_chf = cost_icu * ICU_to_CHF
-            cost_eur = cost_icu * ICU_to_EUR
-            underutilized_costs[resource] = {
-                "ICU": cost_icu,
-                "CHF": round(cost_chf, 2),
-                "EUR": round(cost_eur, 2),
-            }
-    return underutilized_costs
+    return render_report(sources, all_projects=all_projects, analysis=analysis)
 
 
-def collect_and_analyze_data(conn, billing_json=None):
+def _age(lang, since, now):
+    return "-" if since is None else TRANSLATIONS[lang]["days"].format((now - since) / 86400)
+
+
+def render_report(sources, all_projects=False, analysis=None):
+    """
+    Met en forme le rapport dans un ordre fixe à partir des données récupérées.
+
+    Args:
+        sources (dict): Données par section (voir ``fetch_report_sources``)
+        all_projects (bool): Ajoute la colonne projet aux instances
+        analysis (IncrementalAnalysis): Ajoute la durée de chaque statut (optionnelle)
+    """
     lang = get_language_preference()
-    inactive_instances = get_inactive_instances_from_cli()
-    unused_volumes = get_unused_volumes(conn)
+    inactive_instances = sources.get("inactive_instances")
+    idle_instances = sources.get("idle_instances")
+    unused_volumes = sources.get("unused_volumes")
+    billing_table = sources.get("underutilized_costs")
+    rightsizing = sources.get("rightsizing")
+    orphans = sources.get("orphans")
 
     report_body = ""
     report_body += "=" * 60 + "\n"
@@ -206,27 +425,128 @@ def collect_and_analyze_data(conn, billing_json=None):
         table.add_column("ID", style="magenta")
         table.add_column(TRANSLATIONS[lang]["name"], style="cyan")
         table.add_column(TRANSLATIONS[lang]["status"], style="red")
+        if all_projects:
+            table.add_column(TRANSLATIONS[lang]["project"], style="blue")
+        if analysis is not None:
+            table.add_column(TRANSLATIONS[lang]["since"], justify="right")
         for instance in inactive_instances:
-            table.add_row(instance["id"], instance["name"], instance["status"])
+            row = [instance["id"], instance["name"], instance["status"]]
+            if all_projects:
+                row.append(instance["project"])
+            if analysis is not None:
+                row.append(_age(lang, analysis.since("server", instance["id"]), analysis.now))
+            table.add_row(*row)
         console.print(table)
+    elif inactive_instances is None:
+        report_body += TRANSLATIONS[lang]["source_unavailable"] + "\n"
     else:
         report_body += TRANSLATIONS[lang]["no_inactive"] + "\n"
     report_body += "\n" + "-" * 50 + "\n"
 
+    if "idle_instances" in sources:
+        report_body += f"[{TRANSLATIONS[lang]['idle_instances']}]\n"
+        if idle_instances:
+            table = Table(title="")
+            table.add_column("ID", style="magenta")
+            table.add_column(TRANSLATIONS[lang]["name"], style="cyan")
+            table.add_column(TRANSLATIONS[lang]["cpu_p95"], justify="right", style="red")
+            table.add_column(TRANSLATIONS[lang]["idle_ratio"], justify="right", style="yellow")
+            if all_projects:
+                table.add_column(TRANSLATIONS[lang]["project"], style="blue")
+            if analysis is not None:
+                table.add_column(TRANSLATIONS[lang]["idle_since"], justify="right")
+            for instance in idle_instances:
+                row = [instance.id, instance.name, f"{instance.cpu_p95:.1f} %", f"{instance.idle_ratio:.0%}"]
+                if all_projects:
+                    row.append(instance.project)
+                if analysis is not None:
+                    row.append(_age(lang, analysis.idle_since(instance.id), analysis.now))
+                table.add_row(*row)
+            console.print(table)
+        elif idle_instances is None:
+            report_body += TRANSLATIONS[lang]["source_unavailable"] + "\n"
+        else:
+            report_body += TRANSLATIONS[lang]["no_idle"] + "\n"
+        report_body += "\n" + "-" * 50 + "\n"
+
+    if "rightsizing" in sources:
+        report_body += f"[{TRANSLATIONS[lang]['rightsizing']}]\n"
+        recommendations = rightsizing.recommendations(billing_table) if rightsizing is not None else None
+        if recommendations:
+            table = Table(title="")
+            table.add_column("ID", style="magenta")
+            table.add_column(TRANSLATIONS[lang]["name"], style="cyan")
+            table.add_column(TRANSLATIONS[lang]["flavor"], style="red")
+            table.add_column(TRANSLATIONS[lang]["recommended_flavor"], style="green")
+            table.add_column(TRANSLATIONS[lang]["cpu_p95"], justify="right")
+            table.add_column(TRANSLATIONS[lang]["ram_p95"], justify="right")
+            table.add_column(TRANSLATIONS[lang]["monthly_savings"], justify="right", style="green")
+            for item in recommendations:
+                savings = (
+                    "-" if item.monthly_savings_icu is None else f"{item.monthly_savings_icu * ICU_TO_CHF:.2f} CHF"
+                )
+                table.add_row(
+                    item.id,
+                    item.name,
+                    item.flavor,
+                    item.recommended,
+                    f"{item.cpu_peak:.1f} vCPU",
+                    TRANSLATIONS[lang]["gigabytes"].format(item.ram_peak_gb),
+                    savings,
+                )
+            console.print(table)
+        elif recommendations is None:
+            report_body += TRANSLATIONS[lang]["source_unavailable"] + "\n"
+        else:
+            report_body += TRANSLATIONS[lang]["no_rightsizing"] + "\n"
+        report_body += "\n" + "-" * 50 + "\n"
+
     report_body += f"[{TRANSLATIONS[lang]['unused_volumes']}]\n"
     if unused_volumes:
         table = Table(title="")
         table.add_column("ID", style="magenta")
         table.add_column(TRANSLATIONS[lang]["name"], style="cyan")
+        if analysis is not None:
+            table.add_column(TRANSLATIONS[lang]["since"], justify="right")
         for volume in unused_volumes:
-            table.add_row(volume.id, volume.name)
+            row = [volume.id, volume.name]
+            if analysis is not None:
+                row.append(_age(lang, analysis.since("volume", volume.id), analysis.now))
+            table.add_row(*row)
         console.print(table)
+    elif unused_volumes is None:
+        report_body += TRANSLATIONS[lang]["source_unavailable"] + "\n"
     else:
         report_body += TRANSLATIONS[lang]["no_unused"] + "\n"
     report_body += "\n" + "-" * 50 + "\n"
 
+    report_body += f"[{TRANSLATIONS[lang]['orphans']}]\n"
+    if orphans:
+        table = Table(title="")
+        table.add_column(TRANSLATIONS[lang]["orphan_kind"], style="red")
+        table.add_column("ID", style="magenta")
+        table.add_column(TRANSLATIONS[lang]["name"], style="cyan")
+        table.add_column(TRANSLATIONS[lang]["orphan_reference"], style="yellow")
+        table.add_column(TRANSLATIONS[lang]["size"], justify="right")
+        table.add_column(TRANSLATIONS[lang]["cost"], justify="right", style="green")
+        for orphan in attach_costs(orphans, billing_table):
+            table.add_row(
+                TRANSLATIONS[lang][f"orphan_{orphan.kind}"],
+                orphan.id,
+                orphan.name,
+                orphan.reference or "-",
+                "-" if orphan.size_gb is None else TRANSLATIONS[lang]["gigabytes"].format(orphan.size_gb),
+                "-" if orphan.cost_icu is None else f"{orphan.cost_icu * ICU_TO_CHF:.2f} CHF",
+            )
+        console.print(table)
+    elif orphans is None:
+        report_body += TRANSLATIONS[lang]["source_unavailable"] + "\n"
+    else:
+        report_body += TRANSLATIONS[lang]["no_orphans"] + "\n"
+    report_body += "\n" + "-" * 50 + "\n"
+
     report_body += f"[{TRANSLATIONS[lang]['underutilized_costs']}]\n"
-    underutilized_costs = calculate_underutilized_costs(billing_json) if billing_json else {}
+    underutilized_costs = calculate_underutilized_costs(billing_table) if billing_table else {}
     if not underutilized_costs:
         report_body += TRANSLATIONS[lang]["no_billing"] + "\n"
     else:
@@ -242,7 +562,65 @@ def collect_and_analyze_data(conn, billing_json=None):
     return report_body
 
 
+def run_optimization(conn, inventory=None, from_cache=False, all_projects=False, output_dir=None):
+    """
+    Génère le rapport d'optimisation sur une connexion déjà authentifiée.
+
+    Utilisée par ``main`` et par le daemon, qui lui passe sa connexion et son
+    inventaire gardés en mémoire.
+
+    Args:
+        conn (Connection): Connexion OpenStack authentifiée
+        inventory (Inventory): Inventaire à réutiliser (un nouveau par défaut)
+        from_cache (bool): Inventaire local (StoredInventory) : ni appel API, ni facturation, ni mesures Gnocchi
+        all_projects (bool): Instances inactives de tous les projets (droits administrateur requis)
+        output_dir (str): Répertoire du fichier de rapport (répertoire courant par défaut ; le
+            daemon y passe celui du client)
+
+    Returns:
+        str: Contenu du rapport
+    """
+    lang = get_language_preference()
+    inventory = InventorySnapshot(inventory or Inventory(conn))
+    report_path = os.path.join(output_dir or "", "openstack_optimization_report.txt")
+
+    report_body = collect_and_analyze_data(conn, inventory, all_projects=all_projects, from_cache=from_cache)
+
+    try:
+        with open(report_path, "w") as f:
+            f.write(report_body)
+        print(f"[bold green]{TRANSLATIONS[lang]['report_generated'].format(report_path)}[/bold green]")
+    except OSError as e:
+        print(f"[bold red]❌ Impossible d'écrire le rapport : {e}[/bold red]")
+
+    print(report_body)
+    return report_body
+
+
 def main():
+    parser = argparse.ArgumentParser(description="OpenStack Optimization")
+    parser.add_argument(
+        "--via-daemon",
+        action="store_true",
+        help="Envoie la demande au daemon openstack-toolbox-daemon s'il tourne",
+    )
+    parser.add_argument(
+        "--from-cache",
+        action="store_true",
+        help="Lit l'inventaire local écrit par le collecteur de métriques, sans appel API ni facturation",
+    )
+    parser.add_argument(
+        "--all-projects",
+        action="store_true",
+        help="Liste les instances de tous les projets (droits administrateur requis)",
+    )
+    parser.add_argument(
+        "--max-age",
+        type=float,
+        help="Âge maximal accepté de l'inventaire local, en secondes (réglage inventory_max_age par défaut)",
+    )
+    args = parser.parse_args()
+
     lang = get_language_preference()
     version = get_version()
     print(f"[yellow bold]{TRANSLATIONS[lang]['welcome'].format(version)}[/yellow bold]")
@@ -262,31 +640,36 @@ def main():
 """
     print(header)
 
+    if args.from_cache:
+        try:
+            run_optimization(
+                None, inventory=open_stored_inventory(args.max_age), from_cache=True, all_projects=args.all_projects
+            )
+        except StaleInventoryError as e:
+            print(f"[bold red]{TRANSLATIONS[lang]['cache_stale'].format(e)}[/bold red]")
+        return
+
+    if args.via_daemon:
+        if run_in_daemon("optimization", {"all_projects": args.all_projects}):
+            return
+        print(f"[bold yellow]{TRANSLATIONS[lang]['daemon_unavailable']}[/bold yellow]")
+
     # Test des credentials
     creds, missing_vars = load_openstack_credentials()
     if not creds:
         print(f"[bold red]{TRANSLATIONS[lang]['connection_error']}[/bold red]")
         return
 
+    # Import différé : openstacksdk est long à charger et inutile avant ce point
+    from openstack import connection
+
     conn = connection.Connection(**creds)
     try:
         if not conn.authorize():
             print(f"[bold red]{TRANSLATIONS[lang]['auth_error']}[/bold red]")
             return
 
-        billing_json = generate_billing()
-        report_body = collect_and_analyze_data(conn, billing_json)
-
-        try:
-            with open("openstack_optimization_report.txt", "w") as f:
-                f.write(report_body)
-            print(
-                f"[bold green]{TRANSLATIONS[lang]['report_generated'].format('openstack_optimization_report.txt')}[/bold green]"
-            )
-        except OSError as e:
-            print(f"[bold red]❌ Impossible d'écrire le rapport : {e}[/bold red]")
-
-        print(report_body)
+        run_optimization(conn, all_projects=args.all_projects)
     finally:
         conn.close()
 
@@ -1,17 +1,21 @@
 #!/usr/bin/env python3
 
-import json
-import subprocess
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timedelta, timezone
 
-from openstack import connection
 from rich import print
 from rich.console import Console
 from rich.table import Table
 from rich.tree import Tree
 
+from .billing import clear_billing_cache, fetch_billing_table
 from .config import get_language_preference, load_openstack_credentials
+from .daemon import run_in_daemon
+from .exceptions import BillingError, StaleInventoryError
+from .history import open_history_store
+from .inventory import Inventory, InventorySnapshot, open_stored_inventory
 from .utils import format_size, get_version, isoformat, print_header
 
 # Dictionnaire des traductions
@@ -35,6 +39,7 @@ TRANSLATIONS = {
         "mounted_volumes": "📦 Volumes montés par instance",
         "no_volume_mounted": "🚫 Aucun volume",
         "billing_period": "🗓️ Période de facturation sélectionnée : {} → {}\n",
+        "billing_cache_cleared": "🔄 {} tranches de facturation en cache oubliées : la période sera relue.",
         "enter_billing_period": "Entrez la période de facturation souhaitée (format: YYYY-MM-DD HH:MM), appuyez sur Entrée pour la valeur par défaut.",
         "start_date": "Date de début",
         "end_date": "Date de fin",
@@ -47,8 +52,11 @@ TRANSLATIONS = {
         "backups_header": "LISTE DES BACKUPS",
         "volumes_header": "LISTE DES VOLUMES",
         "volumes_tree_header": "ARBORESCENCE DES VOLUMES",
+        "unknown": "inconnu",
         "floating_ips_header": "LISTE DES FLOATING IPs",
         "containers_header": "LISTE DES CONTAINERS",
+        "daemon_unavailable": "⚠️ Daemon injoignable, exécution locale.",
+        "cache_stale": "❌ Inventaire local absent ou trop ancien ({}). Lancez le collecteur de métriques ou retirez --from-cache.",
     },
     "en": {
         "welcome": "🎉 Welcome to OpenStack Toolbox 🧰 v{} 🎉",
@@ -69,6 +77,7 @@ TRANSLATIONS = {
         "mounted_volumes": "📦 Volumes mounted by instance",
         "no_volume_mounted": "🚫 No volume",
         "billing_period": "🗓️ Selected billing period: {} → {}\n",
+        "billing_cache_cleared": "🔄 {} cached billing buckets dropped: the period will be fetched again.",
         "enter_billing_period": "Enter the desired billing period (format: YYYY-MM-DD HH:MM), press Enter for default value.",
         "start_date": "Start date",
         "end_date": "End date",
@@ -81,8 +90,11 @@ TRANSLATIONS = {
         "backups_header": "LIST OF BACKUPS",
         "volumes_header": "LIST OF VOLUMES",
         "volumes_tree_header": "VOLUMES TREE VIEW",
+        "unknown": "unknown",
         "floating_ips_header": "LIST OF FLOATING IPs",
         "containers_header": "LIST OF CONTAINERS",
+        "daemon_unavailable": "⚠️ Daemon unreachable, running locally.",
+        "cache_stale": "❌ Local inventory missing or too old ({}). Start the metrics collector or drop --from-cache.",
     },
 }
 
@@ -97,81 +109,100 @@ def input_with_default(prompt, default):
     return s.strip() or default
 
 
-def generate_billing():
-    try:
-        lang = get_language_preference()
-        # Dates par défaut : 2 dernières heures UTC
-        default_start_dt = datetime.now(timezone.utc) - timedelta(hours=2)
-        default_end_dt = datetime.now(timezone.utc)
+def prompt_billing_period():
+    """
+    Demande la période de facturation à l'utilisateur.
 
-        print(TRANSLATIONS[lang]["enter_billing_period"])
+    Returns:
+        tuple: (début, fin) au format 'YYYY-MM-DD HH:MM', les 2 dernières heures UTC par défaut
+    """
+    lang = get_language_preference()
+    # Dates par défaut : 2 dernières heures UTC
+    default_start, default_end = default_billing_period(hours=2)
 
-        start_input = input_with_default(
-            TRANSLATIONS[lang]["start_date"],
-            trim_to_minute(isoformat(default_start_dt)),
-        )
-        end_input = input_with_default(TRANSLATIONS[lang]["end_date"], trim_to_minute(isoformat(default_end_dt)))
+    print(TRANSLATIONS[lang]["enter_billing_period"])
 
-        # Parsing des dates saisies
-        try:
-            start_dt = datetime.strptime(start_input, "%Y-%m-%d %H:%M").replace(tzinfo=timezone.utc)
-            end_dt = datetime.strptime(end_input, "%Y-%m-%d %H:%M").replace(tzinfo=timezone.utc)
-        except ValueError as e:
-            return TRANSLATIONS[lang]["billing_error"].format(f"Format de date invalide: {e}")
-
-        start_iso = isoformat(start_dt)
-        end_iso = isoformat(end_dt)
-
-        print(TRANSLATIONS[lang]["billing_period"].format(start_iso, end_iso))
-
-        cmd = [
-            "openstack",
-            "rating",
-            "dataframes",
-            "get",
-            "-b",
-            start_iso,
-            "-e",
-            end_iso,
-            "-c",
-            "Resources",
-            "-f",
-            "json",
-        ]
-
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-        if result.returncode == 0:
-            return result.stdout
-        else:
-            return TRANSLATIONS[lang]["billing_error"].format(result.stderr.strip())
+    start_input = input_with_default(TRANSLATIONS[lang]["start_date"], default_start)
+    end_input = input_with_default(TRANSLATIONS[lang]["end_date"], default_end)
+    return start_input, end_input
+
+
+def default_billing_period(hours):
+    """
+    Période de facturation couvrant les dernières heures écoulées.
+
+    Args:
+        hours (int): Durée de la période en heures
 
+    Returns:
+        tuple: (début, fin) UTC au format 'YYYY-MM-DD HH:MM'
+    """
+    end_dt = datetime.now(timezone.utc)
+    start_dt = end_dt - timedelta(hours=hours)
+    return trim_to_minute(isoformat(start_dt)), trim_to_minute(isoformat(end_dt))
+
+
+def generate_billing(conn, start_input, end_input):
+    """
+    Récupère la facturation CloudKitty de la période, agrégée par heure au fil de la lecture.
+
+    Args:
+        conn (Connection): Connexion OpenStack authentifiée
+        start_input (str): Début de la période au format 'YYYY-MM-DD HH:MM' (UTC)
+        end_input (str): Fin de la période au format 'YYYY-MM-DD HH:MM' (UTC)
+
+    Returns:
+        BillingTable: Facturation de la période, None en cas d'échec
+    """
+    lang = get_language_preference()
+    # Parsing des dates saisies
+    try:
+        start_dt = datetime.strptime(start_input, "%Y-%m-%d %H:%M").replace(tzinfo=timezone.utc)
+        end_dt = datetime.strptime(end_input, "%Y-%m-%d %H:%M").replace(tzinfo=timezone.utc)
+    except ValueError as e:
+        print(TRANSLATIONS[lang]["billing_error"].format(f"Format de date invalide: {e}"))
+        return None
+
+    print(TRANSLATIONS[lang]["billing_period"].format(isoformat(start_dt), isoformat(end_dt)))
+
+    try:
+        return fetch_billing_table(conn, start_dt, end_dt)
+    except BillingError as e:
+        print(TRANSLATIONS[lang]["billing_error"].format(e))
     except Exception as e:
-        return TRANSLATIONS[lang]["billing_exception"].format(e)
+        print(TRANSLATIONS[lang]["billing_exception"].format(e))
+    return None
 
 
-console = Console()
+def refresh_billing_cache(start_input, end_input):
+    """
+    Oublie la facturation en cache de la période, qui est alors relue depuis CloudKitty.
 
+    Args:
+        start_input (str): Début de la période au format 'YYYY-MM-DD HH:MM' (UTC)
+        end_input (str): Fin de la période au format 'YYYY-MM-DD HH:MM' (UTC)
+    """
+    lang = get_language_preference()
+    try:
+        start_dt = datetime.strptime(start_input, "%Y-%m-%d %H:%M").replace(tzinfo=timezone.utc)
+        end_dt = datetime.strptime(end_input, "%Y-%m-%d %H:%M").replace(tzinfo=timezone.utc)
+    except ValueError:
+        # Format invalide : signalé par generate_billing
+        return
+    print(TRANSLATIONS[lang]["billing_cache_cleared"].format(clear_billing_cache(start_dt, end_dt)))
 
-# Fonction pour calculer le coût d'une instance
-def calculate_instance_cost(billing_data, instance_id=None, icu_to_chf=50, icu_to_euro=55.5):
-    if not billing_data:
-        return 0.0, 0.0
 
-    total_icu = 0.0
+console = Console()
+
 
-    for group in billing_data:
-        resources = group.get("Resources", [])
-        for resource in resources:
-            desc = resource.get("desc", {})
-            resource_id = desc.get("id")
-            if instance_id and resource_id != instance_id:
-                continue  # ignorer les autres
+# Fonction pour calculer le coût d'une instance (ou de tout le projet)
+def calculate_instance_cost(billing_table, instance_id=None, icu_to_chf=50, icu_to_euro=55.5):
+    if billing_table is None or not len(billing_table):
+        return 0.0, 0.0
 
-            try:
-                price = float(resource.get("rating", 0))
-                total_icu += price
-            except (TypeError, ValueError):
-                continue
+    if instance_id:
+        billing_table = billing_table.where(resource_id=instance_id)
+    total_icu = billing_table.total()
 
     cost_chf = total_icu / icu_to_chf
     cost_euro = total_icu / icu_to_euro
@@ -180,11 +211,11 @@ def calculate_instance_cost(billing_data, instance_id=None, icu_to_chf=50, icu_t
 
 
 # Lister les images privées et partagées
-def list_images(conn):
+def list_images(inventory):
     lang = get_language_preference()
     print_header(TRANSLATIONS[lang]["images_header"])
-    private_images = list(conn.image.images(visibility="private"))
-    shared_images = list(conn.image.images(visibility="shared"))
+    private_images = inventory.images(visibility="private")
+    shared_images = inventory.images(visibility="shared")
     all_images = private_images + shared_images
 
     if not all_images:
@@ -200,15 +231,17 @@ def list_images(conn):
     console.print(table)
 
 
-def get_instance_details(conn, instance, flavors):
+def get_instance_details(instance, catalogue):
     """
-    Récupère les détails d'une instance de manière parallèle.
+    Met en forme les détails d'une instance, sans appel API.
+
+    Args:
+        instance: Instance (openstacksdk ou StoredResource)
+        catalogue (FlavorCatalogue): Catalogue des flavors de l'inventaire
     """
     lang = get_language_preference()
     try:
-        flavor_id = instance.flavor["id"]
-        flavor = flavors.get(flavor_id, {"name": TRANSLATIONS[lang]["unknown"]})
-        flavor_name = flavor.get("name", TRANSLATIONS[lang]["unknown"])
+        flavor_name = catalogue.name_of(instance.flavor) or TRANSLATIONS[lang]["unknown"]
 
         created_at = datetime.strptime(instance.created_at, "%Y-%m-%dT%H:%M:%SZ")
         uptime = datetime.now() - created_at
@@ -230,33 +263,25 @@ def get_instance_details(conn, instance, flavors):
         return None
 
 
-def list_instances(conn):
+def list_instances(inventory):
     """
-    Liste toutes les instances avec parallélisation de la collecte des détails.
+    Liste toutes les instances ; les flavors sont résolus par le catalogue de l'inventaire.
     """
     lang = get_language_preference()
     print_header(TRANSLATIONS[lang]["instances_header"])
 
-    instances = list(conn.compute.servers())
+    instances = inventory.servers()
     if not instances:
         print(TRANSLATIONS[lang]["no_instances"])
         return
 
-    # Récupération des flavors en une seule fois
-    flavors = {f.id: f for f in conn.compute.flavors()}
-
-    # Collecte parallèle des détails des instances
+    # Catalogue des flavors chargé une seule fois : aucun appel API par instance
+    catalogue = inventory.flavor_catalogue()
     instance_details = []
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        futures = [executor.submit(get_instance_details, conn, instance, flavors) for instance in instances]
-
-        for future in as_completed(futures):
-            try:
-                details = future.result()
-                if details:
-                    instance_details.append(details)
-            except Exception as e:
-                print(f"[bold red]Erreur lors de la récupération des détails d'une instance : {str(e)}[/bold red]")
+    for instance in instances:
+        details = get_instance_details(instance, catalogue)
+        if details:
+            instance_details.append(details)
 
     # Affichage des résultats
     table = Table(title="")
@@ -280,10 +305,10 @@ def list_instances(conn):
 
 
 # Lister les snapshots
-def list_snapshots(conn):
+def list_snapshots(inventory):
     lang = get_language_preference()
     print_header(TRANSLATIONS[lang]["snapshots_header"])
-    snapshots = list(conn.block_storage.snapshots())
+    snapshots = inventory.snapshots()
 
     if not snapshots:
         print(TRANSLATIONS[lang]["no_snapshots"])
@@ -299,10 +324,10 @@ def list_snapshots(conn):
 
 
 # Lister les backups
-def list_backups(conn):
+def list_backups(inventory):
     lang = get_language_preference()
     print_header(TRANSLATIONS[lang]["backups_header"])
-    backups = list(conn.block_storage.backups())
+    backups = inventory.backups()
 
     if not backups:
         print(TRANSLATIONS[lang]["no_backups"])
@@ -318,10 +343,10 @@ def list_backups(conn):
 
 
 # Lister les volumes
-def list_volumes(conn):
+def list_volumes(inventory):
     lang = get_language_preference()
     print_header(TRANSLATIONS[lang]["volumes_header"])
-    volumes = list(conn.block_storage.volumes())
+    volumes = inventory.volumes()
 
     if not volumes:
         print(TRANSLATIONS[lang]["no_volumes"])
@@ -349,29 +374,18 @@ def list_volumes(conn):
 
 
 # Récupérer les volumes attachés aux instances
-def mounted_volumes(conn):
-    instances = conn.compute.servers()
-    volumes = conn.block_storage.volumes()
-    instance_volumes = {}
-
-    for volume in volumes:
-        if volume.attachments:
-            for attachment in volume.attachments:
-                instance_id = attachment["server_id"]
-                if instance_id not in instance_volumes:
-                    instance_volumes[instance_id] = []
-                instance_volumes[instance_id].append(volume)
-
-    tree = {}
-    for instance in instances:
-        instance_id = instance.id
-        instance_name = instance.name
-        if instance_id in instance_volumes:
-            tree[instance_name] = [volume.name for volume in instance_volumes[instance_id]]
-        else:
-            tree[instance_name] = []
+def mounted_volumes(inventory):
+    """
+    Arborescence instance → volumes montés, tirée de l'index des attachements de l'inventaire.
 
-    return tree
+    Args:
+        inventory (InventorySnapshot): Inventaire figé du rapport
+    """
+    instance_volumes = inventory.volumes_by_server()
+    return {
+        instance.name: [volume.name for volume in instance_volumes.get(instance.id, [])]
+        for instance in inventory.servers()
+    }
 
 
 # Afficher l'arborescence
@@ -389,10 +403,10 @@ def print_tree(tree_data):
 
 
 # Lister les IP flottantes
-def list_floating_ips(conn):
+def list_floating_ips(inventory):
     lang = get_language_preference()
     print_header(TRANSLATIONS[lang]["floating_ips_header"])
-    floating_ips = list(conn.network.ips())
+    floating_ips = inventory.floating_ips()
 
     if not floating_ips:
         print(TRANSLATIONS[lang]["no_floating_ips"])
@@ -408,10 +422,10 @@ def list_floating_ips(conn):
 
 
 # Lister les containers
-def list_containers(conn):
+def list_containers(inventory):
     lang = get_language_preference()
     print_header(TRANSLATIONS[lang]["containers_header"])
-    containers = list(conn.object_store.containers())
+    containers = inventory.containers()
 
     if not containers:
         print(TRANSLATIONS[lang]["no_containers"])
@@ -426,8 +440,149 @@ def list_containers(conn):
     console.print(table)
 
 
+def print_costs(billing_table):
+    """
+    Affiche le coût total de la période et le coût horaire moyen.
+
+    Args:
+        billing_table (BillingTable): Facturation de la période
+    """
+    lang = get_language_preference()
+    cost_chf, cost_euro = calculate_instance_cost(billing_table)
+    print(TRANSLATIONS[lang]["total_cost"].format(cost_chf, cost_euro))
+    hours = billing_table.hours()
+    if hours:
+        print(TRANSLATIONS[lang]["hourly_cost"].format(cost_chf / hours, cost_euro / hours))
+    else:
+        print(TRANSLATIONS[lang]["insufficient_data"])
+
+
+def record_cost_history(billing_table, period):
+    """
+    Ajoute le coût horaire moyen de la période à l'historique local du projet.
+
+    Args:
+        billing_table (BillingTable): Facturation de la période
+        period (tuple): Période de facturation (début, fin) au format 'YYYY-MM-DD HH:MM'
+    """
+    history = open_history_store()
+    if history is None:
+        return
+    start_dt, end_dt = (datetime.strptime(value, "%Y-%m-%d %H:%M").replace(tzinfo=timezone.utc) for value in period)
+    hours = (end_dt - start_dt).total_seconds() / 3600
+    if hours <= 0:
+        return
+    cost_chf, cost_euro = calculate_instance_cost(billing_table)
+    history.record(
+        os.getenv("OS_PROJECT_NAME", ""),
+        {"cost_chf_per_hour": cost_chf / hours, "cost_eur_per_hour": cost_euro / hours},
+        ts=end_dt.timestamp(),
+    )
+
+
+# Collections lues par le résumé, chargées en parallèle avant l'affichage
+SUMMARY_COLLECTIONS = (
+    lambda inventory: inventory.images(visibility="private"),
+    lambda inventory: inventory.images(visibility="shared"),
+    lambda inventory: inventory.servers(),
+    lambda inventory: inventory.flavor_catalogue(),
+    lambda inventory: inventory.snapshots(),
+    lambda inventory: inventory.backups(),
+    lambda inventory: inventory.volumes(),
+    lambda inventory: inventory.floating_ips(),
+    lambda inventory: inventory.containers(),
+)
+
+
+def prefetch_summary(conn, inventory, period):
+    """
+    Charge en même temps la facturation et toutes les collections du résumé.
+
+    Les collections restent dans l'inventaire, que les sections relisent ensuite
+    dans l'ordre d'affichage : la durée totale est celle de l'appel le plus lent.
+    Une collection en échec n'est pas signalée ici ; elle est redemandée par sa
+    section, qui remonte l'erreur à sa place dans le résumé.
+
+    Args:
+        conn (Connection): Connexion OpenStack authentifiée
+        inventory (Inventory): Inventaire à remplir
+        period (tuple): Période de facturation, None pour ne pas l'interroger
+
+    Returns:
+        BillingTable: Facturation de la période, None en cas d'échec ou sans période
+    """
+    with ThreadPoolExecutor(max_workers=len(SUMMARY_COLLECTIONS) + 1) as executor:
+        billing = executor.submit(generate_billing, conn, *period) if period is not None else None
+        wait([executor.submit(fetch, inventory) for fetch in SUMMARY_COLLECTIONS])
+        return billing.result() if billing is not None else None
+
+
+def run_summary(conn, period, inventory=None):
+    """
+    Génère le résumé du projet sur une connexion déjà authentifiée.
+
+    Utilisée par ``main`` et par le daemon, qui lui passe sa connexion et son
+    inventaire gardés en mémoire.
+
+    Args:
+        conn (Connection): Connexion OpenStack authentifiée
+        period (tuple): Période de facturation (début, fin) au format 'YYYY-MM-DD HH:MM',
+            None pour ne pas interroger la facturation (inventaire local)
+        inventory (Inventory): Inventaire à réutiliser (un nouveau par défaut)
+    """
+    lang = get_language_preference()
+    # Un seul état de l'inventaire pour toutes les sections du résumé
+    inventory = InventorySnapshot(inventory or Inventory(conn))
+
+    # Facturation et collections en parallèle, puis affichage dans un ordre fixe
+    billing_table = prefetch_summary(conn, inventory, period)
+    if period is not None:
+        if billing_table:
+            print_costs(billing_table)
+            record_cost_history(billing_table, period)
+        else:
+            print(f"[bold yellow]{TRANSLATIONS[lang]['no_billing']}[/bold yellow]")
+
+    # Lister les ressources
+    list_images(inventory)
+    list_instances(inventory)
+    list_snapshots(inventory)
+    list_backups(inventory)
+    list_volumes(inventory)
+    print_header(TRANSLATIONS[lang]["volumes_tree_header"])
+    tree = mounted_volumes(inventory)
+    print_tree(tree)
+    list_floating_ips(inventory)
+    list_containers(inventory)
+
+
 # Fonction principale
 def main():
+    parser = argparse.ArgumentParser(description="OpenStack Summary")
+    parser.add_argument("--start", help="Début de la période de facturation (YYYY-MM-DD HH:MM)")
+    parser.add_argument("--end", help="Fin de la période de facturation (YYYY-MM-DD HH:MM)")
+    parser.add_argument(
+        "--refresh-billing",
+        action="store_true",
+        help="Oublie la facturation en cache de la période et la relit depuis CloudKitty",
+    )
+    parser.add_argument(
+        "--via-daemon",
+        action="store_true",
+        help="Envoie la demande au daemon openstack-toolbox-daemon s'il tourne",
+    )
+    parser.add_argument(
+        "--from-cache",
+        action="store_true",
+        help="Lit l'inventaire local écrit par le collecteur de métriques, sans appel API ni facturation",
+    )
+    parser.add_argument(
+        "--max-age",
+        type=float,
+        help="Âge maximal accepté de l'inventaire local, en secondes (réglage inventory_max_age par défaut)",
+    )
+    args = parser.parse_args()
+
     lang = get_language_preference()
     toolbox_version = get_version()
     print(f"[yellow bold]{TRANSLATIONS[lang]['welcome'].format(toolbox_version)}[/yellow bold]")
@@ -449,36 +604,37 @@ def main():
 
     print(header)
 
+    if args.from_cache:
+        try:
+            run_summary(None, None, inventory=open_stored_inventory(args.max_age))
+        except StaleInventoryError as e:
+            print(f"[bold red]{TRANSLATIONS[lang]['cache_stale'].format(e)}[/bold red]")
+        return
+
+    period = (args.start, args.end) if args.start and args.end else prompt_billing_period()
+    if args.refresh_billing:
+        refresh_billing_cache(*period)
+    if args.via_daemon:
+        if run_in_daemon("summary", {"period": list(period)}):
+            return
+        print(f"[bold yellow]{TRANSLATIONS[lang]['daemon_unavailable']}[/bold yellow]")
+
     # Test des credentials
     creds, missing_vars = load_openstack_credentials()
     if not creds:
         print(f"[bold red]{TRANSLATIONS[lang]['missing_vars'].format(', '.join(missing_vars))}[/bold red]")
         return
 
+    # Import différé : openstacksdk est long à charger et inutile avant ce point
+    from openstack import connection
+
     conn = connection.Connection(**creds)
     try:
         if not conn.authorize():
             print("[bold red]❌ Échec de la connexion à OpenStack[/bold red]")
             return
 
-        # Générer le fichier de billing
-        billing_text = generate_billing()
-        try:
-            json.loads(billing_text)
-        except json.JSONDecodeError:
-            print(f"[bold yellow]{TRANSLATIONS[lang]['no_billing']}[/bold yellow]")
-
-        # Lister les ressources
-        list_images(conn)
-        list_instances(conn)
-        list_snapshots(conn)
-        list_backups(conn)
-        list_volumes(conn)
-        print_header(TRANSLATIONS[lang]["volumes_tree_header"])
-        tree = mounted_volumes(conn)
-        print_tree(tree)
-        list_floating_ips(conn)
-        list_containers(conn)
+        run_summary(conn, period)
     finally:
         conn.close()
 
@@ -3,7 +3,6 @@
 import argparse
 
 from rich import print
-from rich.prompt import Prompt
 
 from .config import get_language_preference, set_language_preference
 from .utils import get_version
@@ -90,6 +89,8 @@ def display_language_menu():
 
 def configure_language():
     """Configure la langue de l'application"""
+    from rich.prompt import Prompt
+
     lang = get_language_preference()
     display_language_menu()
 
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Planificateur intégré de l'OpenStack Toolbox.
+
+Remplace les trois tâches cron (rapport hebdomadaire, résumé quotidien,
+optimisation) qui lançaient chacune un interpréteur, se ré-authentifiaient et
+relistaient les mêmes ressources. Les tâches tournent ici dans un seul
+processus de longue durée, sur les expressions cron des variables ``CRON_*``,
+et partagent une connexion OpenStack et un inventaire.
+
+Le planificateur tourne seul (``openstack-toolbox-scheduler``) ou dans le
+collecteur de métriques (``--with-scheduler``), qui expose alors la durée des
+tâches à Prometheus.
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Set
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from .config import get_language_preference, load_openstack_credentials, settings
+from .inventory import Inventory
+from .utils import redirect_output
+
+# Dictionnaire des traductions
+TRANSLATIONS = {
+    "fr": {
+        "scheduler_started": "⏰ Planificateur démarré",
+        "job_scheduled": "⏰ Tâche {} ({}) : prochaine exécution {}",
+        "job_started": "▶️ Tâche {} démarrée",
+        "job_finished": "✅ Tâche {} terminée en {:.1f}s",
+        "job_failed": "❌ Échec de la tâche {}",
+        "weekly_report_not_sent": "Rapport hebdomadaire non envoyé",
+        "invalid_cron": "Expression cron invalide : {}",
+        "credentials_error": "❌ Identifiants OpenStack manquants : {}",
+        "auth_error": "❌ Échec de l'authentification OpenStack",
+        "job_duration_desc": "Durée d'exécution des tâches planifiées",
+        "job_failures_desc": "Nombre d'échecs des tâches planifiées",
+        "job_last_success_desc": "Horodatage de la dernière exécution réussie des tâches planifiées",
+    },
+    "en": {
+        "scheduler_started": "⏰ Scheduler started",
+        "job_scheduled": "⏰ Job {} ({}): next run {}",
+        "job_started": "▶️ Job {} started",
+        "job_finished": "✅ Job {} finished in {:.1f}s",
+        "job_failed": "❌ Job {} failed",
+        "weekly_report_not_sent": "Weekly report not sent",
+        "invalid_cron": "Invalid cron expression: {}",
+        "credentials_error": "❌ Missing OpenStack credentials: {}",
+        "auth_error": "❌ OpenStack authentication failed",
+        "job_duration_desc": "Duration of scheduled jobs",
+        "job_failures_desc": "Number of failed scheduled jobs",
+        "job_last_success_desc": "Timestamp of the last successful run of scheduled jobs",
+    },
+}
+
+logger = logging.getLogger("openstack_metrics_collector")
+lang = get_language_preference()
+
+# Métriques des tâches, exposées par le collecteur
+scheduler_job_duration = Histogram(
+    "openstack_toolbox_job_duration_seconds",
+    TRANSLATIONS[lang]["job_duration_desc"],
+    ["job"],
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600),
+    registry=None,
+)
+scheduler_job_failures = Counter(
+    "openstack_toolbox_job_failures_total",
+    TRANSLATIONS[lang]["job_failures_desc"],
+    ["job"],
+    registry=None,
+)
+scheduler_job_last_success = Gauge(
+    "openstack_toolbox_job_last_success_timestamp_seconds",
+    TRANSLATIONS[lang]["job_last_success_desc"],
+    ["job"],
+    registry=None,
+)
+
+# Variables d'environnement et horaires par défaut (identiques à docker/entrypoint.sh)
+DEFAULT_SCHEDULES = {
+    "weekly-notification": ("CRON_WEEKLY_REPORT", "0 8 * * 1"),
+    "daily-summary": ("CRON_DAILY_SUMMARY", "0 9 * * *"),
+    "optimization": ("CRON_OPTIMIZATION", "0 10 * * *"),
+}
+
+CRON_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+}
+
+
+class CronExpression:
+    """
+    Expression cron à cinq champs : minute, heure, jour du mois, mois, jour de la semaine.
+
+    Accepte ``*``, les valeurs, les listes (``1,15``), les intervalles (``1-5``),
+    les pas (``*/15``, ``0-30/10``) et les alias ``@daily``, ``@weekly``...
+    Le dimanche vaut 0 ou 7. Comme cron, si le jour du mois et le jour de la
+    semaine sont tous deux restreints, l'un ou l'autre suffit.
+
+    Args:
+        expression: Expression cron
+
+    Raises:
+        ValueError: Si l'expression est invalide
+
+    Examples:
+        >>> cron = CronExpression("0 8 * * 1")
+        >>> cron.next_after(datetime(2024, 3, 15, 12, 0))
+        datetime.datetime(2024, 3, 18, 8, 0)
+    """
+
+    FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expression: str):
+        self.expression = expression.strip()
+        fields = CRON_ALIASES.get(self.expression, self.expression).split()
+        if len(fields) != 5:
+            raise ValueError(TRANSLATIONS[lang]["invalid_cron"].format(expression))
+        minutes, hours, days, months, weekdays = (
+            self._parse_field(field, low, high) for field, (low, high) in zip(fields, self.FIELDS)
+        )
+        self.minutes, self.hours, self.days, self.months = minutes, hours, days, months
+        # 7 et 0 désignent tous deux le dimanche
+        self.weekdays = {0 if day == 7 else day for day in weekdays}
+        self.days_restricted = not fields[2].startswith("*")
+        self.weekdays_restricted = not fields[4].startswith("*")
+
+    def _parse_field(self, field: str, low: int, high: int) -> Set[int]:
+        values = set()
+        try:
+            for part in field.split(","):
+                value_range, _, step = part.partition("/")
+                if value_range == "*":
+                    start, end = low, high
+                elif "-" in value_range:
+                    start, end = (int(bound) for bound in value_range.split("-", 1))
+                else:
+                    start = int(value_range)
+                    end = high if step else start
+                step = int(step) if step else 1
+                if not low <= start <= end <= high or step < 1:
+                    raise ValueError
+                values.update(range(start, end + 1, step))
+        except ValueError:
+            raise ValueError(TRANSLATIONS[lang]["invalid_cron"].format(self.expression)) from None
+        return values
+
+    def _day_matches(self, dt: datetime) -> bool:
+        in_days = dt.day in self.days
+        # datetime.weekday() : lundi = 0 ; cron : dimanche = 0
+        in_weekdays = (dt.weekday() + 1) % 7 in self.weekdays
+        if self.days_restricted and self.weekdays_restricted:
+            return in_days or in_weekdays
+        return in_days and in_weekdays
+
+    def next_after(self, dt: datetime) -> datetime:
+        """
+        Première échéance strictement postérieure à ``dt``.
+
+        Args:
+            dt: Date de référence
+
+        Returns:
+            datetime: Prochaine échéance, à la minute près
+        """
+        candidate = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Quatre ans suffisent à couvrir tous les cas (29 février compris)
+        limit = candidate + timedelta(days=4 * 366)
+        while candidate <= limit:
+            if candidate.month not in self.months:
+                year, month = divmod(candidate.month, 12)
+                candidate = candidate.replace(year=candidate.year + year, month=month + 1, day=1, hour=0, minute=0)
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(TRANSLATIONS[lang]["invalid_cron"].format(self.expression))
+
+
+class ScheduledJob:
+    """
+    Tâche planifiée : une fonction exécutée à chaque échéance d'une expression cron.
+
+    Args:
+        name: Nom de la tâche (label Prometheus et nom du fichier de log)
+        expression: Expression cron
+        func: Fonction appelée sans argument
+    """
+
+    def __init__(self, name: str, expression: str, func: Callable[[], None]):
+        self.name = name
+        self.cron = CronExpression(expression)
+        self.func = func
+        self.next_run = self.cron.next_after(datetime.now())
+
+
+class Scheduler:
+    """
+    Exécute les tâches planifiées, une à la fois, dans un seul processus.
+
+    Les tâches partagent la connexion OpenStack et l'inventaire du planificateur ;
+    l'affichage de chaque tâche est ajouté à ``<log_dir>/<nom>.log``, comme le
+    faisaient les tâches cron.
+
+    Args:
+        conn: Connexion OpenStack authentifiée
+        inventory_ttl: Durée de vie de l'inventaire partagé, en secondes
+        log_dir: Répertoire des logs des tâches
+
+    Examples:
+        >>> scheduler = Scheduler(conn, inventory_ttl=300, log_dir="/var/log/openstack-toolbox")
+        >>> scheduler.add_default_jobs()
+        >>> scheduler.start()
+    """
+
+    def __init__(self, conn, inventory_ttl: Optional[float] = None, log_dir: Optional[str] = None):
+        self.conn = conn
+        self.inventory = Inventory(conn, ttl=inventory_ttl)
+        self.log_dir = log_dir
+        self.jobs: List[ScheduledJob] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_job(self, name: str, expression: str, func: Callable[[], None]) -> ScheduledJob:
+        """Ajoute une tâche et retourne l'objet correspondant."""
+        job = ScheduledJob(name, expression, func)
+        self.jobs.append(job)
+        logger.info(TRANSLATIONS[lang]["job_scheduled"].format(name, expression, job.next_run))
+        return job
+
+    def add_default_jobs(self) -> None:
+        """Ajoute le rapport hebdomadaire, le résumé quotidien et l'optimisation (horaires ``CRON_*``)."""
+        jobs = {
+            "weekly-notification": self._weekly_report,
+            "daily-summary": self._daily_summary,
+            "optimization": self._optimization,
+        }
+        for name, (env_var, default) in DEFAULT_SCHEDULES.items():
+            self.add_job(name, os.getenv(env_var) or default, jobs[name])
+
+    def _weekly_report(self) -> None:
+        from .weekly_notification_optimization import send_weekly_report
+
+        if not send_weekly_report(self.conn, self.inventory):
+            raise RuntimeError(TRANSLATIONS[lang]["weekly_report_not_sent"])
+
+    def _daily_summary(self) -> None:
+        from .openstack_summary import default_billing_period, run_summary
+
+        run_summary(self.conn, default_billing_period(hours=24), inventory=self.inventory)
+
+    def _optimization(self) -> None:
+        from .openstack_optimization import run_optimization
+
+        run_optimization(self.conn, inventory=self.inventory)
+
+    def run_job(self, job: ScheduledJob) -> bool:
+        """
+        Exécute une tâche et enregistre sa durée.
+
+        Returns:
+            bool: True si la tâche a réussi
+        """
+        logger.info(TRANSLATIONS[lang]["job_started"].format(job.name))
+        started = time.monotonic()
+        success = True
+        try:
+            if self.log_dir:
+                os.makedirs(self.log_dir, exist_ok=True)
+                with open(os.path.join(self.log_dir, f"{job.name}.log"), "a", encoding="utf-8") as output:
+                    with redirect_output(output):
+                        job.func()
+            else:
+                job.func()
+        except Exception:
+            success = False
+            scheduler_job_failures.labels(job=job.name).inc()
+            logger.exception(TRANSLATIONS[lang]["job_failed"].format(job.name))
+        duration = time.monotonic() - started
+        scheduler_job_duration.labels(job=job.name).observe(duration)
+        if success:
+            scheduler_job_last_success.labels(job=job.name).set(time.time())
+            logger.info(TRANSLATIONS[lang]["job_finished"].format(job.name, duration))
+        return success
+
+    def run_pending(self, now: Optional[datetime] = None) -> None:
+        """Exécute les tâches arrivées à échéance puis calcule leur prochaine échéance."""
+        now = now or datetime.now()
+        for job in self.jobs:
+            if job.next_run <= now:
+                self.run_job(job)
+                # Repartir de l'heure de fin : une tâche longue ne se relance pas en rattrapage
+                job.next_run = job.cron.next_after(max(now, datetime.now()))
+                logger.info(TRANSLATIONS[lang]["job_scheduled"].format(job.name, job.cron.expression, job.next_run))
+
+    def run_forever(self) -> None:
+        """Boucle principale, jusqu'à l'appel de ``stop``."""
+        logger.info(TRANSLATIONS[lang]["scheduler_started"])
+        while not self._stop.is_set():
+            self.run_pending()
+            if not self.jobs:
+                self._stop.wait(60)
+                continue
+            next_run = min(job.next_run for job in self.jobs)
+            # Réveil au plus tard chaque minute pour suivre les changements d'heure
+            self._stop.wait(min(60.0, max(0.0, (next_run - datetime.now()).total_seconds())))
+
+    def start(self) -> threading.Thread:
+        """Lance la boucle principale dans un thread d'arrière-plan."""
+        self._thread = threading.Thread(target=self.run_forever, name="scheduler", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self) -> None:
+        """Arrête la boucle principale à la fin de la tâche en cours."""
+        self._stop.set()
+
+
+def create_scheduler() -> Optional[Scheduler]:
+    """
+    Crée le planificateur avec les tâches par défaut, sur une connexion authentifiée.
+
+    Returns:
+        Scheduler: Planificateur prêt à démarrer, None si la connexion a échoué
+    """
+    creds, missing_vars = load_openstack_credentials()
+    if not creds:
+        logger.error(TRANSLATIONS[lang]["credentials_error"].format(", ".join(missing_vars)))
+        return None
+
+    # Import différé : openstacksdk est long à charger et inutile avant ce point
+    from openstack import connection
+
+    conn = connection.Connection(**creds)
+    if not conn.authorize():
+        logger.error(TRANSLATIONS[lang]["auth_error"])
+        return None
+
+    scheduler = Scheduler(
+        conn,
+        inventory_ttl=settings.get("inventory_ttl"),
+        log_dir=settings.get("scheduler_log_dir"),
+    )
+    scheduler.add_default_jobs()
+    return scheduler
+
+
+def main():
+    from .openstack_metrics_collector import configure_logging
+
+    configure_logging()
+    scheduler = create_scheduler()
+    if scheduler is None:
+        raise SystemExit(1)
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        scheduler.stop()
+    finally:
+        scheduler.conn.close()
+
+
+if __name__ == "__main__":
+    main()
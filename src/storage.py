@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Base commune des stockages SQLite locaux (inventaire, historique, facturation, analyse).
+
+Chaque base est un fichier unique en mode WAL : les rapports la lisent pendant
+que le collecteur ou le daemon y écrivent. Le répertoire et le schéma sont créés
+à la première connexion.
+"""
+
+import os
+import sqlite3
+import threading
+
+
+class SQLiteStore:
+    """
+    Base SQLite locale, créée avec son répertoire et son schéma (``SCHEMA``) au premier accès.
+
+    Args:
+        path: Chemin du fichier SQLite (``~`` accepté)
+    """
+
+    SCHEMA = ""
+
+    def __init__(self, path: str):
+        self.path = os.path.expanduser(path)
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            # sqlite3 ne crée pas le répertoire : le fichier ne pourrait pas être ouvert
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        db = sqlite3.connect(self.path, timeout=30)
+        if not self._initialized:
+            # WAL : les rapports lisent pendant que le collecteur écrit
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(self.SCHEMA)
+            self._migrate(db)
+            self._initialized = True
+        return db
+
+    def _migrate(self, db: sqlite3.Connection) -> None:
+        """Met à jour une base créée par une version précédente (rien par défaut)."""
@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""
+Mesures d'utilisation des instances (Gnocchi) et détection des instances inactives.
+
+Une instance ACTIVE qui tourne toute la semaine à 1 % de CPU coûte autant qu'une
+instance chargée. Les mesures CPU, réseau et disque d'une semaine sont demandées
+à Gnocchi par lots d'instances (``/v1/aggregates`` groupé par instance, à une
+granularité grossière), rangées dans des matrices NumPy instances × intervalles,
+puis résumées (percentiles, part du temps inactif) par opérations vectorisées :
+quelques dizaines de requêtes et de calculs suffisent pour des milliers
+d'instances.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .config import settings
+from .exceptions import GnocchiError
+
+# Endpoints Gnocchi des régions absentes du catalogue de services
+GNOCCHI_URLS = {
+    "dc3-a": "https://api.pub1.infomaniak.cloud/metric",
+    "dc4-a": "https://api.pub2.infomaniak.cloud/metric",
+}
+
+
+class UsageMetric(NamedTuple):
+    """Mesure agrégée par instance : type de ressource Gnocchi, attribut de regroupement et opération."""
+
+    resource_type: str
+    group_by: str
+    operations: str
+
+
+USAGE_METRICS = {
+    # Temps CPU consommé par intervalle, en nanosecondes
+    "cpu": UsageMetric("instance", "id", "(aggregate sum (metric cpu rate:mean))"),
+    # Octets échangés par intervalle, toutes interfaces de l'instance confondues
+    "network": UsageMetric(
+        "instance_network_interface",
+        "instance_id",
+        "(aggregate sum (metric (network.incoming.bytes rate:mean) (network.outgoing.bytes rate:mean)))",
+    ),
+    # Octets lus et écrits par intervalle, tous disques de l'instance confondus
+    "disk": UsageMetric(
+        "instance_disk",
+        "instance_id",
+        "(aggregate sum (metric (disk.device.read.bytes rate:mean) (disk.device.write.bytes rate:mean)))",
+    ),
+    # Mémoire utilisée, en Mo
+    "memory": UsageMetric("instance", "id", "(aggregate max (metric memory.usage max))"),
+}
+
+
+class GnocchiAggregates:
+    """
+    Lecture groupée des mesures Gnocchi via ``/v1/aggregates``.
+
+    Utilise la session keystoneauth de la connexion, comme ``billing.CloudKittyClient``.
+
+    Args:
+        session: Session keystoneauth authentifiée (``conn.session``)
+        region_name: Région (endpoint de ``GNOCCHI_URLS`` si connue, sinon celui du catalogue)
+        timeout: Timeout HTTP par requête, en secondes (réglage ``http_timeout`` par défaut)
+
+    Examples:
+        >>> gnocchi = GnocchiAggregates(conn.session, region_name="dc3-a")
+        >>> series = gnocchi.aggregate(USAGE_METRICS["cpu"], ids, start, stop, granularity=3600)
+        >>> series["c8a7..."]
+        [('2024-03-15T10:00:00+00:00', 1.2e9), ...]
+    """
+
+    SERVICE_TYPE = "metric"
+
+    def __init__(self, session, region_name: Optional[str] = None, timeout=None):
+        self.session = session
+        self.timeout = timeout if timeout is not None else settings.get("http_timeout")
+        self.endpoint_filter = {"service_type": self.SERVICE_TYPE, "interface": "public"}
+        if region_name:
+            self.endpoint_filter["region_name"] = region_name
+        self.endpoint_override = GNOCCHI_URLS.get((region_name or "").lower())
+
+    def aggregate(
+        self, metric: UsageMetric, ids: Sequence[str], start: datetime, stop: datetime, granularity: int
+    ) -> Dict[str, List[Any]]:
+        """
+        Série agrégée de chaque instance d'un lot.
+
+        Args:
+            metric: Mesure demandée (voir ``USAGE_METRICS``)
+            ids: IDs des instances du lot
+            start: Début de la période (datetime avec fuseau)
+            stop: Fin de la période (datetime avec fuseau)
+            granularity: Granularité en secondes (doit exister dans la politique d'archivage)
+
+        Returns:
+            dict: Liste de (horodatage ISO, valeur) par ID d'instance
+
+        Raises:
+            GnocchiError: Si Gnocchi répond en erreur ou est injoignable
+        """
+        params = {
+            "groupby": metric.group_by,
+            "start": start.isoformat(),
+            "stop": stop.isoformat(),
+            "granularity": granularity,
+            "details": "false",
+        }
+        body = {
+            "operations": metric.operations,
+            "resource_type": metric.resource_type,
+            "search": {"in": {metric.group_by: list(ids)}},
+        }
+        try:
+            response = self.session.post(
+                "/v1/aggregates",
+                endpoint_filter=self.endpoint_filter,
+                endpoint_override=self.endpoint_override,
+                params=params,
+                json=body,
+                timeout=self.timeout,
+                raise_exc=False,
+            )
+        except Exception as e:
+            raise GnocchiError(f"Gnocchi: {e}") from e
+        if response.status_code != 200:
+            raise GnocchiError(f"Gnocchi HTTP {response.status_code}: {response.text[:200]}")
+
+        series = {}
+        for group in response.json():
+            instance_id = (group.get("group") or {}).get(metric.group_by)
+            measures = ((group.get("measures") or {}).get("measures") or {}).get("aggregated") or []
+            series[instance_id] = [(timestamp, value) for timestamp, _, value in measures]
+        return series
+
+
+class UsageMatrix:
+    """
+    Mesures d'une semaine rangées en matrices NumPy : une ligne par instance, une colonne par intervalle.
+
+    Les intervalles sans mesure valent NaN.
+
+    Args:
+        ids: IDs des instances, dans l'ordre des lignes
+        start: Début de la période (secondes epoch)
+        granularity: Durée d'un intervalle, en secondes
+        slots: Nombre d'intervalles
+    """
+
+    def __init__(self, ids: Sequence[str], start: int, granularity: int, slots: int):
+        import numpy as np
+
+        self.ids = list(ids)
+        self.rows = {instance_id: row for row, instance_id in enumerate(self.ids)}
+        self.start = start
+        self.granularity = granularity
+        self.slots = slots
+        self.values: Dict[str, Any] = {}
+        self._empty = lambda: np.full((len(self.ids), slots), np.nan)
+
+    def fill(self, name: str, series: Dict[str, List[Any]]) -> None:
+        """Range les séries d'un lot dans la matrice ``name``."""
+        import numpy as np
+
+        matrix = self.values.get(name)
+        if matrix is None:
+            matrix = self.values[name] = self._empty()
+        # Toutes les instances d'un lot partagent les mêmes horodatages : chacun n'est décodé qu'une fois
+        slots: Dict[str, int] = {}
+        rows, columns, values = [], [], []
+        for instance_id, points in series.items():
+            row = self.rows.get(instance_id)
+            if row is None or not points:
+                continue
+            timestamps, measures = zip(*points)
+            for timestamp in timestamps:
+                if timestamp not in slots:
+                    slots[timestamp] = (_to_epoch(timestamp) - self.start) // self.granularity
+            rows.append(np.full(len(points), row))
+            columns.append([slots[timestamp] for timestamp in timestamps])
+            values.append(measures)
+        if not rows:
+            return
+        rows = np.concatenate(rows)
+        columns = np.concatenate([np.asarray(column, dtype=np.int64) for column in columns])
+        values = np.concatenate([np.asarray(value, dtype=np.float64) for value in values])
+        inside = (columns >= 0) & (columns < self.slots)
+        matrix[rows[inside], columns[inside]] = values[inside]
+
+    def get(self, name: str, ids: Optional[Sequence[str]] = None):
+        """
+        Matrice d'une mesure (NaN partout si elle n'a pas été relevée).
+
+        Args:
+            name: Nom de la mesure
+            ids: Instances voulues, dans cet ordre (toutes par défaut) ; une instance
+                absente du relevé a une ligne NaN
+        """
+        import numpy as np
+
+        matrix = self.values.get(name)
+        if matrix is None:
+            matrix = self._empty()
+        if ids is None or list(ids) == self.ids:
+            return matrix
+        rows = np.array([self.rows.get(instance_id, -1) for instance_id in ids], dtype=np.intp)
+        selected = np.full((len(rows), self.slots), np.nan)
+        known = rows >= 0
+        selected[known] = matrix[rows[known]]
+        return selected
+
+
+def measure_usage(
+    conn,
+    ids: Sequence[str],
+    start: datetime,
+    stop: datetime,
+    metrics: Sequence[str] = ("cpu", "network", "disk"),
+    granularity: Optional[int] = None,
+    batch_size: Optional[int] = None,
+) -> UsageMatrix:
+    """
+    Relève les mesures d'une période pour des instances, par lots en parallèle.
+
+    Un lot en échec (mesure absente, type de ressource inconnu...) laisse ses
+    cases à NaN au lieu d'arrêter le relevé ; si tous les lots échouent, l'erreur
+    est propagée.
+
+    Args:
+        conn (Connection): Connexion OpenStack authentifiée
+        ids: IDs des instances
+        start: Début de la période (datetime avec fuseau)
+        stop: Fin de la période (datetime avec fuseau)
+        metrics: Noms des mesures de ``USAGE_METRICS``
+        granularity: Granularité en secondes (réglage ``idle_granularity`` par défaut)
+        batch_size: Instances par requête (réglage ``idle_batch_size`` par défaut)
+
+    Raises:
+        GnocchiError: Si aucune mesure n'a pu être lue
+    """
+    granularity = int(granularity or settings.get("idle_granularity"))
+    batch_size = int(batch_size or settings.get("idle_batch_size"))
+    first = _to_epoch(start)
+    first -= first % granularity
+    matrix = UsageMatrix(ids, first, granularity, max(1, -(-(_to_epoch(stop) - first) // granularity)))
+    if not ids:
+        return matrix
+
+    gnocchi = GnocchiAggregates(conn.session, region_name=getattr(conn.config, "region_name", None))
+    batches = [list(ids[i : i + batch_size]) for i in range(0, len(ids), batch_size)]
+    jobs = [(name, batch) for name in metrics for batch in batches]
+    errors = []
+
+    def fetch(job):
+        name, batch = job
+        try:
+            return name, gnocchi.aggregate(USAGE_METRICS[name], batch, start, stop, granularity)
+        except GnocchiError as e:
+            errors.append(e)
+            return name, {}
+
+    with ThreadPoolExecutor(max_workers=settings.get("gnocchi_workers")) as executor:
+        # Rangement dans le thread principal : les matrices ne sont jamais écrites en parallèle
+        for name, series in executor.map(fetch, jobs):
+            matrix.fill(name, series)
+    if errors and len(errors) == len(jobs):
+        raise errors[0]
+    return matrix
+
+
+class UsageSnapshot:
+    """
+    Mesures des derniers jours relevées une seule fois pour toutes les sources d'un rapport.
+
+    Les sources d'inactivité et de redimensionnement, qui tournent en parallèle,
+    mesurent les mêmes instances : le premier appel de ``measure`` relève toutes
+    les mesures de ``metrics`` pour ces instances, les appels suivants attendent
+    puis reçoivent la même UsageMatrix (ou la même erreur).
+
+    Args:
+        conn (Connection): Connexion OpenStack authentifiée
+        days: Durée de la période observée, jusqu'au premier relevé
+        metrics: Noms des mesures de ``USAGE_METRICS`` (toutes par défaut)
+
+    Examples:
+        >>> usage = UsageSnapshot(conn)
+        >>> idle, measured = find_idle_instances(conn, servers, usage=usage)
+        >>> plan = plan_rightsizing(conn, servers, flavors, usage=usage)  # Aucune requête de plus
+    """
+
+    def __init__(self, conn, days: int = 7, metrics: Sequence[str] = tuple(USAGE_METRICS)):
+        self.conn = conn
+        self.days = days
+        self.metrics = tuple(metrics)
+        self._lock = threading.Lock()
+        self._matrix: Optional[UsageMatrix] = None
+        self._error: Optional[GnocchiError] = None
+
+    def measure(self, ids: Sequence[str]) -> UsageMatrix:
+        """
+        Mesures des instances ``ids``, relevées au premier appel seulement.
+
+        Les appels suivants réutilisent ce relevé, quels que soient leurs ``ids`` :
+        une instance qu'il ne couvre pas a des lignes NaN (voir ``UsageMatrix.get``).
+
+        Raises:
+            GnocchiError: Si aucune mesure n'a pu être lue
+        """
+        with self._lock:
+            if self._matrix is None and self._error is None:
+                stop = datetime.now(timezone.utc)
+                try:
+                    self._matrix = measure_usage(
+                        self.conn, list(ids), stop - timedelta(days=self.days), stop, self.metrics
+                    )
+                except GnocchiError as e:
+                    self._error = e
+            if self._error is not None:
+                raise self._error
+            return self._matrix
+
+
+def row_percentile(matrix, q: float):
+    """
+    Percentile de chaque ligne en ignorant les NaN (interpolation linéaire, comme ``np.nanpercentile``).
+
+    Un seul tri de toute la matrice, là où ``np.nanpercentile`` traite les lignes
+    une par une dès qu'elles contiennent des NaN. Une ligne sans valeur donne NaN.
+    """
+    import numpy as np
+
+    ordered = np.sort(matrix, axis=1)  # Les NaN sont rangés en fin de ligne
+    counts = np.isfinite(matrix).sum(axis=1)
+    position = np.maximum(counts - 1, 0) * (q / 100)
+    lower = np.floor(position).astype(np.intp)
+    upper = np.minimum(lower + 1, np.maximum(counts - 1, 0))
+    fraction = position - lower
+    rows = np.arange(len(matrix))
+    with np.errstate(invalid="ignore"):
+        result = ordered[rows, lower] * (1 - fraction) + ordered[rows, upper] * fraction
+    result[counts == 0] = np.nan
+    return result
+
+
+class IdleInstance(NamedTuple):
+    """Instance active jugée inutilisée, avec les chiffres qui l'expliquent."""
+
+    id: str
+    name: str
+    project: str
+    cpu_p95: float
+    idle_ratio: float
+    network_p95: float
+    disk_p95: float
+
+
+def find_idle_instances(
+    conn, servers: Sequence[Any], days: int = 7, usage: Optional[UsageSnapshot] = None, catalogue=None
+) -> Tuple[List[IdleInstance], List[Any]]:
+    """
+    Instances ACTIVE dont le CPU, le réseau et le disque sont restés quasi nuls.
+
+    Une instance est inactive si son CPU au 95e percentile reste sous
+    ``idle_cpu_percent`` % de ses vCPU, et si son réseau et son disque au 95e
+    percentile restent sous ``idle_network_bps`` et ``idle_disk_bps`` octets par
+    seconde (quand ces mesures existent). Au moins la moitié des intervalles
+    doivent avoir une mesure CPU. Les vCPU viennent du catalogue des flavors, ou
+    du flavor embarqué dans l'instance (Nova ≥ 2.47) ; une instance dont le
+    flavor est introuvable n'est pas jugée.
+
+    Args:
+        conn (Connection): Connexion OpenStack authentifiée
+        servers: Instances (openstacksdk ou StoredResource)
+        days: Durée de la période observée, jusqu'à maintenant
+        usage: Relevé partagé avec les autres sources du rapport (sinon, relevé propre)
+        catalogue (FlavorCatalogue): Catalogue des flavors (``inventory.flavor_catalogue()``)
+
+    Returns:
+        tuple: IdleInstance, de la moins utilisée à la plus utilisée, et instances
+            effectivement mesurées (assez de mesures CPU pour rendre un verdict)
+
+    Raises:
+        GnocchiError: Si Gnocchi est indisponible
+    """
+    import numpy as np
+
+    active = [server for server in servers if (server.status or "").upper() == "ACTIVE"]
+    if not active:
+        return [], []
+    ids = [server.id for server in active]
+    if usage is not None:
+        matrix = usage.measure(ids)
+    else:
+        stop = datetime.now(timezone.utc)
+        matrix = measure_usage(conn, ids, stop - timedelta(days=days), stop)
+
+    vcpus = np.array([_vcpus(server, catalogue) for server in active])
+    # Temps CPU (ns par intervalle) rapporté au temps disponible sur tous les vCPU
+    cpu = matrix.get("cpu", ids) / (matrix.granularity * 1e9 * vcpus[:, None]) * 100
+    network = matrix.get("network", ids) / matrix.granularity
+    disk = matrix.get("disk", ids) / matrix.granularity
+
+    observed = np.isfinite(cpu)
+    coverage = observed.mean(axis=1)
+    cpu_p95 = row_percentile(cpu, 95)
+    with np.errstate(invalid="ignore"):
+        idle_ratio = (observed & (cpu < settings.get("idle_cpu_percent"))).sum(axis=1) / np.maximum(
+            observed.sum(axis=1), 1
+        )
+    network_p95 = row_percentile(network, 95)
+    disk_p95 = row_percentile(disk, 95)
+
+    measured = coverage >= 0.5
+    idle = (
+        measured
+        & (cpu_p95 < settings.get("idle_cpu_percent"))
+        & ~(network_p95 >= settings.get("idle_network_bps"))
+        & ~(disk_p95 >= settings.get("idle_disk_bps"))
+    )
+    order = np.argsort(cpu_p95[idle], kind="stable")
+    rows = np.flatnonzero(idle)[order]
+    idle_instances = [
+        IdleInstance(
+            id=active[row].id,
+            name=active[row].name,
+            project=active[row].project_id or "",
+            cpu_p95=float(cpu_p95[row]),
+            idle_ratio=float(idle_ratio[row]),
+            network_p95=float(network_p95[row]),
+            disk_p95=float(disk_p95[row]),
+        )
+        for row in rows
+    ]
+    return idle_instances, [server for server, keep in zip(active, measured) if keep]
+
+
+def _vcpus(server: Any, catalogue) -> float:
+    # Avant Nova 2.47, le flavor embarqué ne contient que son ID : le catalogue le résout
+    index = catalogue.index(server.flavor) if catalogue is not None else None
+    if index is not None and catalogue.vcpus[index] > 0:
+        return float(catalogue.vcpus[index])
+    vcpus = (server.flavor or {}).get("vcpus") if not isinstance(server.flavor, str) else None
+    # Inconnus : CPU à NaN, l'instance n'a pas de verdict
+    return float(vcpus) if vcpus else float("nan")
+
+
+def _to_epoch(value: Any) -> int:
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    return int(value.timestamp())
@@ -1,11 +1,14 @@
 #!/usr/bin/env python3
 
 import os
+import threading
+from contextlib import contextmanager, redirect_stdout
 from datetime import datetime
-from typing import Optional, Tuple
+from typing import IO, Iterator, Optional, Tuple
 
-import tomli
-from rich import print
+# sys.stdout est global au processus : une seule redirection à la fois
+# (réentrant, pour qu'une commande redirigée puisse capturer une sous-commande)
+_output_lock = threading.RLock()
 
 
 def format_size(size_bytes: int) -> str:
@@ -107,6 +110,8 @@ def isoformat(dt: datetime) -> str:
 def get_version() -> str:
     pyproject_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "pyproject.toml"))
     try:
+        import tomli
+
         with open(pyproject_path, "rb") as f:
             data = tomli.load(f)
         return data.get("project", {}).get("version", "unknown")
@@ -127,6 +132,40 @@ def print_header(header: str) -> None:
         [yellow bold]         LISTE DES INSTANCES         [/yellow bold]
         ==========================================
     """
+    from rich import print
+
     print("\n" + "=" * 50)
     print(f"[yellow bold]{header.center(50)}[/yellow bold]")
     print("=" * 50 + "\n")
+
+
+@contextmanager
+def redirect_output(stream: IO[str], columns: Optional[int] = None) -> Iterator[IO[str]]:
+    """
+    Redirige la sortie standard, et donc l'affichage Rich, vers un autre flux.
+
+    Utilisée par les processus de longue durée (daemon, planificateur) pour envoyer
+    le rendu d'une commande ailleurs que sur leur propre sortie. Les redirections
+    sont sérialisées, sys.stdout étant partagé par tous les threads.
+
+    Args:
+        stream: Flux texte qui reçoit la sortie
+        columns: Largeur d'affichage à utiliser pour le rendu Rich (optionnel)
+
+    Examples:
+        >>> buffer = io.StringIO()
+        >>> with redirect_output(buffer, columns=120):
+        ...     print_header("LISTE DES INSTANCES")
+    """
+    with _output_lock:
+        previous_columns = os.environ.get("COLUMNS")
+        if columns:
+            os.environ["COLUMNS"] = str(columns)
+        try:
+            with redirect_stdout(stream):
+                yield stream
+        finally:
+            if previous_columns is None:
+                os.environ.pop("COLUMNS", None)
+            else:
+                os.environ["COLUMNS"] = previous_columns
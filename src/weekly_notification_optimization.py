@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 
+import io
 import os
 import smtplib
 import subprocess
@@ -13,8 +14,10 @@ from .config import (
     create_smtp_config_interactive,
     get_language_preference,
     load_smtp_config,
+    settings,
 )
-from .utils import get_version, print_header
+from .history import open_history_store
+from .utils import get_version, print_header, redirect_output
 
 # Dictionnaire des traductions
 TRANSLATIONS = {
@@ -52,6 +55,8 @@ TRANSLATIONS = {
         "email_subject": "Rapport hebdomadaire : Infomaniak Openstack Optimisation",
         "test_email_subject": "Test SMTP - OpenStack Toolbox",
         "test_email_body": "✅ Ceci est un e-mail test de la configuration SMTP.",
+        "trends_header": "ÉVOLUTION SUR {} SEMAINES",
+        "trend_week": "Semaine du",
     },
     "en": {
         "welcome": "🎉 Welcome to OpenStack Toolbox 🧰 v{} 🎉",
@@ -87,11 +92,13 @@ TRANSLATIONS = {
         "email_subject": "Weekly Report: Infomaniak Openstack Optimization",
         "test_email_subject": "SMTP Test - OpenStack Toolbox",
         "test_email_body": "✅ This is a test email from the SMTP configuration.",
+        "trends_header": "TRENDS OVER {} WEEKS",
+        "trend_week": "Week of",
     },
 }
 
 
-def generate_report():
+def generate_report(conn=None, inventory=None):
     """
     Génère un rapport hebdomadaire des ressources OpenStack.
 
@@ -101,6 +108,13 @@ def generate_report():
     - Coûts estimés
     - Recommandations d'optimisation
 
+    Avec une connexion, le résumé de la semaine écoulée est généré dans le
+    processus courant (planificateur) au lieu d'un nouvel interpréteur.
+
+    Args:
+        conn (Connection): Connexion OpenStack authentifiée (optionnel)
+        inventory (Inventory): Inventaire partagé à réutiliser (optionnel)
+
     Returns:
         str: Contenu du rapport au format HTML
 
@@ -112,6 +126,17 @@ def generate_report():
         <head>
             <title>Rapport hebdomadaire OpenStack</title>
     """
+    if conn is not None:
+        from .openstack_summary import default_billing_period, run_summary
+
+        buffer = io.StringIO()
+        try:
+            with redirect_output(buffer, columns=120):
+                run_summary(conn, default_billing_period(hours=7 * 24), inventory=inventory)
+        except Exception as e:
+            return f"Erreur lors de la génération du rapport : {str(e)}"
+        return buffer.getvalue()
+
     # Exécuter openstack_summary.py pour générer le rapport
     try:
         result = subprocess.run(
@@ -121,7 +146,7 @@ def generate_report():
             ],
             capture_output=True,
             text=True,
-            timeout=300,
+            timeout=settings.get("report_timeout"),
         )
         if result.returncode != 0:
             return f"Erreur lors de la génération du rapport (code {result.returncode}) : {result.stderr.strip()}"
@@ -132,6 +157,45 @@ def generate_report():
         return f"Erreur lors de la génération du rapport : {str(e)}"
 
 
+# Métriques de l'historique reprises dans le rapport, dans cet ordre
+TREND_METRICS = ("instances", "volumes", "volumes_gb", "floating_ips", "quota_cores", "cost_chf_per_hour")
+
+
+def format_usage_trends(project=None, weeks=4):
+    """
+    Résume l'évolution hebdomadaire de l'utilisation depuis l'historique local.
+
+    Args:
+        project (str): Nom du projet (``OS_PROJECT_NAME`` par défaut)
+        weeks (int): Nombre de semaines, la semaine en cours comprise
+
+    Returns:
+        str: Tableau texte (une ligne par métrique, une colonne par semaine), vide sans historique
+    """
+    lang = get_language_preference()
+    history = open_history_store()
+    if history is None:
+        return ""
+    project = project if project is not None else os.getenv("OS_PROJECT_NAME", "")
+
+    trends = {metric: history.trend(project, metric, period="week", periods=weeks) for metric in TREND_METRICS}
+    week_starts = sorted({point.start for trend in trends.values() for point in trend})
+    if not week_starts:
+        return ""
+
+    lines = ["", "=" * 60, TRANSLATIONS[lang]["trends_header"].format(weeks), "=" * 60]
+    lines.append(
+        f"{TRANSLATIONS[lang]['trend_week']:<20}" + "".join(f"{start:%Y-%m-%d}".rjust(12) for start in week_starts)
+    )
+    for metric, trend in trends.items():
+        if not trend:
+            continue
+        averages = {point.start: point.average for point in trend}
+        cells = (f"{averages[start]:.2f}" if start in averages else "-" for start in week_starts)
+        lines.append(f"{metric:<20}" + "".join(cell.rjust(12) for cell in cells))
+    return "\n".join(lines) + "\n"
+
+
 def send_email(smtp_config, subject, body):
     """
     Envoie un email via SMTP avec le rapport hebdomadaire.
@@ -178,6 +242,34 @@ def send_email(smtp_config, subject, body):
         return False
 
 
+def send_weekly_report(conn=None, inventory=None):
+    """
+    Génère et envoie le rapport hebdomadaire sans interaction.
+
+    Utilisée par le planificateur : la configuration SMTP doit déjà exister.
+
+    Args:
+        conn (Connection): Connexion OpenStack authentifiée (optionnel)
+        inventory (Inventory): Inventaire partagé à réutiliser (optionnel)
+
+    Returns:
+        bool: True si le rapport a été envoyé, False sinon
+    """
+    lang = get_language_preference()
+    smtp_config = load_smtp_config()
+    if not smtp_config:
+        print(f"[bold red]{TRANSLATIONS[lang]['smtp_incomplete']}[/]")
+        return False
+
+    print(f"[bold cyan]{TRANSLATIONS[lang]['generating_report']}[/]")
+    email_body = generate_report(conn, inventory) + format_usage_trends()
+    if not send_email(smtp_config, TRANSLATIONS[lang]["email_subject"], email_body):
+        print(f"[bold red]{TRANSLATIONS[lang]['check_smtp']}[/]")
+        return False
+    print(f"[bold green]{TRANSLATIONS[lang]['email_sent']}[/]")
+    return True
+
+
 def setup_cron():
     """
     Configure une tâche cron pour l'envoi hebdomadaire du rapport.
@@ -260,7 +352,7 @@ def main():
 
     # Générer et envoyer le rapport
     print(f"[bold cyan]{TRANSLATIONS[lang]['generating_report']}[/]")
-    email_body = generate_report()
+    email_body = generate_report() + format_usage_trends()
     print(email_body)
 
     # Envoyer l'email